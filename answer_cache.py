@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+의미 기반 답변 캐시 (거의 같은 질문의 답변 재사용)
+
+"상속세 신고기한이 언제야?"와 "상속세 신고 기한은 언제인가요?"처럼 표현만 다른 질문에
+gpt-4o-mini 답변을 다시 생성하지 않도록, 질문 임베딩으로 이전 답변을 찾습니다.
+다음 조건을 모두 만족할 때만 적중으로 봅니다.
+
+- 질문 임베딩의 코사인 유사도가 threshold 이상
+- 검색된 문서 id 집합이 완전히 같음 (답변의 근거가 같음)
+- 캐시에 넣을 때와 인덱스 버전이 같음 (version_fn, 버전이 바뀌면 캐시 전체를 비움)
+
+항목은 max_entries개까지 LRU로 유지하고 ttl초가 지나면 만료됩니다.
+대화 기록에 따라 답이 달라지는 멀티턴 질문에는 쓰지 말고, 단일 턴 질문에만 사용합니다.
+
+    cache = SemanticAnswerCache(version_fn=lambda: read_index_version(DB_DIR, collection_name))
+    result = cache.lookup(query_embedding, doc_ids)
+    if result is None:
+        result = ...생성...
+        cache.store(query_embedding, doc_ids, result)
+
+환경 변수 ANSWER_CACHE_THRESHOLD / ANSWER_CACHE_SIZE / ANSWER_CACHE_TTL로 기본값을 바꿀 수 있습니다.
+(configured_answer_cache, ANSWER_CACHE_SIZE=0이면 캐시하지 않음)
+"""
+
+import os
+import copy
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 60 * 60
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+class SemanticAnswerCache:
+    """질문 임베딩 + 검색 문서 id 집합 → 답변 캐시"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl: float = DEFAULT_TTL, version_fn=None, clock=time.monotonic):
+        """
+        Args:
+            threshold: 적중으로 볼 최소 코사인 유사도
+            ttl: 항목 유효 시간(초), None이면 만료 없음
+            version_fn: 현재 인덱스 버전을 반환하는 함수 (None이면 버전 확인 안 함)
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_fn = version_fn
+        self.clock = clock
+        # 번호 → (단위 벡터, 문서 id frozenset, 답변, 만료 시각)
+        self._entries = OrderedDict()
+        self._next_key = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "near_misses": 0, "expired": 0, "evictions": 0,
+                         "invalidations": 0}
+
+    def _check_version(self):
+        """인덱스 버전이 바뀌었으면 캐시를 비움 (락 안에서 호출)"""
+        if self.version_fn is None:
+            return
+        version = self.version_fn()
+        if version != self._version:
+            if self._entries:
+                self.counters["invalidations"] += 1
+            self._entries.clear()
+            self._version = version
+
+    def lookup(self, query_embedding, doc_ids) -> dict:
+        """
+        적중하면 저장된 답변의 복사본, 아니면 None.
+        near_misses는 유사도는 넘었지만 문서 id 집합이 달라 쓰지 않은 횟수입니다.
+        """
+        query = _unit(query_embedding)
+        doc_ids = frozenset(doc_ids)
+        with self._lock:
+            self._check_version()
+            now = self.clock()
+            best_key, best_score, near_miss = None, self.threshold, False
+            for key, (vector, ids, _, expires) in list(self._entries.items()):
+                if expires is not None and expires <= now:
+                    del self._entries[key]
+                    self.counters["expired"] += 1
+                    continue
+                if vector.shape != query.shape:
+                    continue
+                score = float(vector @ query)
+                if score < self.threshold:
+                    continue
+                if ids != doc_ids:
+                    near_miss = True
+                elif score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                self.counters["misses"] += 1
+                self.counters["near_misses"] += near_miss
+                return None
+            self._entries.move_to_end(best_key)
+            self.counters["hits"] += 1
+            return copy.deepcopy(self._entries[best_key][2])
+
+    def store(self, query_embedding, doc_ids, answer: dict):
+        """답변 저장 (가장 오래 쓰이지 않은 항목부터 max_entries개를 넘는 만큼 지움)"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._check_version()
+            expires = None if self.ttl is None else self.clock() + self.ttl
+            self._entries[self._next_key] = (_unit(query_embedding), frozenset(doc_ids),
+                                             copy.deepcopy(answer), expires)
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """카운터, 적중률, 현재 항목 수"""
+        with self._lock:
+            counters = dict(self.counters)
+            entries = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {**counters, "hit_rate": counters["hits"] / lookups if lookups else 0.0, "entries": entries}
+
+    def report(self) -> str:
+        """캐시 효과 요약 한 줄"""
+        s = self.stats()
+        return (f"답변 캐시: 적중 {s['hits']}회, 미스 {s['misses']}회 (적중률 {s['hit_rate']:.0%}, "
+                f"문서 불일치 {s['near_misses']}회), 무효화 {s['invalidations']}회, 항목 {s['entries']}개")
+
+def configured_answer_cache(version_fn=None) -> SemanticAnswerCache:
+    """
+    ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL 환경 변수를 반영한 답변 캐시
+    ANSWER_CACHE_TTL=0이면 만료 없음.
+    """
+    ttl = float(os.getenv("ANSWER_CACHE_TTL") or DEFAULT_TTL)
+    return SemanticAnswerCache(
+        threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD") or DEFAULT_THRESHOLD),
+        max_entries=int(os.getenv("ANSWER_CACHE_SIZE") or DEFAULT_MAX_ENTRIES),
+        ttl=ttl or None,
+        version_fn=version_fn,
+    )
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+조문 번호 직접 조회 (임베딩/벡터 검색 없이)
+
+"민법 제1112조 알려줘", "상속세법 제18조의2"처럼 조문 번호가 들어간 질문은 임베딩 검색보다
+전처리기가 남긴 article_id / sub_chunk로 그 조문의 청크를 바로 찾는 편이 빠르고 정확합니다.
+
+- parse_article_refs: 질문에서 (법령 카테고리 또는 None, "제N조" / "제N조의M") 목록을 뽑음
+  법령 이름(민법, 상속세 및 증여세법/상증법, 재산조회 기준)은 조문 번호 앞에 나온 것을 씀
+  "1112조"처럼 "제"가 없는 번호는 법령 이름 바로 뒤("민법 1112조")나 앞 조문에 이어질 때("1112조와 1113조")만 인식하고,
+  뒤에 원/억/만/천이 붙으면 금액으로 보고 무시 ("상속세법상 재산이 1조 원이면")
+- ArticleIndex: processed/*.jsonl에서 (카테고리, article_id) → 청크 id 목록(sub_chunk 순서)을 만들고
+  질문의 조문 청크를 검색 결과와 같은 형식으로 돌려줌. 법령 이름이 없으면 그 번호가 있는 모든 법령에서 찾음
+  "부칙 <제N호, ...>" 머리 뒤나 다시 나온 제1조부터는 부칙으로 보고, 질문에 "부칙"이 있을 때만 부칙 조문을 돌려줌
+
+    index = ArticleIndex(PROCESSED_DIR)
+    docs = index.lookup("민법 제1112조 알려줘")   # 못 찾으면 [] → 평소대로 임베딩 검색
+"""
+
+import re
+import time
+import threading
+from pathlib import Path
+from indexing import load_jsonl_records
+
+# 법령 카테고리 → 질문에서 찾을 이름 (공백을 지운 질문과 비교)
+STATUTE_ALIASES = {
+    "법령_민법_상속": ("민법",),
+    "법령_상속세증여세": ("상속세및증여세법", "상속세증여세법", "상증세법", "상증법", "상속세법", "증여세법"),
+    "행정기준": ("재산조회통합처리에관한기준", "재산조회통합처리기준", "재산조회기준", "안심상속기준"),
+}
+# 한 조문에서 돌려줄 최대 청크 수
+MAX_CHUNKS = 10
+
+_ARTICLE = re.compile(r"(제\s*)?(\d+)\s*조(?:\s*의\s*(\d+))?")
+# "제" 없는 번호 뒤에 오면 금액으로 보는 단위
+_AMOUNT_UNIT = re.compile(r"\s*(원|억|만|천)")
+# 부칙 머리 ("부칙 <제21065호,2025. 10. 1.>")
+_SUPPLEMENTARY_HEADER = re.compile(r"부칙\s*<")
+# 앞 조문과 이어지는 번호로 보는 연결어 ("1112조와 1113조", "1112조, 1113조")
+_CONNECTOR = re.compile(r"\s*(와|과|및|또는|,|、|·)?\s*")
+
+def _statute_mentions(query: str) -> list:
+    """[(공백 뺀 질문에서 이름이 끝나는 위치, 카테고리), ...] (위치 순)"""
+    compact = re.sub(r"\s+", "", query)
+    mentions = []
+    for category, aliases in STATUTE_ALIASES.items():
+        for alias in aliases:
+            mentions += [(m.end(), category) for m in re.finditer(re.escape(alias), compact)]
+    return sorted(mentions)
+
+def parse_article_refs(query: str) -> list:
+    """질문의 조문 참조 [(카테고리 또는 None, "제N조" / "제N조의M"), ...] (나온 순서, 중복 제거)"""
+    mentions = _statute_mentions(query)
+    categories = {category for _, category in mentions}
+    refs = []
+    previous_end = None
+    for match in _ARTICLE.finditer(query):
+        position = len(re.sub(r"\s+", "", query[:match.start()]))
+        before = [category for end, category in mentions if end <= position]
+        statute = before[-1] if before else (next(iter(categories)) if len(categories) == 1 else None)
+        if match.group(1) is None:
+            # "제"가 없으면 법령 이름 바로 뒤나 앞 조문에 이어질 때만, 금액 단위가 뒤따르면 제외
+            right_after_statute = any(end == position for end, _ in mentions)
+            continues_list = (previous_end is not None
+                              and _CONNECTOR.fullmatch(query[previous_end:match.start()]) is not None)
+            if (statute is None or not (right_after_statute or continues_list)
+                    or _AMOUNT_UNIT.match(query, match.end())):
+                continue
+        previous_end = match.end()
+        article_id = f"제{match.group(2)}조" + (f"의{match.group(3)}" if match.group(3) else "")
+        if (statute, article_id) not in refs:
+            refs.append((statute, article_id))
+    return refs
+
+def _article_number(article_id: str) -> int:
+    """"제18조의2" → 18"""
+    match = re.search(r"\d+", article_id)
+    return int(match.group()) if match else 0
+
+def _sub_chunk_order(metadata: dict) -> int:
+    try:
+        return int(metadata.get('sub_chunk', 0))
+    except ValueError:
+        return 0
+
+class ArticleIndex:
+    """(카테고리, article_id) → 조문 청크 (JSONL이 바뀌면 check_interval초 안에 다시 읽음)"""
+
+    def __init__(self, processed_dir: Path, check_interval: float = 5.0):
+        self.processed_dir = Path(processed_dir)
+        self.check_interval = check_interval
+        self._signature = None
+        self._checked_at = None
+        # (카테고리, article_id, 부칙 여부) → [(id, text, metadata), ...], (article_id, 부칙 여부) → [카테고리, ...]
+        self._articles, self._categories = {}, {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """JSONL 파일의 크기/수정 시각이 바뀌었으면 색인을 다시 만들고 True"""
+        with self._lock:
+            paths = sorted(self.processed_dir.glob("*.jsonl"))
+            signature = [(path.name, path.stat().st_size, path.stat().st_mtime_ns) for path in paths]
+            self._checked_at = time.monotonic()
+            if signature == self._signature:
+                return False
+            articles = {}
+            for path in paths:
+                # "부칙 <제N호, ...>" 머리가 나온 뒤나, 다른 조문 뒤에 제1조가 다시 나오면 그 뒤는 부칙
+                highest, supplementary = 0, False
+                for doc_id, text, metadata in zip(*load_jsonl_records(path)):
+                    if metadata.get('article_id'):
+                        number = _article_number(metadata['article_id'])
+                        supplementary = supplementary or (number == 1 and highest > 1)
+                        highest = max(highest, number)
+                        key = (metadata['category'], metadata['article_id'], supplementary)
+                        articles.setdefault(key, []).append((doc_id, text, metadata))
+                    supplementary = supplementary or _SUPPLEMENTARY_HEADER.search(text) is not None
+            categories = {}
+            for category, article_id, supplementary in articles:
+                categories.setdefault((article_id, supplementary), []).append(category)
+            for chunks in articles.values():
+                chunks.sort(key=lambda chunk: _sub_chunk_order(chunk[2]))
+            # 새 딕셔너리로 통째로 바꿔 끼우므로 조회 중인 스레드는 이전 색인을 그대로 씀
+            self._articles, self._categories = articles, categories
+            self._signature = signature
+            return True
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    def chunk_ids(self, category: str, article_id: str, supplementary: bool = False) -> list:
+        return [doc_id for doc_id, _, _ in self._articles.get((category, article_id, supplementary), [])]
+
+    def lookup(self, query: str, max_chunks: int = MAX_CHUNKS) -> list:
+        """
+        질문에 나온 조문들의 청크 [{"id", "text", "metadata", "rank"}, ...]
+        (조문 번호가 없거나 색인에 없는 조문뿐이면 [], 부칙 조문은 질문에 "부칙"이 있을 때만)
+        """
+        if self.check_interval is not None and time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+        articles, categories = self._articles, self._categories
+        supplementary = "부칙" in query
+        chunks = []
+        for statute, article_id in parse_article_refs(query):
+            for category in ([statute] if statute else categories.get((article_id, supplementary), [])):
+                chunks += articles.get((category, article_id, supplementary), [])[:max_chunks]
+        return [
+            {'id': doc_id, 'text': text, 'metadata': dict(metadata), 'rank': rank}
+            for rank, (doc_id, text, metadata) in enumerate(chunks[:max_chunks], 1)
+        ]
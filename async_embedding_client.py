@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+asyncio 임베딩 클라이언트 (동시 요청 수 제한 + RPM/TPM 토큰 버킷 + 재시도)
+
+    client = AsyncEmbeddingClient(api_key=..., max_in_flight=4, rpm=3000, tpm=1_000_000)
+    vectors = client.embed_sync(texts)      # 또는 await client.embed(texts)
+    print(client.report())
+
+- 입력은 embedding_batches.iter_request_batches로 요청 단위로 나누고 결과는 입력 순서대로 돌려줍니다.
+- 요청마다 RPM 버킷에서 1, TPM 버킷에서 추정 토큰 수만큼 꺼낸 뒤 보냅니다.
+- 429/5xx/연결 오류는 Retry-After(-ms) 헤더가 있으면 그만큼, 없으면 지수 백오프 + 지터만큼 기다렸다가 재시도합니다.
+- base_url을 바꾸면 로컬 스텁 서버로 테스트할 수 있습니다. (test_async_embedding_client.py)
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import openai
+from openai import AsyncOpenAI
+from token_budget import estimate_tokens
+from embedding_batches import iter_request_batches
+
+# 재시도할 HTTP 상태 코드 (그 밖의 4xx는 바로 실패)
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """분당 rate_per_minute만큼 채워지는 토큰 버킷 (한 이벤트 루프 안에서만 사용)"""
+
+    def __init__(self, rate_per_minute: float, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """amount만큼 꺼낼 수 있을 때까지 기다리고 기다린 시간(초)을 반환합니다."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return waited
+            delay = (amount - self.tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+def retry_after_seconds(headers) -> float:
+    """Retry-After-Ms / Retry-After(초 또는 HTTP 날짜) 헤더를 초 단위로 읽습니다. 없으면 None."""
+    if headers is None:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class AsyncEmbeddingClient:
+    """
+    동시 요청 수(max_in_flight)와 RPM/TPM을 지키며 임베딩을 요청하는 클라이언트.
+    stats에 요청/재시도/대기 시간/처리량을 누적합니다.
+    elapsed_s는 embed 호출이 하나라도 진행 중이던 실제 경과 시간입니다. (동시에 겹친 호출은 한 번만 셈)
+    max_in_flight는 같은 이벤트 루프에서 동시에 실행되는 embed 호출 전체가 나눠 쓰는 한도입니다.
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = None, model: str = "text-embedding-3-small",
+                 max_in_flight: int = 4, rpm: float = 3000, tpm: float = 1_000_000,
+                 max_inputs: int = 100, max_retries: int = 6, base_delay: float = 0.5,
+                 max_delay: float = 30.0, timeout: float = 60.0, count_tokens=estimate_tokens):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.max_in_flight = max_in_flight
+        self.max_inputs = max_inputs
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.count_tokens = count_tokens
+        self.request_bucket = TokenBucket(rpm)
+        self.token_bucket = TokenBucket(tpm)
+        self.stats = {
+            "requests": 0, "inputs": 0, "tokens": 0, "retries": 0,
+            "rate_limited": 0, "server_errors": 0, "throttle_wait_s": 0.0,
+            "backoff_wait_s": 0.0, "elapsed_s": 0.0,
+        }
+        self._semaphores = {}
+        # 진행 중인 embed 호출 수와 그 구간이 시작된 시각 (elapsed_s 계산용, embed_sync는 스레드마다 따로 실행될 수 있음)
+        self._active = 0
+        self._active_since = 0.0
+        self._active_lock = threading.Lock()
+
+    def _begin(self):
+        with self._active_lock:
+            if self._active == 0:
+                self._active_since = time.perf_counter()
+            self._active += 1
+
+    def _end(self):
+        """마지막으로 끝난 embed 호출이면 겹친 구간 전체의 경과 시간을 더함"""
+        with self._active_lock:
+            self._active -= 1
+            if self._active == 0:
+                self.stats["elapsed_s"] += time.perf_counter() - self._active_since
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """실행 중인 이벤트 루프의 공유 세마포어 (루프마다 하나, 루프가 끝나면 같이 사라짐)"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            self._semaphores = {l: s for l, s in self._semaphores.items() if not l.is_closed()}
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_in_flight)
+        return semaphore
+
+    def _backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Retry-After가 있으면 그 값(+작은 지터), 없으면 full jitter 지수 백오프"""
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) + random.uniform(0, self.base_delay / 10)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _embed_request(self, client: AsyncOpenAI, semaphore: asyncio.Semaphore, texts: list) -> list:
+        """요청 하나 (버킷 대기 → 전송 → 실패 시 재시도)"""
+        tokens = sum(self.count_tokens(t) for t in texts)
+        for attempt in range(self.max_retries + 1):
+            self.stats["throttle_wait_s"] += await self.request_bucket.acquire(1)
+            self.stats["throttle_wait_s"] += await self.token_bucket.acquire(tokens)
+            try:
+                async with semaphore:
+                    response = await client.embeddings.create(model=self.model, input=texts)
+            except openai.APIStatusError as e:
+                if e.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                    raise
+                if e.status_code == 429:
+                    self.stats["rate_limited"] += 1
+                else:
+                    self.stats["server_errors"] += 1
+                delay = self._backoff(attempt, retry_after_seconds(e.response.headers))
+            except (openai.APIConnectionError, openai.APITimeoutError):
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                data = sorted(response.data, key=lambda item: item.index)
+                if len(data) != len(texts):
+                    raise ValueError(f"임베딩 응답 수({len(data)})가 요청 수({len(texts)})와 다릅니다.")
+                self.stats["requests"] += 1
+                self.stats["inputs"] += len(texts)
+                self.stats["tokens"] += tokens
+                return [item.embedding for item in data]
+            self.stats["retries"] += 1
+            self.stats["backoff_wait_s"] += delay
+            await asyncio.sleep(delay)
+
+    async def embed(self, texts: list) -> list:
+        """texts를 요청 단위로 나눠 동시에 보내고 입력 순서대로 벡터 목록을 반환합니다."""
+        texts = list(texts)
+        if not texts:
+            return []
+        semaphore = self._semaphore()
+        async with AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                               max_retries=0, timeout=self.timeout) as client:
+            tasks = [
+                asyncio.ensure_future(self._embed_request(client, semaphore, texts[i:j]))
+                for i, j in iter_request_batches(texts, max_inputs=self.max_inputs, count_tokens=self.count_tokens)
+            ]
+            self._begin()
+            try:
+                results = await asyncio.gather(*tasks)
+            except BaseException:
+                # 하나가 실패하면 나머지 요청도 취소한 뒤 클라이언트를 닫음
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            finally:
+                self._end()
+        return [vector for batch in results for vector in batch]
+
+    def embed_sync(self, texts: list) -> list:
+        """동기 코드용 embed (이벤트 루프를 새로 만들어 실행)"""
+        return asyncio.run(self.embed(texts))
+
+    def report(self) -> str:
+        """처리량 요약 한 줄"""
+        s = self.stats
+        elapsed = s["elapsed_s"] or float("inf")
+        return (f"임베딩 요청 {s['requests']}회 ({s['inputs']}개 입력, 약 {s['tokens']}토큰), "
+                f"{s['elapsed_s']:.2f}s, {s['inputs'] / elapsed:.1f} 입력/s, {s['tokens'] / elapsed:.0f} 토큰/s, "
+                f"재시도 {s['retries']}회 (429 {s['rate_limited']}회, 5xx {s['server_errors']}회), "
+                f"대기 {s['throttle_wait_s']:.2f}s(버킷) + {s['backoff_wait_s']:.2f}s(백오프)")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+chunk_law / split_sentences 벤치마크
+
+1) 원본 PDF의 모든 문단에서 split_sentences(protect=True)가
+   기존 마커 치환 방식(legacy_split_sentences)과 같은 결과를 내는지 확인합니다.
+2) 조문 수를 늘린 합성 법령(최대 1만 조)으로 chunk_law가 선형으로 늘어나는지 봅니다.
+3) 태그/날짜가 많은 긴 문단에서 두 문장 분할 방식의 시간을 비교합니다.
+
+    python benchmarks/bench_chunk_law.py
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preprocess_pdfs import (  # noqa: E402
+    BASE_DIR, files_config, extract_text_from_pdf, clean_basic, chunk_law, split_sentences,
+)
+
+def legacy_split_sentences(para: str) -> list:
+    """기존 chunk_law의 문장 분할: 보호 구간을 마커로 치환한 뒤 문장마다 마커를 되돌림"""
+    protected = {}
+    counter = 0
+    for match in reversed(list(re.finditer(r'<[^>]+>|\[[^\]]+\]', para))):
+        marker = f"__TAG_{counter}__"
+        protected[marker] = match.group(0)
+        para = para[:match.start()] + marker + para[match.end():]
+        counter += 1
+    for match in reversed(list(re.finditer(r'\d{4}\.\s*\d{1,2}\.\s*\d{1,2}\.', para))):
+        marker = f"__DATE_{counter}__"
+        protected[marker] = match.group(0)
+        para = para[:match.start()] + marker + para[match.end():]
+        counter += 1
+    sentences = re.split(r'([.!?。]\s+|\.\s+)', para)
+    sentence_parts = []
+    for i in range(0, len(sentences), 2):
+        sentence = sentences[i] + (sentences[i+1] if i+1 < len(sentences) else "")
+        sentence_parts.append(sentence.strip())
+    for j, sent in enumerate(sentence_parts):
+        for marker, original in protected.items():
+            sent = sent.replace(marker, original)
+        sentence_parts[j] = sent
+    return sentence_parts
+
+def synthetic_statute(num_articles: int) -> str:
+    """조문마다 태그/날짜가 들어간 500자 초과 문단을 가진 합성 법령"""
+    articles = []
+    for n in range(1, num_articles + 1):
+        para = " ".join(
+            f"{k}. 상속인은 제{n}조제{k}항에 따라 신고하여야 한다. <개정 2017. 12. 19., 2020. 12. 22.>"
+            for k in range(1, 9)
+        )
+        articles.append(f"제{n}조(합성조문{n}) {para}\n\n[본조신설 2010. 1. 1.]")
+    return "\n\n".join(articles)
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    # 1) 실제 코퍼스에서 결과 비교
+    paragraphs = []
+    for cfg in files_config:
+        raw_path = BASE_DIR / cfg["raw_name"]
+        if raw_path.exists():
+            text = clean_basic(extract_text_from_pdf(raw_path))
+            paragraphs.extend(p.strip() for p in text.split("\n\n") if p.strip())
+    mismatches = sum(split_sentences(p, protect=True) != legacy_split_sentences(p) for p in paragraphs)
+    print(f"실제 코퍼스 문단 {len(paragraphs)}개: 문장 분할 결과 불일치 {mismatches}개")
+
+    # 2) 조문 수에 따른 chunk_law 시간
+    print("\nchunk_law 합성 법령")
+    print(f"  {'조문 수':>8}{'청크 수':>10}{'시간':>10}{'조문당 µs':>12}")
+    for n in (1000, 2500, 5000, 10000):
+        text = synthetic_statute(n)
+        start = time.perf_counter()
+        chunks = chunk_law(text, "synthetic.pdf", "합성", "syn")
+        elapsed = time.perf_counter() - start
+        print(f"  {n:>8}{len(chunks):>10}{elapsed:>9.2f}s{elapsed / n * 1e6:>12.0f}")
+
+    # 3) 보호 구간이 많은 긴 문단
+    print("\n문장 분할 (태그/날짜 수에 따른 시간)")
+    print(f"  {'보호 구간':>8}{'legacy':>10}{'offset':>10}")
+    for k in (250, 500, 1000, 2000):
+        para = " ".join(f"제{i}항을 적용한다. <개정 2017. 12. 19.>" for i in range(k))
+        assert split_sentences(para, protect=True) == legacy_split_sentences(para)
+        print(f"  {2 * k:>8}{timed(legacy_split_sentences, para):>9.3f}s"
+              f"{timed(split_sentences, para, True):>9.3f}s")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+clean_chunk_text 규칙 엔진 벤치마크
+
+processed/*.jsonl의 청크 텍스트를 100배로 늘린 합성 코퍼스에서
+기존 re.sub 체인(legacy_clean_chunk_text)과 CHUNK_RULES 엔진의 결과와 속도를 비교합니다.
+
+    python benchmarks/bench_clean_chunk_text.py
+"""
+
+import re
+import sys
+import json
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import preprocess_pdfs  # noqa: E402
+from preprocess_pdfs import OUT_DIR, remove_control_chars, apply_chunk_rules, CHUNK_RULE_HITS  # noqa: E402
+
+def legacy_chunk_rules(text: str) -> str:
+    """규칙 엔진 도입 전의 clean_chunk_text re.sub 체인 (결과 비교용 기준 구현)"""
+    text = re.sub(r'([가-힣])\n+([가-힣])', r'\1\2', text)
+    text = re.sub(r'(\d)\n+(\d)', r'\1\2', text)
+    text = re.sub(r'(\d+)[\^&\*]', r'\1', text)
+    text = re.sub(r'상속민법권', '상속권', text)
+    text = re.sub(r'상속민법', '상속', text)
+    text = re.sub(r'([가-힣\d])\n+민법\s+([①②③④⑤⑥⑦⑧⑨⑩]|\d)', r'\1\n\n\2', text)
+    text = re.sub(r'([가-힣\d])\s+민법\s+([①②③④⑤⑥⑦⑧⑨⑩]|\d)', r'\1 \2', text)
+    text = re.sub(r'\n+민법\s+([①②③④⑤⑥⑦⑧⑨⑩]|\d)', r'\n\n\1', text)
+    text = re.sub(r'0분의\s*10\b', '100분의 10', text)
+    text = re.sub(r'0분의\s*100\b', '100분의 100', text)
+    text = re.sub(r'10100분의\s*10\b', '100분의 10', text)
+    text = re.sub(r'100\s*분의\s*10\b', '__PROTECT_100분의10__', text)
+    text = re.sub(r'100\s*분의\s*100\b', '__PROTECT_100분의100__', text)
+    text = re.sub(r'100분의\s*10\b', '__PROTECT_100분의10__', text)
+    text = re.sub(r'100분의\s*100\b', '__PROTECT_100분의100__', text)
+
+    def split_fraction(match):
+        full_match = match.group(0)
+        if '__PROTECT_' in full_match:
+            return full_match
+        if full_match.startswith('100분의 1') or full_match.startswith('100분의1'):
+            return full_match
+        return re.sub(r'(\d+분의\s*1)(\d+)', r'\1\n\n\2', full_match)
+
+    text = re.sub(r'\d+분의\s*1\d+', split_fraction, text)
+    text = text.replace('__PROTECT_100분의10__', '100분의 10')
+    text = text.replace('__PROTECT_100분의100__', '100분의 100')
+    text = re.sub(r'100분의\s*1\n+\s*00', '100분의 100', text)
+    text = re.sub(r'100분의\s*1\s+00', '100분의 100', text)
+    text = re.sub(r'100분의\s*1\n+\s*0([^\d]|$)', r'100분의 10\1', text)
+    text = re.sub(r'100분의\s*1\s+0([^\d]|$)', r'100분의 10\1', text)
+    text = re.sub(r'100분의\s*1\n+\s*0(\d)', r'100분의 10\1', text)
+    text = re.sub(r'100분의\s*1\s+0(\d)', r'100분의 10\1', text)
+    text = re.sub(r'100분의\s*20(\d+)', r'100분의 20\n\n\1', text)
+    text = re.sub(r'및([가-힣])', r'및 \1', text)
+    return re.sub(r' {3,}', '  ', text)
+
+def legacy_clean_chunk_text(text: str) -> str:
+    """규칙 엔진 도입 전의 clean_chunk_text"""
+    return legacy_chunk_rules(remove_control_chars(text)).strip()
+
+def load_corpus() -> list:
+    texts = []
+    for jsonl_path in sorted(OUT_DIR.glob("*.jsonl")):
+        with open(jsonl_path, 'r', encoding='utf-8') as f:
+            texts.extend(json.loads(line)['text'] for line in f if line.strip())
+    return texts
+
+def timed(func, corpus) -> float:
+    start = time.perf_counter()
+    for text in corpus:
+        func(text)
+    return time.perf_counter() - start
+
+def main():
+    texts = load_corpus()
+    mismatches = [t for t in texts if legacy_clean_chunk_text(t) != preprocess_pdfs.clean_chunk_text(t)]
+    print(f"실제 코퍼스: {len(texts)}개 청크, 결과 불일치 {len(mismatches)}개")
+
+    corpus = texts * 100
+    print(f"합성 코퍼스 (100배): {len(corpus)}개 청크, {sum(map(len, corpus)):,}자")
+
+    CHUNK_RULE_HITS.clear()
+    legacy_rules = timed(legacy_chunk_rules, corpus)
+    engine_rules = timed(apply_chunk_rules, corpus)
+    legacy_total = timed(legacy_clean_chunk_text, corpus)
+    engine_total = timed(preprocess_pdfs.clean_chunk_text, corpus)
+
+    print(f"{'':<20}{'legacy':>10}{'engine':>10}{'speedup':>10}")
+    print(f"{'규칙만':<20}{legacy_rules:>9.3f}s{engine_rules:>9.3f}s{legacy_rules / engine_rules:>9.1f}x")
+    print(f"{'clean_chunk_text':<20}{legacy_total:>9.3f}s{engine_total:>9.3f}s{legacy_total / engine_total:>9.1f}x")
+
+    print("\n규칙별 적용 횟수 (합성 코퍼스를 엔진으로 두 번 처리한 합계):")
+    for name, _, _, _ in preprocess_pdfs.CHUNK_RULES:
+        print(f"  {name:<24}{CHUNK_RULE_HITS[name]:>8}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+임베딩 제공자 인덱싱/검색 벤치마크
+
+processed/*.jsonl 전체를 메모리 ChromaDB 컬렉션에 인덱싱하고(indexing.sync_jsonl_file),
+법령 조문 제목(article_title)을 질문으로 그 조문의 청크가 상위 5개 안에 드는지(hit@5, MRR) 봅니다.
+기본 제공자는 local이라 네트워크 없이 CI에서도 돌릴 수 있습니다.
+
+    python benchmarks/bench_embedding_providers.py
+    python benchmarks/bench_embedding_providers.py --provider openai   # OPENAI_API_KEY 필요
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import chromadb
+from chromadb.config import Settings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from embedding_providers import get_embedding_provider  # noqa: E402
+from indexing import load_jsonl_records, sync_jsonl_file  # noqa: E402
+
+PROCESSED_DIR = Path(__file__).resolve().parent.parent / "processed"
+TOP_K = 5
+
+def load_queries(jsonl_files) -> list:
+    """(질문, 정답 id 집합) 목록 - 조문 제목 → 같은 출처의 같은 조문 청크들"""
+    targets = {}
+    for jsonl_path in jsonl_files:
+        ids, _, metadatas = load_jsonl_records(jsonl_path)
+        for doc_id, metadata in zip(ids, metadatas):
+            if metadata.get('article_title'):
+                key = (metadata['article_title'], metadata['source'], metadata.get('article_id'))
+                targets.setdefault(key, set()).add(doc_id)
+    return [(title, relevant) for (title, _, _), relevant in targets.items()]
+
+def main(provider_name: str = "local") -> int:
+    provider = get_embedding_provider(provider_name)
+    jsonl_files = sorted(PROCESSED_DIR.glob("*.jsonl"))
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    collection = client.create_collection(name="bench_embedding_providers")
+
+    start = time.perf_counter()
+    total = sum(sync_jsonl_file(collection, path, provider.embed)['added'] for path in jsonl_files)
+    index_s = time.perf_counter() - start
+    print(f"제공자: {provider.name} ({provider.model})")
+    print(f"인덱싱: {total}개 청크, {index_s:.2f}s ({total / index_s:.0f} 청크/s)")
+
+    queries = load_queries(jsonl_files)
+    hits = 0
+    reciprocal_ranks = 0.0
+    latencies = []
+    for query, relevant in queries:
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[provider.embed_query(query)], n_results=TOP_K)
+        latencies.append(time.perf_counter() - start)
+        ranks = [rank for rank, doc_id in enumerate(result['ids'][0], 1) if doc_id in relevant]
+        if ranks:
+            hits += 1
+            reciprocal_ranks += 1 / ranks[0]
+
+    latencies.sort()
+    n = len(queries)
+    print(f"검색: 조문 제목 질문 {n}개, hit@{TOP_K} {hits / n:.3f}, MRR@{TOP_K} {reciprocal_ranks / n:.3f}")
+    print(f"질문당 (임베딩 + 검색) p50 {latencies[n // 2] * 1000:.2f}ms, "
+          f"p95 {latencies[int(n * 0.95)] * 1000:.2f}ms")
+    print(provider.report())
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="임베딩 제공자 인덱싱/검색 벤치마크")
+    parser.add_argument("--provider", default="local", help="openai | local (기본 local)")
+    sys.exit(main(parser.parse_args().provider))
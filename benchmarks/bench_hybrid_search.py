@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+하이브리드 검색 벤치마크 (벡터 / BM25 / RRF)
+
+processed/*.jsonl을 NumPy 벡터 저장소와 글자 n-그램 BM25 역색인(lexical_index.py)에 넣고,
+두 가지 질문으로 상위 5개 안에 정답 청크가 드는지(hit@5, MRR) 비교합니다.
+
+- 조문 제목: article_title → 같은 조문의 청크들 (bench_embedding_providers.py와 같음)
+- 본문 구절: 청크 본문 가운데의 20글자 → 그 청크 (정확한 용어/숫자 검색)
+
+BM25 검색 시간(임베딩 제외)도 p50/p95로 출력합니다.
+
+    python benchmarks/bench_hybrid_search.py                     # local 제공자 (오프라인)
+    python benchmarks/bench_hybrid_search.py --provider openai   # OPENAI_API_KEY 필요, 임베딩 캐시 사용
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from embedding_cache import EmbeddingCache  # noqa: E402
+from embedding_providers import get_embedding_provider, embed_cached  # noqa: E402
+from indexing import load_jsonl_records  # noqa: E402
+from lexical_index import LexicalIndex, reciprocal_rank_fusion  # noqa: E402
+from vector_store import VectorStore, write_store  # noqa: E402
+
+PROCESSED_DIR = ROOT / "processed"
+TOP_K = 5
+CANDIDATES = 20
+
+def load_queries(ids: list, documents: list, metadatas: list) -> dict:
+    """{질문 종류: [(질문, 정답 id 집합), ...]}"""
+    articles = {}
+    for doc_id, metadata in zip(ids, metadatas):
+        if metadata.get('article_title'):
+            key = (metadata['article_title'], metadata['source'], metadata.get('article_id'))
+            articles.setdefault(key, set()).add(doc_id)
+    phrases = [(text[len(text) // 2 - 10:len(text) // 2 + 10], {doc_id})
+               for doc_id, text in zip(ids, documents) if len(text) >= 60]
+    return {
+        "조문 제목": [(title, relevant) for (title, _, _), relevant in articles.items()],
+        "본문 구절": phrases,
+    }
+
+def score(results: list, relevant: set) -> tuple:
+    ranks = [rank for rank, doc in enumerate(results[:TOP_K], 1) if doc['id'] in relevant]
+    return (1, 1 / ranks[0]) if ranks else (0, 0.0)
+
+def main(provider_name: str = "local") -> int:
+    provider = get_embedding_provider(provider_name)
+    cache = EmbeddingCache() if provider.remote else None
+    ids, documents, metadatas = [], [], []
+    for jsonl_path in sorted(PROCESSED_DIR.glob("*.jsonl")):
+        file_ids, file_documents, file_metadatas = load_jsonl_records(jsonl_path)
+        ids += file_ids
+        documents += file_documents
+        metadatas += file_metadatas
+    vectors = np.asarray(embed_cached(provider, documents, cache), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_store(Path(tmp) / "store", ids, documents, metadatas, vectors)
+        store = VectorStore(Path(tmp) / "store")
+        start = time.perf_counter()
+        lexical = LexicalIndex(PROCESSED_DIR, Path(tmp) / "lexical", check_interval=None)
+        build_s = time.perf_counter() - start
+        print(f"제공자: {provider.name} ({provider.model}), 청크 {len(ids)}개")
+        print(f"BM25 역색인: 용어 {lexical.n_terms}개, 포스팅 {lexical.nbytes() / 1024:.0f}KB, "
+              f"처음 빌드 {build_s * 1000:.0f}ms")
+
+        latencies = []
+        print(f"\n{'질문':<10}{'개수':>6}{'vector':>16}{'bm25':>16}{'hybrid':>16}   (hit@{TOP_K} / MRR@{TOP_K})")
+        for kind, queries in load_queries(ids, documents, metadatas).items():
+            embeddings = embed_cached(provider, [query for query, _ in queries], cache)
+            totals = {name: np.zeros(2) for name in ("vector", "bm25", "hybrid")}
+            for (query, relevant), embedding in zip(queries, embeddings):
+                vector_docs = store.query(embedding, CANDIDATES)
+                start = time.perf_counter()
+                lexical_docs = lexical.query(query, CANDIDATES)
+                latencies.append(time.perf_counter() - start)
+                hybrid_docs = reciprocal_rank_fusion([vector_docs, lexical_docs], TOP_K)
+                for name, results in (("vector", vector_docs), ("bm25", lexical_docs), ("hybrid", hybrid_docs)):
+                    totals[name] += score(results, relevant)
+            n = len(queries)
+            print(f"{kind:<10}{n:>6}" + "".join(
+                f"{totals[name][0] / n:>9.3f} / {totals[name][1] / n:.3f}" for name in ("vector", "bm25", "hybrid")))
+
+    latencies.sort()
+    n = len(latencies)
+    print(f"\nBM25 검색 (후보 {CANDIDATES}개): p50 {latencies[n // 2] * 1000:.3f}ms, "
+          f"p95 {latencies[int(n * 0.95)] * 1000:.3f}ms")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="하이브리드(BM25 + 벡터) 검색 벤치마크")
+    parser.add_argument("--provider", default="local", help="openai | local (기본 local)")
+    sys.exit(main(parser.parse_args().provider))
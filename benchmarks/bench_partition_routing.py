@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+카테고리 파티션 라우팅 벤치마크 (query_router.py)
+
+processed/*.jsonl을 NumPy 벡터 저장소(카테고리 순서로 정렬)와 BM25 역색인에 넣고,
+청크 제목을 질문으로 써서 전체 검색과 라우팅한 검색을 비교합니다. (정답 = 같은 조문/제목의 청크)
+
+- 라우팅: 정답 카테고리가 고른 파티션에 드는 비율, 키워드/중심 벡터/전체 검색 비율
+- 검색 품질: hybrid hit@5, 상위 5개 중 다른 카테고리 청크 비율 (off-topic)
+- 검색 시간: 벡터 검색 + BM25 (임베딩 제외) p50/p95
+
+    python benchmarks/bench_partition_routing.py                     # local 제공자 (오프라인)
+    python benchmarks/bench_partition_routing.py --provider openai   # OPENAI_API_KEY 필요, 임베딩 캐시 사용
+    python benchmarks/bench_partition_routing.py --margin 0.03
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from embedding_cache import EmbeddingCache  # noqa: E402
+from embedding_providers import get_embedding_provider, embed_cached  # noqa: E402
+from indexing import load_jsonl_records  # noqa: E402
+from lexical_index import LexicalIndex, hybrid_query  # noqa: E402
+from query_router import DEFAULT_MARGIN, PartitionRouter  # noqa: E402
+from vector_store import VectorStore, write_store  # noqa: E402
+
+PROCESSED_DIR = ROOT / "processed"
+TOP_K = 5
+
+def load_queries(ids: list, metadatas: list) -> list:
+    """[(제목, 카테고리, 정답 id 집합), ...] - "(부분 N)"을 뗀 제목이 같은 청크를 정답으로"""
+    groups = {}
+    for doc_id, metadata in zip(ids, metadatas):
+        title = (metadata.get('article_title') or metadata.get('title') or "").split(" (부분")[0].strip()
+        if len(title) >= 4:
+            groups.setdefault((title, metadata['category']), set()).add(doc_id)
+    return [(title, category, relevant) for (title, category), relevant in groups.items()]
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] * 1000
+
+def main(provider_name: str = "local", margin: float = DEFAULT_MARGIN) -> int:
+    provider = get_embedding_provider(provider_name)
+    cache = EmbeddingCache() if provider.remote else None
+    ids, documents, metadatas = [], [], []
+    for jsonl_path in sorted(PROCESSED_DIR.glob("*.jsonl")):
+        file_ids, file_documents, file_metadatas = load_jsonl_records(jsonl_path)
+        ids += file_ids
+        documents += file_documents
+        metadatas += file_metadatas
+    vectors = np.asarray(embed_cached(provider, documents, cache), dtype=np.float32)
+    order = sorted(range(len(ids)), key=lambda i: (metadatas[i]['category'], ids[i]))
+    queries = load_queries(ids, metadatas)
+    embeddings = embed_cached(provider, [title for title, _, _ in queries], cache)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_store(Path(tmp) / "store", [ids[i] for i in order], [documents[i] for i in order],
+                    [metadatas[i] for i in order], vectors[order])
+        store = VectorStore(Path(tmp) / "store")
+        lexical = LexicalIndex(PROCESSED_DIR, Path(tmp) / "lexical", check_interval=None)
+        router = PartitionRouter(store.category_centroids(), margin=margin)
+        print(f"제공자: {provider.name} ({provider.model}), 청크 {len(ids)}개, 질문 {len(queries)}개, "
+              f"margin {margin}")
+        print("파티션: " + ", ".join(f"{c} {sum(e - s for s, e in r)}개" for c, r in store.partitions.items()))
+
+        routed_correct = 0
+        totals = {name: {"hits": 0, "off_topic": 0, "returned": 0, "times": []} for name in ("전체", "라우팅")}
+        for (title, category, relevant), embedding in zip(queries, embeddings):
+            categories = router.route(title, embedding)
+            routed_correct += categories is None or category in categories
+            for name, cats in (("전체", None), ("라우팅", categories)):
+                start = time.perf_counter()
+                docs = hybrid_query(store, lexical, title, embedding, TOP_K, categories=cats)
+                totals[name]["times"].append(time.perf_counter() - start)
+                totals[name]["hits"] += any(doc['id'] in relevant for doc in docs)
+                totals[name]["off_topic"] += sum(doc['metadata']['category'] != category for doc in docs)
+                totals[name]["returned"] += len(docs)
+
+    n = len(queries)
+    print(router.report())
+    print(f"정답 카테고리 포함 (전체 검색 포함): {routed_correct / n:.3f}")
+    print(f"\n{'검색':<8}{'hit@5':>8}{'off-topic':>12}{'p50':>10}{'p95':>10}")
+    for name, total in totals.items():
+        print(f"{name:<8}{total['hits'] / n:>8.3f}{total['off_topic'] / max(total['returned'], 1):>12.3f}"
+              f"{percentile(total['times'], 0.5):>8.3f}ms{percentile(total['times'], 0.95):>8.3f}ms")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="카테고리 파티션 라우팅 벤치마크")
+    parser.add_argument("--provider", default="local", help="openai | local (기본 local)")
+    parser.add_argument("--margin", type=float, default=DEFAULT_MARGIN, help="중심 벡터 라우팅 여유")
+    args = parser.parse_args()
+    sys.exit(main(args.provider, args.margin))
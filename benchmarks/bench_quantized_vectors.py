@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+양자화 벡터 저장소 벤치마크 (전체 정밀도 대비 recall@5)
+
+processed/*.jsonl 청크를 임베딩해 임시 저장소를 float32 / float16 / int8로 만들고,
+질문마다 float32 정확 검색의 상위 5개를 기준으로 recall@5, 훑는 배열 크기, 질문당 검색 시간을 비교합니다.
+질문은 청크 제목(title)입니다.
+
+    python benchmarks/bench_quantized_vectors.py                        # local 제공자 (오프라인)
+    python benchmarks/bench_quantized_vectors.py --provider openai      # OPENAI_API_KEY 필요, 임베딩 캐시 사용
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from embedding_cache import EmbeddingCache  # noqa: E402
+from embedding_providers import get_embedding_provider, embed_cached  # noqa: E402
+from indexing import load_jsonl_records  # noqa: E402
+from vector_store import VectorStore, write_store  # noqa: E402
+
+PROCESSED_DIR = Path(__file__).resolve().parent.parent / "processed"
+TOP_K = 5
+
+def run(store: VectorStore, queries: np.ndarray, rescore: int) -> tuple:
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        top, _ = store.search(query, TOP_K, rescore=rescore)
+        latencies.append(time.perf_counter() - start)
+        results.append(set(top.tolist()))
+    latencies.sort()
+    return results, latencies[len(latencies) // 2]
+
+def main(provider_name: str = "local") -> int:
+    provider = get_embedding_provider(provider_name)
+    cache = EmbeddingCache() if provider.remote else None
+    ids, documents, metadatas = [], [], []
+    for jsonl_path in sorted(PROCESSED_DIR.glob("*.jsonl")):
+        file_ids, file_documents, file_metadatas = load_jsonl_records(jsonl_path)
+        ids += file_ids
+        documents += file_documents
+        metadatas += file_metadatas
+    vectors = np.asarray(embed_cached(provider, documents, cache), dtype=np.float32)
+    titles = sorted({metadata['title'] for metadata in metadatas if metadata['title']})
+    queries = np.asarray(embed_cached(provider, titles, cache), dtype=np.float32)
+    print(f"제공자: {provider.name} ({provider.model}), 청크 {len(ids)}개 x {vectors.shape[1]}차원, "
+          f"질문 {len(queries)}개")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exact_store = None
+        rows = []
+        for quantization in (None, "float16", "int8"):
+            directory = Path(tmp) / (quantization or "float32")
+            write_store(directory, ids, documents, metadatas, vectors, quantization)
+            store = VectorStore(directory)
+            if exact_store is None:
+                exact_store = store
+                exact, latency = run(store, queries, rescore=0)
+                rows.append(("float32", "-", 1.0, store.nbytes(), latency))
+                continue
+            for rescore in (0, 20):
+                found, latency = run(store, queries, rescore)
+                recall = np.mean([len(a & b) / len(b) for a, b in zip(found, exact)])
+                rows.append((quantization, rescore or "없음", recall, store.nbytes(), latency))
+
+    print(f"\n{'저장 형식':<10}{'재채점 후보':>10}{'recall@5':>10}{'훑는 크기':>12}{'p50':>10}")
+    for name, rescore, recall, nbytes, latency in rows:
+        print(f"{name:<14}{str(rescore):>10}{recall:>10.4f}{nbytes / 1024:>10.0f}KB{latency * 1000:>8.3f}ms")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="양자화 벡터 저장소 recall@5 벤치마크")
+    parser.add_argument("--provider", default="local", help="openai | local (기본 local)")
+    sys.exit(main(parser.parse_args().provider))
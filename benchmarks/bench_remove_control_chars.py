@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+remove_control_chars 벤치마크
+
+원본 PDF 6개에서 추출한 텍스트(clean_basic 입력)와 청크 크기로 자른 조각에서
+기존 문자 단위 루프, str.translate 삭제 표, 정규식 문자 클래스를 비교합니다.
+
+    python benchmarks/bench_remove_control_chars.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preprocess_pdfs import BASE_DIR, files_config, extract_text_from_pdf, remove_control_chars  # noqa: E402
+
+def legacy_remove_control_chars(text: str) -> str:
+    """기존 구현: 문자마다 코드 포인트 범위를 확인"""
+    result = []
+    for char in text:
+        code = ord(char)
+        if char in '\n\t\r':
+            result.append(char)
+        elif code < 32 or (127 <= code <= 159):
+            continue
+        elif 0xE000 <= code <= 0xF8FF:
+            continue
+        else:
+            result.append(char)
+    return ''.join(result)
+
+# 같은 문자 집합을 지우는 str.translate 삭제 표
+DELETE_TABLE = dict.fromkeys(
+    [c for c in range(32) if chr(c) not in '\n\t\r']
+    + list(range(127, 160))
+    + list(range(0xE000, 0xF8FF + 1))
+)
+
+def translate_remove_control_chars(text: str) -> str:
+    return text.translate(DELETE_TABLE)
+
+def timed(func, texts, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return time.perf_counter() - start
+
+def main():
+    docs = [
+        extract_text_from_pdf(BASE_DIR / cfg["raw_name"])
+        for cfg in files_config
+        if (BASE_DIR / cfg["raw_name"]).exists()
+    ]
+    chunks = [doc[i:i + 500] for doc in docs for i in range(0, len(doc), 500)]
+
+    impls = [
+        ("legacy loop", legacy_remove_control_chars),
+        ("str.translate", translate_remove_control_chars),
+        ("regex (현재)", remove_control_chars),
+    ]
+    for func_name, func in impls[1:]:
+        assert all(func(d) == legacy_remove_control_chars(d) for d in docs), func_name
+
+    for label, texts, repeat in [
+        (f"문서 전체 ({len(docs)}개, {sum(map(len, docs)):,}자) x20", docs, 20),
+        (f"500자 조각 ({len(chunks)}개) x20", chunks, 20),
+    ]:
+        print(label)
+        base = None
+        for func_name, func in impls:
+            elapsed = timed(func, texts, repeat)
+            base = base or elapsed
+            print(f"  {func_name:<16}{elapsed:>8.3f}s{base / elapsed:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+검색 백엔드 벤치마크 (ChromaDB vs NumPy 저장소)
+
+processed/*.jsonl을 local 제공자로 임베딩해 임시 ChromaDB 컬렉션과 NumPy 저장소에 같은 벡터를 넣고,
+청크 제목을 질문으로 질문당 검색 시간(query 호출, 임베딩 제외)과 상위 5개 일치율, import 시간을 비교합니다.
+
+    python benchmarks/bench_vector_backends.py
+"""
+
+import sys
+import time
+import subprocess
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from embedding_providers import HashedNgramEmbeddingProvider  # noqa: E402
+from indexing import load_jsonl_records  # noqa: E402
+from vector_store import ChromaSearchBackend, VectorStore, write_store  # noqa: E402
+
+TOP_K = 5
+
+def import_seconds(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def timed_queries(backend, queries) -> tuple:
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        docs = backend.query(query, TOP_K)
+        latencies.append(time.perf_counter() - start)
+        results.append([doc['metadata']['title'] + doc['text'] for doc in docs])
+    latencies.sort()
+    return results, latencies
+
+def main() -> int:
+    import chromadb
+    from chromadb.config import Settings
+
+    provider = HashedNgramEmbeddingProvider()
+    ids, documents, metadatas = [], [], []
+    for jsonl_path in sorted((ROOT / "processed").glob("*.jsonl")):
+        file_ids, file_documents, file_metadatas = load_jsonl_records(jsonl_path)
+        ids += file_ids
+        documents += file_documents
+        metadatas += file_metadatas
+    vectors = provider.embed_array(documents)
+    queries = [q.tolist() for q in provider.embed_array(sorted({m['title'] for m in metadatas if m['title']}))]
+
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    collection = client.create_collection(name="bench_vector_backends")
+    for start in range(0, len(ids), 100):
+        collection.add(ids=ids[start:start + 100], embeddings=vectors[start:start + 100],
+                       documents=documents[start:start + 100], metadatas=metadatas[start:start + 100])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_store(Path(tmp), ids, documents, metadatas, vectors)
+        backends = {"chroma": ChromaSearchBackend(collection), "numpy": VectorStore(Path(tmp))}
+        results = {name: timed_queries(backend, queries) for name, backend in backends.items()}
+
+    same = np.mean([a == b for a, b in zip(results["chroma"][0], results["numpy"][0])])
+    n = len(queries)
+    print(f"청크 {len(ids)}개 x {vectors.shape[1]}차원, 질문 {n}개, 상위 {TOP_K}개 일치율 {same:.3f}")
+    print(f"{'backend':<8}{'p50':>10}{'p95':>10}{'import':>10}")
+    for name, module in (("chroma", "chromadb"), ("numpy", "vector_store")):
+        latencies = results[name][1]
+        print(f"{name:<8}{latencies[n // 2] * 1000:>8.3f}ms{latencies[int(n * 0.95)] * 1000:>8.3f}ms"
+              f"{import_seconds(module):>9.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
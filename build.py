@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF → 벡터 DB 스트리밍 빌드 파이프라인
+
+preprocess_pdfs.py(PDF → JSONL)와 index_data.py(JSONL → 임베딩 → 벡터 DB)를 한 번에 실행하되,
+스테이지 사이를 크기가 제한된 큐로 이어 PDF 처리(CPU)와 임베딩 요청(네트워크)이 겹쳐 돌게 합니다.
+
+    extract  PDF 텍스트 추출 + clean_basic                  (프로세스 풀)
+      → 큐 → chunk    청킹 + processed/*.jsonl 저장 + 컬렉션과 비교  (프로세스 풀)
+      → 큐 → embed    새/변경 청크 배치 임베딩                 (asyncio 태스크 여러 개)
+      → 큐 → store    collection.upsert / 사라진 청크 삭제        (DB 스레드 하나에서 순서대로)
+
+- 큐가 가득 차면 앞 스테이지가 기다리므로(backpressure) 임베딩이 느려도 쌓이는 청크 수가 일정합니다.
+- 증분 방식은 index_data.py와 같습니다. (content_hash 비교, 새/변경 청크만 임베딩, 사라진 청크 삭제,
+  jsonl_file 기록, 지워진 JSONL 파일의 청크 삭제 - indexing.plan_file_sync / prune_missing_files)
+  중간에 실패해도 다시 실행하면 이미 upsert된 청크는 그대로로 판정되고 임베딩은 캐시에서 가져옵니다.
+- processed/*.jsonl과 manifest.json도 preprocess_pdfs.py와 똑같이 남깁니다.
+- 끝나면 스테이지별 처리량과 작업/대기 시간을 출력합니다.
+
+    python build.py --workers 4 --embed-concurrency 4
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+import chromadb
+from chromadb.config import Settings
+from dotenv import load_dotenv
+from preprocess_pdfs import (
+    BASE_DIR, OUT_DIR, DEFAULT_TOKEN_BUDGET, files_config, extract_and_clean, chunk_records, write_jsonl,
+    load_manifest, save_manifest, manifest_inputs, manifest_entry, pipeline_code_version,
+)
+from embedding_cache import EmbeddingCache
+from embedding_providers import get_embedding_provider, collection_name_for, aembed_cached
+from indexing import (
+    BATCH_SIZE, record_document, plan_file_sync, prune_missing_files, bump_index_version, file_sha256,
+    record_indexed_outputs,
+)
+from vector_store import DEFAULT_STORE_DIR, configured_export, export_collection
+
+# 환경 변수 로드
+load_dotenv()
+
+DB_DIR = BASE_DIR / "chroma_db"
+# 스테이지 사이 큐에 쌓아 둘 수 있는 항목 수 (파일 또는 배치)
+DEFAULT_QUEUE_SIZE = 8
+
+# 큐의 끝 표시
+_DONE = object()
+
+class StageStats:
+    """스테이지 하나의 처리량 기록"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0           # 처리한 항목 수 (파일 또는 배치)
+        self.chunks = 0          # 처리한 청크 수
+        self.busy_s = 0.0        # 작업 시간 합계 (워커 전체)
+        self.blocked_s = 0.0     # 다음 큐가 가득 차서 기다린 시간 합계 (backpressure)
+        self.first = None
+        self.last = None
+
+    def span(self) -> float:
+        """첫 항목을 받은 뒤 마지막 항목을 끝낼 때까지의 시간"""
+        return (self.last - self.first) if self.first is not None else 0.0
+
+    def row(self) -> dict:
+        span = self.span()
+        return {
+            "stage": self.name, "workers": self.workers, "items": self.items, "chunks": self.chunks,
+            "busy_s": round(self.busy_s, 3), "blocked_s": round(self.blocked_s, 3), "span_s": round(span, 3),
+            "items_per_s": round(self.items / span, 1) if span else None,
+            "chunks_per_s": round(self.chunks / span, 1) if span else None,
+        }
+
+class _FileProgress:
+    """청킹이 끝난 파일 하나의 저장 진행 상황"""
+
+    def __init__(self, cfg: dict, counts: dict, stale: list, retag: list, batches: int):
+        self.cfg = cfg
+        self.counts = counts
+        self.stale = stale
+        self.retag = retag       # jsonl_file만 고칠 (id, 메타데이터) 목록
+        self.pending = batches
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    PDF 처리용 프로세스 풀
+    ChromaDB 클라이언트의 네이티브 스레드가 있는 프로세스를 fork하지 않도록 forkserver(없으면 spawn)를 씁니다.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+class BuildPipeline:
+    """
+    extract → chunk → embed → store 스트리밍 파이프라인
+
+        pipeline = BuildPipeline(collection, provider, cache)
+        totals = asyncio.run(pipeline.run(files_config))
+        print(pipeline.report())
+    """
+
+    def __init__(self, collection, provider, cache: EmbeddingCache = None, out_dir: Path = OUT_DIR,
+                 workers: int = None, embed_concurrency: int = 4, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 batch_size: int = BATCH_SIZE, token_budget: dict = None):
+        self.collection = collection
+        self.provider = provider
+        self.cache = cache
+        self.out_dir = Path(out_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.embed_concurrency = embed_concurrency
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.stats = {}
+        self.totals = Counter()
+        self.built = {}          # out_name → 저장한 레코드 수
+        self.failed = []
+        self.elapsed_s = 0.0
+
+    async def _stage(self, stats: StageStats, inbox: asyncio.Queue, outbox: asyncio.Queue, handle,
+                     consumers: int):
+        """inbox의 항목을 stats.workers개 워커가 handle로 처리해 나온 항목들을 outbox에 넣습니다."""
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    return
+                start = time.perf_counter()
+                if stats.first is None:
+                    stats.first = start
+                outputs = await handle(item)
+                stats.last = time.perf_counter()
+                stats.busy_s += stats.last - start
+                stats.items += 1
+                for output in outputs:
+                    start = time.perf_counter()
+                    await outbox.put(output)
+                    stats.blocked_s += time.perf_counter() - start
+
+        await asyncio.gather(*(worker() for _ in range(stats.workers)))
+        if outbox is not None:
+            for _ in range(consumers):
+                await outbox.put(_DONE)
+
+    async def run(self, files: list) -> Counter:
+        """files(files_config 항목 목록)를 빌드하고 추가/변경/삭제/그대로 합계를 반환합니다."""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        self.stats = {
+            "extract": StageStats("extract", self.workers),
+            "chunk": StageStats("chunk", self.workers),
+            "embed": StageStats("embed", self.embed_concurrency),
+            "store": StageStats("store", 1),
+        }
+
+        with _process_pool(self.workers) as pool, ThreadPoolExecutor(max_workers=1) as db:
+            def db_call(func, *args, **kwargs):
+                # 컬렉션 읽기/쓰기는 모두 DB 스레드 하나에서 순서대로
+                return loop.run_in_executor(db, lambda: func(*args, **kwargs))
+
+            async def extract(cfg):
+                try:
+                    text = await loop.run_in_executor(pool, extract_and_clean, cfg)
+                except Exception as e:
+                    self._fail(cfg, e)
+                    return []
+                return [(cfg, text)]
+
+            async def chunk(item):
+                cfg, text = item
+                try:
+                    records = await loop.run_in_executor(pool, chunk_records, cfg, text, self.token_budget)
+                except Exception as e:
+                    self._fail(cfg, e)
+                    return []
+                self.stats["chunk"].chunks += len(records)
+                # 부산물: processed/*.jsonl (preprocess_pdfs.py와 같은 내용)
+                out_path = self.out_dir / cfg["out_name"]
+                self.built[cfg["out_name"]] = await asyncio.to_thread(write_jsonl, out_path, records)
+
+                documents = [doc for doc in map(record_document, records) if doc is not None]
+                ids = [doc_id for doc_id, _, _ in documents]
+                metadatas = [metadata for _, _, metadata in documents]
+                # index_data.py와 같은 비교 (jsonl_file 기록, 이 파일의 청크만 삭제)
+                plan, retag = await db_call(plan_file_sync, self.collection, cfg["out_name"], ids, metadatas)
+                changed = sorted(plan['added'] + plan['updated'])
+                batches = [changed[i:i + self.batch_size] for i in range(0, len(changed), self.batch_size)]
+                # 바뀐 청크가 없어도 빈 배치 하나를 흘려보내 store 스테이지에서 삭제/완료 처리
+                batches = batches or [[]]
+                progress = _FileProgress(cfg, {key: len(value) for key, value in plan.items()},
+                                         plan['deleted'], [(ids[i], metadatas[i]) for i in retag], len(batches))
+                return [
+                    (progress, [documents[i] for i in batch])
+                    for batch in batches
+                ]
+
+            async def embed(item):
+                progress, batch = item
+                texts = [text for _, text, _ in batch]
+                vectors = await aembed_cached(self.provider, texts, self.cache) if texts else []
+                self.stats["embed"].chunks += len(texts)
+                return [(progress, batch, vectors)]
+
+            async def store(item):
+                progress, batch, vectors = item
+                if batch:
+                    await db_call(
+                        self.collection.upsert,
+                        ids=[doc_id for doc_id, _, _ in batch],
+                        embeddings=vectors,
+                        documents=[text for _, text, _ in batch],
+                        metadatas=[metadata for _, _, metadata in batch],
+                    )
+                    self.stats["store"].chunks += len(batch)
+                progress.pending -= 1
+                if progress.pending == 0:
+                    for i in range(0, len(progress.retag), self.batch_size):
+                        retag = progress.retag[i:i + self.batch_size]
+                        await db_call(self.collection.update, ids=[doc_id for doc_id, _ in retag],
+                                      metadatas=[metadata for _, metadata in retag])
+                    for i in range(0, len(progress.stale), self.batch_size):
+                        await db_call(self.collection.delete, ids=progress.stale[i:i + self.batch_size])
+                    self.totals.update(progress.counts)
+                    c = progress.counts
+                    print(f"  ✓ {progress.cfg['out_name']}: 추가 {c['added']}개, 변경 {c['updated']}개, "
+                          f"삭제 {c['deleted']}개, 그대로 {c['unchanged']}개")
+                return []
+
+            files_queue = asyncio.Queue()
+            for cfg in files:
+                files_queue.put_nowait(cfg)
+            for _ in range(self.workers):
+                files_queue.put_nowait(_DONE)
+            texts_queue = asyncio.Queue(self.queue_size)
+            batches_queue = asyncio.Queue(self.queue_size)
+            vectors_queue = asyncio.Queue(self.queue_size)
+
+            tasks = [
+                asyncio.ensure_future(self._stage(self.stats["extract"], files_queue, texts_queue, extract,
+                                                  self.workers)),
+                asyncio.ensure_future(self._stage(self.stats["chunk"], texts_queue, batches_queue, chunk,
+                                                  self.embed_concurrency)),
+                asyncio.ensure_future(self._stage(self.stats["embed"], batches_queue, vectors_queue, embed, 1)),
+                asyncio.ensure_future(self._stage(self.stats["store"], vectors_queue, None, store, 0)),
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # 임베딩/저장 실패는 빌드 전체를 멈춤 (다시 실행하면 끝난 청크는 건너뜀)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            finally:
+                self.elapsed_s = time.perf_counter() - start
+        return self.totals
+
+    def _fail(self, cfg: dict, error: Exception):
+        """파일 하나의 추출/청킹 실패는 그 파일만 건너뜀"""
+        self.failed.append(cfg["out_name"])
+        print(f"  [ERROR] {cfg['raw_name']}: {error}")
+
+    def report(self) -> str:
+        """스테이지별 처리량 표"""
+        lines = [
+            f"{'stage':<8}{'workers':>8}{'items':>7}{'chunks':>8}{'busy':>9}{'blocked':>9}"
+            f"{'span':>9}{'items/s':>9}{'chunks/s':>10}"
+        ]
+        for stats in self.stats.values():
+            row = stats.row()
+            items_per_s = f"{row['items_per_s']:.1f}" if row['items_per_s'] is not None else "-"
+            chunks_per_s = f"{row['chunks_per_s']:.1f}" if row['chunks_per_s'] is not None else "-"
+            lines.append(
+                f"{row['stage']:<8}{row['workers']:>8}{row['items']:>7}{row['chunks']:>8}"
+                f"{row['busy_s']:>8.2f}s{row['blocked_s']:>8.2f}s{row['span_s']:>8.2f}s"
+                f"{items_per_s:>9}{chunks_per_s:>10}"
+            )
+        lines.append(f"전체 {self.elapsed_s:.2f}s (busy: 워커 작업 시간 합계, blocked: 다음 큐가 가득 차 기다린 시간)")
+        return "\n".join(lines)
+
+def main(workers: int = None, embed_concurrency: int = 4, queue_size: int = DEFAULT_QUEUE_SIZE,
+         token_budget: dict = None):
+    """
+    files_config의 모든 PDF를 전처리하고 벡터 DB에 인덱싱합니다.
+
+    Args:
+        workers: PDF 추출/청킹 프로세스 수 (None이면 CPU 수)
+        embed_concurrency: 동시에 보낼 임베딩 배치 수
+        queue_size: 스테이지 사이 큐 크기
+        token_budget: 토큰 예산 청킹 설정 (None이면 기존 글자 수 기준 청킹)
+    """
+    provider = get_embedding_provider()
+    cache = EmbeddingCache()
+    chroma_client = chromadb.PersistentClient(path=str(DB_DIR), settings=Settings(anonymized_telemetry=False))
+    collection_name = collection_name_for(provider)
+    collection = chroma_client.get_or_create_collection(
+        name=collection_name,
+        metadata={"description": "Well Dying 유산상속 관련 데이터", "embedding_model": provider.model},
+    )
+
+    print("=" * 60)
+    print(f"빌드 시작: PDF {len(files_config)}개 → {collection_name} "
+          f"(임베딩: {provider.name} {provider.model})")
+    print("=" * 60)
+
+    pipeline = BuildPipeline(collection, provider, cache, workers=workers, embed_concurrency=embed_concurrency,
+                             queue_size=queue_size, token_budget=token_budget)
+    manifest = load_manifest()
+    code_version = pipeline_code_version()
+    try:
+        totals = asyncio.run(pipeline.run(files_config))
+    except BaseException:
+        # 일부 배치는 저장되었을 수 있으므로 챗봇 답변 캐시가 비워지도록 버전을 올림
+        bump_index_version(DB_DIR, collection_name)
+        raise
+    finally:
+        # 저장이 끝난 JSONL은 실패해도 매니페스트에 기록 (preprocess_pdfs.py가 다시 빌드하지 않도록)
+        entries = manifest["entries"]
+        for cfg in files_config:
+            out_name = cfg["out_name"]
+            if out_name in pipeline.built:
+                entries[out_name] = manifest_entry(manifest_inputs(cfg, code_version, token_budget),
+                                                   OUT_DIR / out_name, pipeline.built[out_name],
+                                                   entries.get(out_name))
+        save_manifest(manifest)
+    # 지워진 JSONL 파일의 청크 삭제 (index_data.py와 같음)
+    totals['deleted'] += prune_missing_files(collection, {p.name for p in OUT_DIR.glob("*.jsonl")})
+    # index_data.py --only-changed가 다시 인덱싱하지 않도록 저장을 마친 JSONL의 해시 기록
+    record_indexed_outputs(DB_DIR, collection_name, {
+        out_name: file_sha256(OUT_DIR / out_name) for out_name in pipeline.built if out_name not in pipeline.failed
+    })
+    if totals['added'] or totals['updated'] or totals['deleted'] or pipeline.failed:
+        bump_index_version(DB_DIR, collection_name)
+
+    print("\n" + "=" * 60)
+    print(f"빌드 완료! 총 {collection.count()}개 문서가 벡터 DB에 저장되었습니다.")
+    print(f"추가 {totals['added']}개, 변경 {totals['updated']}개, "
+          f"삭제 {totals['deleted']}개, 그대로 {totals['unchanged']}개"
+          + (f", 실패 {len(pipeline.failed)}개 파일" if pipeline.failed else ""))
+    print(pipeline.report())
+    print(provider.report())
+    export = configured_export()
+    if export:
+        # VECTOR_STORE=numpy면 챗봇이 읽을 NumPy 벡터 저장소도 갱신
+        directory = DEFAULT_STORE_DIR / collection_name
+        export_collection(collection, directory, None if export == "float32" else export,
+                          {"embedding_model": provider.model})
+        print(f"벡터 저장소 내보내기: {directory} (양자화 {export})")
+    print("=" * 60)
+    return totals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF 전처리부터 벡터 DB 인덱싱까지 스트리밍 파이프라인으로 실행합니다.")
+    parser.add_argument("--workers", type=int, default=None, help="PDF 추출/청킹 프로세스 수 (기본 CPU 수)")
+    parser.add_argument("--embed-concurrency", type=int, default=4, help="동시에 보낼 임베딩 배치 수 (기본 4)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"스테이지 사이 큐 크기 (기본 {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--token-budget", type=int, default=None, metavar="MAX_TOKENS",
+                        help="글자 수 대신 토큰 수로 청킹 (preprocess_pdfs.py와 같음)")
+    parser.add_argument("--overlap-tokens", type=int, default=DEFAULT_TOKEN_BUDGET["overlap_tokens"],
+                        help=f"토큰 예산 모드의 오버랩 토큰 수 (기본 {DEFAULT_TOKEN_BUDGET['overlap_tokens']})")
+    parser.add_argument("--tokenizer", default=DEFAULT_TOKEN_BUDGET["tokenizer"],
+                        help="토큰 예산 모드의 토크나이저: estimate(기본) | tiktoken | tiktoken:<인코딩>")
+    args = parser.parse_args()
+    token_budget = None
+    if args.token_budget is not None:
+        token_budget = {
+            "tokenizer": args.tokenizer,
+            "max_tokens": args.token_budget,
+            "overlap_tokens": args.overlap_tokens,
+        }
+    main(workers=args.workers, embed_concurrency=args.embed_concurrency, queue_size=args.queue_size,
+         token_budget=token_budget)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+임베딩 API 배치 요청
+
+여러 텍스트를 임베딩 요청 하나에 묶어 보내되, 요청당 입력 수와 토큰 수 제한을 넘지 않도록
+필요한 만큼만 요청을 나눕니다. 실제 요청과 결과 정렬은 async_embedding_client.py가 합니다.
+"""
+
+from token_budget import estimate_tokens
+
+# OpenAI 임베딩 API 제한
+MAX_INPUTS_PER_REQUEST = 2048        # 요청 하나의 입력 수
+MAX_TOKENS_PER_INPUT = 8191          # 입력 하나의 토큰 수
+MAX_TOKENS_PER_REQUEST = 300_000     # 요청 하나의 입력 토큰 합계
+
+def iter_request_batches(texts: list, max_inputs: int = MAX_INPUTS_PER_REQUEST,
+                         max_tokens: int = MAX_TOKENS_PER_REQUEST, count_tokens=estimate_tokens):
+    """
+    texts를 제한 안에서 가능한 한 크게 나눈 (start, stop) 구간을 순서대로 생성합니다.
+    토큰 수는 count_tokens로 셉니다. (기본: 한국어에서 실제보다 약간 크게 잡는 추정기)
+    """
+    start = 0
+    tokens = 0
+    for i, text in enumerate(texts):
+        n = count_tokens(text)
+        if n > MAX_TOKENS_PER_INPUT:
+            raise ValueError(f"입력 {i}의 토큰 수({n})가 입력당 제한({MAX_TOKENS_PER_INPUT})을 넘습니다.")
+        if i > start and (i - start >= max_inputs or tokens + n > max_tokens):
+            yield start, i
+            start, tokens = i, 0
+        tokens += n
+    if start < len(texts):
+        yield start, len(texts)
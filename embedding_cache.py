@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+내용 주소 기반 임베딩 캐시 (SQLite)
+
+키는 (모델, 차원 수, sha256(텍스트))이고 벡터는 float32 바이트로 저장합니다.
+index_data.py, rag_chatbot.py, rag_chatbot_langgraph.py가 같은 캐시 파일을 공유하므로
+내용이 바뀐 청크와 처음 보는 질문만 임베딩 API를 호출합니다.
+
+    cache = EmbeddingCache()
+    vectors = cache.embed(texts, embed_fn, model="text-embedding-3-small")
+
+- 캐시 파일이 max_bytes를 넘으면 가장 오래 쓰이지 않은 벡터부터 지웁니다. (LRU)
+- hits/misses/evictions 카운터로 캐시 효과를 확인할 수 있습니다.
+"""
+
+import sqlite3
+import hashlib
+import threading
+import time
+from array import array
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / "embedding_cache.sqlite3"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# SQLite 한 문장에 넣을 최대 파라미터 수 (오래된 SQLite의 999개 제한보다 작게)
+_SQL_BATCH = 500
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _encode(vector) -> bytes:
+    return array("f", vector).tobytes()
+
+def _decode(blob: bytes) -> list:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+class EmbeddingCache:
+    """(모델, 차원 수, 텍스트 해시) → 임베딩 벡터 캐시"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Streamlit처럼 여러 스레드에서 호출되므로 연결 하나를 락으로 보호
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                   model TEXT NOT NULL,
+                   dims INTEGER NOT NULL,
+                   text_sha256 TEXT NOT NULL,
+                   vector BLOB NOT NULL,
+                   nbytes INTEGER NOT NULL,
+                   last_used REAL NOT NULL,
+                   PRIMARY KEY (model, dims, text_sha256)
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get_many(self, model: str, dimensions: int, hashes: list) -> dict:
+        """
+        캐시에 있는 해시만 {해시: 벡터}로 반환하고 사용 시각을 갱신합니다.
+        dimensions가 None(모델 기본 차원)이면 0으로 저장합니다.
+        """
+        dims = dimensions or 0
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for i in range(0, len(unique), _SQL_BATCH):
+                part = unique[i:i + _SQL_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT text_sha256, vector FROM embeddings WHERE model = ? AND dims = ? "
+                    f"AND text_sha256 IN ({','.join('?' * len(part))})",
+                    [model, dims, *part],
+                ).fetchall()
+                found.update((h, _decode(blob)) for h, blob in rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND dims = ? AND text_sha256 = ?",
+                    [(now, model, dims, h) for h in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, model: str, dimensions: int, hashes: list, vectors: list):
+        """벡터들을 저장하고 캐시 크기가 max_bytes를 넘으면 오래된 것부터 지웁니다."""
+        dims = dimensions or 0
+        now = time.time()
+        rows = []
+        for h, vector in zip(hashes, vectors):
+            blob = _encode(vector)
+            rows.append((model, dims, h, blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, dims, text_sha256, vector, nbytes, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """전체 크기가 max_bytes를 넘으면 90% 이하가 될 때까지 LRU 순으로 삭제 (락 안에서 호출)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * 0.9)
+        victims = []
+        for rowid, nbytes in self._conn.execute("SELECT rowid, nbytes FROM embeddings ORDER BY last_used"):
+            victims.append((rowid,))
+            excess -= nbytes
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM embeddings WHERE rowid = ?", victims)
+        self.evictions += len(victims)
+
+    def _lookup(self, texts: list, model: str, dimensions: int) -> tuple:
+        """(해시 목록, 캐시에 있던 {해시: 벡터}, 임베딩할 {해시: 텍스트}) - 카운터도 갱신"""
+        hashes = [text_sha256(t) for t in texts]
+        found = self.get_many(model, dimensions, hashes)
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in found:
+                missing.setdefault(h, text)
+        n_missing = sum(h not in found for h in hashes)
+        self.misses += n_missing
+        self.hits += len(hashes) - n_missing
+        return hashes, found, missing
+
+    def _store(self, model: str, dimensions: int, found: dict, missing: dict, vectors: list):
+        if len(vectors) != len(missing):
+            raise ValueError(f"임베딩 수({len(vectors)})가 요청 수({len(missing)})와 다릅니다.")
+        self.put_many(model, dimensions, list(missing), vectors)
+        found.update(zip(missing, vectors))
+
+    def embed(self, texts: list, embed_fn, model: str, dimensions: int = None) -> list:
+        """
+        texts의 임베딩을 입력 순서대로 반환합니다.
+        캐시에 없는 텍스트만 (중복 없이) embed_fn(list) -> list 로 한 번에 임베딩하고 저장합니다.
+        """
+        hashes, found, missing = self._lookup(texts, model, dimensions)
+        if missing:
+            self._store(model, dimensions, found, missing, embed_fn(list(missing.values())))
+        return [list(found[h]) for h in hashes]
+
+    async def aembed(self, texts: list, aembed_fn, model: str, dimensions: int = None) -> list:
+        """embed의 비동기 버전 (aembed_fn은 코루틴 함수, 캐시 조회/저장은 그대로 동기)"""
+        hashes, found, missing = self._lookup(texts, model, dimensions)
+        if missing:
+            self._store(model, dimensions, found, missing, await aembed_fn(list(missing.values())))
+        return [list(found[h]) for h in hashes]
+
+    def embed_one(self, text: str, embed_fn, model: str, dimensions: int = None) -> list:
+        """텍스트 하나용 embed (embed_fn은 텍스트 하나를 받아 벡터 하나를 반환)"""
+        return self.embed([text], lambda texts: [embed_fn(texts[0])], model, dimensions)[0]
+
+    def stats(self) -> dict:
+        """카운터와 현재 캐시 크기"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM embeddings"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+임베딩 제공자 (설정으로 선택)
+
+index_data.py, rag_chatbot.py, rag_chatbot_langgraph.py는 모두 이 모듈의 제공자로 임베딩합니다.
+.env 또는 환경 변수로 고릅니다.
+
+    EMBEDDING_PROVIDER=openai   # 기본값, OpenAI 임베딩 API (EMBEDDING_MODEL, 기본 text-embedding-3-small)
+    EMBEDDING_PROVIDER=local    # 네트워크 없이 NumPy로 계산하는 해시 글자 n-그램 벡터 (EMBEDDING_DIMENSIONS, 기본 1024)
+
+    provider = get_embedding_provider()
+    vectors = provider.embed(texts)          # 입력 순서대로 벡터 목록
+    vector = provider.embed_query(query)
+    vectors = await provider.aembed(texts)   # 비동기 (build.py)
+
+- 제공자마다 벡터 차원과 의미가 다르므로 컬렉션 이름에 모델을 붙여 따로 저장합니다. (collection_name_for)
+- local 제공자는 같은 텍스트에 항상 같은 벡터를 내므로 CI나 인터넷이 없는 PC에서도
+  인덱싱과 검색 벤치마크를 그대로 돌릴 수 있습니다. (benchmarks/bench_embedding_providers.py)
+"""
+
+import os
+import re
+import time
+import unicodedata
+import numpy as np
+from async_embedding_client import AsyncEmbeddingClient
+
+DEFAULT_PROVIDER = "openai"
+DEFAULT_OPENAI_MODEL = "text-embedding-3-small"
+DEFAULT_LOCAL_DIMENSIONS = 1024
+
+# 기본 제공자(OpenAI text-embedding-3-small)가 쓰는 컬렉션 이름
+BASE_COLLECTION_NAME = "well_dying_legacy_data"
+
+class OpenAIEmbeddingProvider:
+    """
+    OpenAI 임베딩 API 제공자
+    문서 배치는 AsyncEmbeddingClient(동시 요청, RPM/TPM 제한, 재시도)로,
+    질문 하나는 동기 클라이언트로 바로 요청합니다.
+    """
+
+    name = "openai"
+    remote = True  # 네트워크 호출이 있으므로 임베딩 캐시를 거침
+
+    def __init__(self, model: str = DEFAULT_OPENAI_MODEL, api_key: str = None, **client_options):
+        self.model = model
+        self.dimensions = None  # 모델 기본 차원
+        self.api_key = api_key
+        self.client = AsyncEmbeddingClient(api_key=api_key, model=model, **client_options)
+        self._sync_client = None
+
+    def embed(self, texts: list) -> list:
+        return self.client.embed_sync(texts)
+
+    async def aembed(self, texts: list) -> list:
+        return await self.client.embed(texts)
+
+    def embed_query(self, text: str) -> list:
+        if self._sync_client is None:
+            from openai import OpenAI
+            self._sync_client = OpenAI(api_key=self.api_key, base_url=self.client.base_url)
+        response = self._sync_client.embeddings.create(model=self.model, input=text)
+        return response.data[0].embedding
+
+    def report(self) -> str:
+        return self.client.report()
+
+class HashedNgramEmbeddingProvider:
+    """
+    해시 글자 n-그램 임베딩 (로컬, 결정적)
+
+    - 텍스트를 NFKC 정규화 + 소문자 + 공백 하나로 정리하고 앞뒤에 공백을 붙입니다.
+    - 글자 n-그램(기본 1~3글자)을 유니코드 코드 포인트 배열에서 NumPy로 한 번에 해시하여
+      dimensions개 칸 중 하나에 ±1로 더합니다. (부호도 해시에서 정하므로 충돌이 서로 상쇄됨)
+    - 공백을 포함한 n-그램이 어절 시작/끝을 나타내므로 조사가 붙은 한국어 어절도 어간이 겹칩니다.
+    - 빈도는 log(1 + tf)로 누르고 L2 정규화하므로 L2 거리 순위가 코사인 유사도 순위와 같습니다.
+    - 해시는 파이썬 hash()가 아닌 고정 상수 연산이라 프로세스/PC가 달라도 같은 벡터가 나옵니다.
+    """
+
+    name = "local"
+    remote = False  # 계산이 캐시 조회보다 빠르므로 임베딩 캐시를 쓰지 않음
+
+    _PRIME = np.uint64(0x100000001B3)
+    _MIX = np.uint64(0xFF51AFD7ED558CCD)
+
+    def __init__(self, dimensions: int = DEFAULT_LOCAL_DIMENSIONS, ngram_range: tuple = (1, 3)):
+        if dimensions < 2:
+            raise ValueError(f"dimensions는 2 이상이어야 합니다: {dimensions}")
+        self.dimensions = dimensions
+        self.ngram_range = tuple(ngram_range)
+        self.model = f"hashed-char-ngram-{self.ngram_range[0]}-{self.ngram_range[1]}-d{dimensions}"
+        self.stats = {"texts": 0, "elapsed_s": 0.0}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        words = unicodedata.normalize('NFKC', text).lower().split()
+        return f" {' '.join(words)} " if words else ''
+
+    def _ngram_hashes(self, text: str) -> np.ndarray:
+        codes = np.frombuffer(self.normalize(text).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        parts = []
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            count = len(codes) - n + 1
+            if count <= 0:
+                break
+            h = np.full(count, n, dtype=np.uint64)  # n마다 다른 시작값
+            for k in range(n):
+                h = h * self._PRIME + codes[k:k + count]
+            if n == 1:
+                h = h[codes != ord(' ')]  # 공백 한 글자는 세지 않음
+            parts.append(h)
+        if not parts:
+            return np.empty(0, dtype=np.uint64)
+        h = np.concatenate(parts)
+        # 하위 비트가 고르게 섞이도록 마무리 (murmur3 fmix64 앞부분)
+        h ^= h >> np.uint64(33)
+        h *= self._MIX
+        h ^= h >> np.uint64(33)
+        return h
+
+    def embed_array(self, texts: list) -> np.ndarray:
+        """texts의 임베딩을 (len(texts), dimensions) float32 배열로 반환"""
+        start = time.perf_counter()
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            h = self._ngram_hashes(text)
+            if not len(h):
+                continue
+            signs = np.where(h >> np.uint64(63), -1.0, 1.0)
+            matrix[row] = np.bincount((h % np.uint64(self.dimensions)).astype(np.int64),
+                                      weights=signs, minlength=self.dimensions)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        self.stats["texts"] += len(texts)
+        self.stats["elapsed_s"] += time.perf_counter() - start
+        return matrix
+
+    def embed(self, texts: list) -> list:
+        return self.embed_array(list(texts)).tolist()
+
+    async def aembed(self, texts: list) -> list:
+        return self.embed(texts)
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_array([text])[0].tolist()
+
+    def report(self) -> str:
+        s = self.stats
+        elapsed = s["elapsed_s"] or float("inf")
+        return f"로컬 임베딩 {s['texts']}개 ({self.model}), {s['elapsed_s']:.2f}s, {s['texts'] / elapsed:.0f} 입력/s"
+
+def get_embedding_provider(name: str = None, **options):
+    """
+    이름("openai" | "local")으로 임베딩 제공자를 만듭니다.
+    name과 옵션을 생략하면 EMBEDDING_PROVIDER / EMBEDDING_MODEL / EMBEDDING_DIMENSIONS 환경 변수를 읽습니다.
+    """
+    name = (name or os.getenv("EMBEDDING_PROVIDER") or DEFAULT_PROVIDER).strip().lower()
+    if name == "openai":
+        options.setdefault("model", os.getenv("EMBEDDING_MODEL") or DEFAULT_OPENAI_MODEL)
+        options.setdefault("api_key", os.getenv("OPENAI_API_KEY"))
+        return OpenAIEmbeddingProvider(**options)
+    if name == "local":
+        if os.getenv("EMBEDDING_DIMENSIONS"):
+            options.setdefault("dimensions", int(os.getenv("EMBEDDING_DIMENSIONS")))
+        return HashedNgramEmbeddingProvider(**options)
+    raise ValueError(f"알 수 없는 임베딩 제공자: {name} (openai, local 중 하나)")
+
+def collection_name_for(provider, base: str = BASE_COLLECTION_NAME) -> str:
+    """
+    제공자의 벡터를 저장할 ChromaDB 컬렉션 이름
+    기본 모델은 기존 컬렉션 이름을 그대로 쓰고, 그 밖의 모델은 모델 이름을 붙입니다.
+    """
+    if provider.model == DEFAULT_OPENAI_MODEL:
+        return base
+    return f"{base}__{re.sub(r'[^A-Za-z0-9_-]', '-', provider.model)}"
+
+def embed_cached(provider, texts: list, cache=None) -> list:
+    """원격 제공자는 임베딩 캐시를 거쳐, 로컬 제공자는 바로 임베딩합니다."""
+    if cache is None or not provider.remote:
+        return provider.embed(texts)
+    return cache.embed(texts, provider.embed, provider.model, provider.dimensions)
+
+async def aembed_cached(provider, texts: list, cache=None) -> list:
+    """embed_cached의 비동기 버전 (build.py의 임베딩 스테이지용)"""
+    if cache is None or not provider.remote:
+        return await provider.aembed(texts)
+    return await cache.aembed(texts, provider.aembed, provider.model, provider.dimensions)
+
+def embed_query_cached(provider, text: str, cache=None) -> list:
+    """질문 하나용 embed_cached"""
+    if cache is None or not provider.remote:
+        return provider.embed_query(text)
+    return cache.embed_one(text, provider.embed_query, provider.model, provider.dimensions)
@@ -4,14 +4,25 @@
 전처리된 JSONL 파일들을 읽어서 벡터 DB에 인덱싱하는 스크립트
 """
 
-import os
 import json
+import time
+import asyncio
+import argparse
+from collections import Counter
 from pathlib import Path
 import chromadb
 from chromadb.config import Settings
-from openai import OpenAI
 from dotenv import load_dotenv
-import time
+from embedding_cache import EmbeddingCache
+from async_embedding_client import TokenBucket
+from embedding_providers import (
+    BASE_COLLECTION_NAME, get_embedding_provider, collection_name_for, aembed_cached,
+)
+from indexing import (
+    IndexJournal, file_sha256, sync_jsonl_files, prune_missing_files, bump_index_version,
+    changed_outputs, read_indexed_outputs, record_indexed_outputs,
+)
+from vector_store import DEFAULT_STORE_DIR, QUANTIZATIONS, configured_export, export_collection
 
 # 환경 변수 로드
 load_dotenv()
@@ -20,9 +31,18 @@ load_dotenv()
 BASE_DIR = Path(__file__).parent
 PROCESSED_DIR = BASE_DIR / "processed"
 DB_DIR = BASE_DIR / "chroma_db"
+# preprocess_pdfs.py가 남기는 빌드 매니페스트
+MANIFEST_PATH = PROCESSED_DIR / "manifest.json"
+
+# 임베딩 캐시 (챗봇과 공유, 내용이 바뀐 청크만 API 호출)
+embedding_cache = EmbeddingCache()
 
-# OpenAI 클라이언트 초기화
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# 임베딩 제공자 (EMBEDDING_PROVIDER=openai|local, embedding_providers.py)
+embedding_provider = get_embedding_provider()
+
+# OpenAI 제공자의 비동기 임베딩 클라이언트 (동시 요청 수, RPM/TPM 제한, 429/5xx 재시도)
+# 동시 요청 수와 제한 값은 main()의 인자로 바꿀 수 있음 (local 제공자는 None)
+embedding_client = getattr(embedding_provider, "client", None)
 
 # ChromaDB 클라이언트 초기화
 chroma_client = chromadb.PersistentClient(
@@ -30,109 +50,112 @@ chroma_client = chromadb.PersistentClient(
     settings=Settings(anonymized_telemetry=False)
 )
 
-# 컬렉션 생성 또는 가져오기
-collection_name = "well_dying_legacy_data"
+# 컬렉션 생성 또는 가져오기 (제공자/모델마다 별도 컬렉션)
+collection_name = collection_name_for(embedding_provider)
 try:
     collection = chroma_client.get_collection(name=collection_name)
     print(f"기존 컬렉션 '{collection_name}' 사용")
 except:
     collection = chroma_client.create_collection(
         name=collection_name,
-        metadata={"description": "Well Dying 유산상속 관련 데이터"}
+        metadata={"description": "Well Dying 유산상속 관련 데이터", "embedding_model": embedding_provider.model}
     )
     print(f"새 컬렉션 '{collection_name}' 생성")
 
-def get_embedding(text: str, model: str = "text-embedding-3-small") -> list:
-    """텍스트를 임베딩 벡터로 변환"""
+# 인덱싱 체크포인트 저널 (--resume으로 중단된 인덱싱 이어서 하기, 컬렉션마다 따로)
+JOURNAL_PATH = DB_DIR / ("index_journal.jsonl" if collection_name == BASE_COLLECTION_NAME
+                         else f"index_journal__{collection_name}.jsonl")
+
+def load_changed_outputs(manifest_path: Path = MANIFEST_PATH):
+    """
+    빌드 매니페스트의 출력 중 이 컬렉션에 마지막으로 인덱싱한 내용과 다른 JSONL 파일 이름을 읽습니다.
+    (매니페스트의 output_sha256과 chroma_db/indexed_outputs.json 비교, indexing.changed_outputs)
+    매니페스트가 없거나 읽을 수 없으면 None을 반환합니다.
+    """
     try:
-        response = openai_client.embeddings.create(
-            model=model,
-            input=text
-        )
-        return response.data[0].embedding
-    except Exception as e:
-        print(f"임베딩 생성 오류: {e}")
-        raise
-
-def index_jsonl_file(jsonl_path: Path):
-    """JSONL 파일을 읽어서 벡터 DB에 인덱싱"""
-    print(f"\n처리 중: {jsonl_path.name}")
-    
-    documents = []
-    metadatas = []
-    ids = []
-    
-    with open(jsonl_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if not line.strip():
-                continue
-            
-            data = json.loads(line)
-            
-            # 텍스트와 메타데이터 추출
-            text = data.get('text', '')
-            if not text or len(text.strip()) < 20:
-                continue
-            
-            # ID와 메타데이터 준비
-            doc_id = data.get('id', '')
-            metadata = {
-                'title': data.get('title', ''),
-                'source': data.get('source', ''),
-                'category': data.get('category', ''),
-            }
-            
-            # 선택적 필드 추가
-            if 'article_id' in data:
-                metadata['article_id'] = data['article_id']
-            if 'article_title' in data:
-                metadata['article_title'] = data['article_title']
-            if 'sub_chunk' in data:
-                metadata['sub_chunk'] = str(data['sub_chunk'])
-            
-            documents.append(text)
-            metadatas.append(metadata)
-            ids.append(doc_id)
-    
-    if not documents:
-        print(f"  경고: {jsonl_path.name}에 유효한 문서가 없습니다.")
-        return
-    
-    print(f"  {len(documents)}개 문서 발견")
-    
-    # 배치로 임베딩 생성 및 추가
-    batch_size = 100
-    total_batches = (len(documents) + batch_size - 1) // batch_size
-    
-    for i in range(0, len(documents), batch_size):
-        batch_docs = documents[i:i+batch_size]
-        batch_ids = ids[i:i+batch_size]
-        batch_metadatas = metadatas[i:i+batch_size]
-        batch_num = (i // batch_size) + 1
-        
-        print(f"  배치 {batch_num}/{total_batches} 처리 중... ({len(batch_docs)}개 문서)")
-        
-        # 임베딩 생성
-        embeddings = []
-        for doc in batch_docs:
-            embedding = get_embedding(doc)
-            embeddings.append(embedding)
-            time.sleep(0.1)  # API rate limit 방지
-        
-        # ChromaDB에 추가
-        collection.add(
-            ids=batch_ids,
-            embeddings=embeddings,
-            documents=batch_docs,
-            metadatas=batch_metadatas
-        )
-        
-        print(f"  배치 {batch_num} 완료")
-    
-    print(f"  ✓ {jsonl_path.name} 인덱싱 완료")
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return changed_outputs(manifest, read_indexed_outputs(DB_DIR, collection_name))
+
+def format_counts(counts: dict) -> str:
+    """{"added", "updated", "deleted", "unchanged"} 개수 한 줄 요약"""
+    return (f"추가 {counts['added']}개, 변경 {counts['updated']}개, "
+          f"삭제 {counts['deleted']}개, 그대로 {counts['unchanged']}개")
+
+async def index_jsonl_files(jsonl_files: list, journal: IndexJournal = None) -> tuple:
+    """
+    JSONL 파일들을 동시에 증분 인덱싱
+
+    content_hash로 컬렉션과 비교하여 새로 생기거나 바뀐 청크만 임베딩/upsert하고
+    JSONL에서 사라진 청크는 삭제합니다. journal이 주어지면 배치마다 체크포인트를 기록합니다.
+
+    모든 파일의 임베딩 요청이 한 클라이언트의 동시 요청 한도(--concurrency)와 RPM/TPM을 나눠 쓰므로
+    전체 시간은 파일 순서가 아니라 API 처리량에 맞춰집니다. 컬렉션 쓰기는 한 스레드에서 차례로 실행됩니다.
+    파일이 끝날 때마다 누적 진행 상황과 처리량을 출력합니다.
+
+    Returns:
+        (합계 Counter, 실패한 파일 이름 목록)
+    """
+    totals = Counter()
+    failed = []
+    progress = {"files": 0, "embedded": 0}
+    start = time.perf_counter()
+
+    def on_file_done(path, result, seconds, embedded):
+        progress["files"] += 1
+        progress["embedded"] += embedded
+        elapsed = time.perf_counter() - start
+        prefix = f"[{progress['files']}/{len(jsonl_files)}] {path.name}"
+        if isinstance(result, Exception):
+            failed.append(path.name)
+            print(f"오류: {prefix} 처리 중 오류 발생: {result}")
+            return
+        totals.update(result)
+        if not any(result.values()):
+            print(f"  경고: {path.name}에 유효한 문서가 없습니다.")
+        # 컬렉션 스레드의 출력과 섞이지 않도록 한 번에 출력
+        print(f"✓ {prefix} 완료 ({seconds:.1f}s): {format_counts(result)}\n"
+              f"  누적 임베딩 {progress['embedded']}개, {elapsed:.1f}s, "
+              f"{progress['embedded'] / max(elapsed, 1e-9):.1f} 청크/s")
+
+    async def aembed(texts):
+        return await aembed_cached(embedding_provider, texts, embedding_cache)
+
+    await sync_jsonl_files(collection, jsonl_files, aembed, journal=journal, on_file_done=on_file_done)
+    return totals, failed
+
+def export_vectors(quantization: str = None) -> Path:
+    """컬렉션을 NumPy 벡터 저장소(vector_store/<컬렉션 이름>/)로 내보내고 경로를 반환합니다."""
+    directory = DEFAULT_STORE_DIR / collection_name
+    meta = export_collection(collection, directory, quantization, {"embedding_model": embedding_provider.model})
+    print(f"벡터 저장소 내보내기: {directory} ({meta['count']}개, {meta['dims']}차원, "
+          f"양자화 {meta['quantization'] or '없음(float32)'})")
+    return directory
+
+def main(only_changed: bool = False, concurrency: int = None, rpm: float = None, tpm: float = None,
+         resume: bool = False, export: str = None):
+    """
+    모든 JSONL 파일을 인덱싱
+
+    Args:
+        only_changed: True면 manifest.json의 출력 중 마지막 인덱싱 이후 내용이 바뀐 파일만 인덱싱
+        resume: True면 체크포인트 저널을 보고 마지막 실행에서 끝난 파일/배치를 건너뜀
+        concurrency: 동시에 보낼 임베딩 요청 수 (None이면 클라이언트 기본값)
+        rpm, tpm: 분당 요청 수 / 토큰 수 제한 (None이면 클라이언트 기본값)
+        export: "float32" | "float16" | "int8"이면 인덱싱 후 컬렉션을 NumPy 벡터 저장소로 내보냄
+            (None이고 VECTOR_STORE=numpy면 VECTOR_QUANTIZATION 형식으로 내보냄)
+    """
+    export = export or configured_export()
+    if embedding_client is not None:
+        if concurrency is not None:
+            embedding_client.max_in_flight = concurrency
+        if rpm is not None:
+            embedding_client.request_bucket = TokenBucket(rpm)
+        if tpm is not None:
+            embedding_client.token_bucket = TokenBucket(tpm)
 
-def main():
-    """모든 JSONL 파일을 인덱싱"""
     print("=" * 60)
     print("Well Dying Legacy Data 인덱싱 시작")
     print("=" * 60)
@@ -142,27 +165,96 @@ def main():
     
     # 처리된 JSONL 파일 찾기
     jsonl_files = sorted(PROCESSED_DIR.glob("*.jsonl"))
+
+    # 지워진 JSONL 파일의 청크 삭제 (파일이 남아 있으면 빈 파일이어도 아래 동기화에서 지움)
+    pruned = prune_missing_files(collection, {p.name for p in jsonl_files})
+    if pruned:
+        print(f"지워진 JSONL 파일의 청크 {pruned}개 삭제")
+        bump_index_version(DB_DIR, collection_name)
     
     if not jsonl_files:
         print(f"경고: {PROCESSED_DIR}에 JSONL 파일이 없습니다.")
         return
     
-    print(f"\n총 {len(jsonl_files)}개 파일 발견")
+    if only_changed:
+        changed = load_changed_outputs()
+        if changed is None:
+            print(f"경고: {MANIFEST_PATH.name}을 읽을 수 없어 모든 파일을 인덱싱합니다.")
+        else:
+            jsonl_files = [p for p in jsonl_files if p.name in changed]
+            if not jsonl_files:
+                print("변경된 JSONL 파일이 없습니다.")
+                return
+    
+    print(f"\n총 {len(jsonl_files)}개 파일 발견 (임베딩: {embedding_provider.name} {embedding_provider.model}, "
+          f"컬렉션: {collection_name})")
+
+    journal = IndexJournal(JOURNAL_PATH)
+    if journal.start_run(resume=resume):
+        print(f"{JOURNAL_PATH.name}의 마지막 실행을 이어서 인덱싱합니다.")
+    elif resume:
+        print(f"이어서 할 기록이 없어 처음부터 인덱싱합니다. ({JOURNAL_PATH.name})")
     
-    # 각 파일 인덱싱
+    # 인덱싱을 시작할 때의 파일 내용 (끝난 파일만 indexed_outputs.json에 기록)
+    hashes = {p.name: file_sha256(p) for p in jsonl_files}
+    pending = []
     for jsonl_file in jsonl_files:
-        try:
-            index_jsonl_file(jsonl_file)
-        except Exception as e:
-            print(f"오류: {jsonl_file.name} 처리 중 오류 발생: {e}")
+        if resume and journal.is_file_done(jsonl_file.name, hashes[jsonl_file.name]):
+            print(f"이미 완료, 건너뜀: {jsonl_file.name}")
             continue
+        pending.append(jsonl_file)
+
+    # 남은 파일을 동시에 인덱싱
+    print(f"\n{len(pending)}개 파일을 동시에 인덱싱합니다. (동시 임베딩 요청 "
+          f"{embedding_client.max_in_flight if embedding_client else '-'}개)")
+    totals, failed = asyncio.run(index_jsonl_files(pending, journal))
+    totals['deleted'] += pruned
+    record_indexed_outputs(DB_DIR, collection_name,
+                           {name: sha256 for name, sha256 in hashes.items() if name not in failed})
+    if failed:
+        print(f"실패한 파일 {len(failed)}개: {', '.join(failed)}")
+        print("  → 'python index_data.py --resume'으로 끝난 배치를 건너뛰고 이어서 할 수 있습니다.")
+    else:
+        journal.finish_run()
+    # 컬렉션이 바뀌었으면 (실패한 파일도 일부 배치는 저장되었을 수 있음) 챗봇 답변 캐시가 비워지도록 버전을 올림
+    if totals['added'] or totals['updated'] or totals['deleted'] or failed:
+        bump_index_version(DB_DIR, collection_name)
     
     # 최종 통계
     count = collection.count()
     print("\n" + "=" * 60)
     print(f"인덱싱 완료! 총 {count}개 문서가 벡터 DB에 저장되었습니다.")
+    print(format_counts(totals))
+    print(embedding_provider.report())
+    if export:
+        export_vectors(None if export == "float32" else export)
+    stats = embedding_cache.stats()
+    print(f"임베딩 캐시: 적중 {stats['hits']}개, 미스 {stats['misses']}개 (적중률 {stats['hit_rate']:.0%}), "
+          f"저장 {stats['entries']}개 / {stats['bytes'] / 2**20:.1f}MB")
     print("=" * 60)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="전처리된 JSONL 파일들을 벡터 DB에 인덱싱합니다.")
+    parser.add_argument(
+        "--only-changed", action="store_true",
+        help="manifest.json의 출력 중 마지막 인덱싱 이후 바뀐 파일만 인덱싱 (chroma_db/indexed_outputs.json과 비교)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=None,
+        help="동시에 보낼 임베딩 요청 수, 모든 파일이 나눠 씀 (OpenAI 제공자, 기본 4)"
+    )
+    parser.add_argument("--rpm", type=float, default=None, help="분당 임베딩 요청 수 제한 (기본 3000)")
+    parser.add_argument("--tpm", type=float, default=None, help="분당 임베딩 토큰 수 제한 (기본 1,000,000)")
+    parser.add_argument(
+        "--resume", action="store_true",
+        help=f"중단된 인덱싱 이어서 하기 (chroma_db/{JOURNAL_PATH.name}에 기록된 완료 파일/배치 건너뜀)"
+    )
+    parser.add_argument(
+        "--export-vectors", choices=("float32",) + QUANTIZATIONS, default=None,
+        help="인덱싱 후 컬렉션을 vector_store/<컬렉션 이름>/에 NumPy 벡터 파일로 내보냄 "
+             "(float16/int8이면 양자화 코드도 저장, vector_store.py)"
+    )
+    args = parser.parse_args()
+    main(only_changed=args.only_changed, concurrency=args.concurrency, rpm=args.rpm, tpm=args.tpm,
+         resume=args.resume, export=args.export_vectors)
 
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSONL → 벡터 DB 증분 동기화
+
+index_data.py가 사용하는 인덱싱 핵심 로직입니다. (클라이언트 생성 같은 전역 부작용 없음)
+각 청크 메타데이터에 content_hash(텍스트 + 메타데이터 해시)를 저장해 두고,
+다시 인덱싱할 때 컬렉션과 비교하여
+- 새 id / 내용이 바뀐 id만 임베딩하여 upsert
+- JSONL에서 사라진 id는 삭제 (청크마다 jsonl_file 메타데이터로 어느 파일에서 왔는지 기록하므로
+  파일이 비거나 지워져도 그 파일의 청크를 찾아 지울 수 있음, prune_missing_files)
+- 나머지는 그대로 둡니다.
+
+IndexJournal은 파일별로 커밋된 배치를 기록하여 중단된 인덱싱을 이어서 할 수 있게 합니다.
+sync_jsonl_files는 여러 파일을 한 이벤트 루프에서 동시에 동기화합니다. (컬렉션 접근은 한 스레드로 직렬화)
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# collection.get / upsert / delete 한 번에 보낼 id 수
+BATCH_SIZE = 100
+
+# 청크를 만든 JSONL 파일 이름을 기록하는 메타데이터 키 (content_hash에는 포함하지 않음)
+SOURCE_FILE_KEY = 'jsonl_file'
+
+# 컬렉션별 인덱스 버전 파일 (DB 디렉토리 안, 챗봇 답변 캐시 무효화용)
+INDEX_VERSION_FILE = "index_version.json"
+# 컬렉션별로 마지막에 인덱싱한 JSONL 파일의 sha256 (DB 디렉토리 안, --only-changed용)
+INDEXED_OUTPUTS_FILE = "indexed_outputs.json"
+
+def content_hash(text: str, metadata: dict) -> str:
+    """청크 텍스트와 메타데이터(content_hash, jsonl_file 제외)의 sha256"""
+    meta = {k: v for k, v in metadata.items() if k not in ('content_hash', SOURCE_FILE_KEY)}
+    payload = json.dumps({'text': text, 'metadata': meta}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def record_document(data: dict):
+    """
+    JSONL 레코드 하나를 (id, 텍스트, 메타데이터)로 바꿉니다. 너무 짧아 인덱싱하지 않을 레코드는 None.
+    메타데이터에는 content_hash가 들어 있습니다.
+    """
+    # 텍스트와 메타데이터 추출
+    text = data.get('text', '')
+    if not text or len(text.strip()) < 20:
+        return None
+
+    # ID와 메타데이터 준비
+    doc_id = data.get('id', '')
+    metadata = {
+        'title': data.get('title', ''),
+        'source': data.get('source', ''),
+        'category': data.get('category', ''),
+    }
+
+    # 선택적 필드 추가
+    if 'article_id' in data:
+        metadata['article_id'] = data['article_id']
+    if 'article_title' in data:
+        metadata['article_title'] = data['article_title']
+    if 'sub_chunk' in data:
+        metadata['sub_chunk'] = str(data['sub_chunk'])
+    metadata['content_hash'] = content_hash(text, metadata)
+    return doc_id, text, metadata
+
+def load_jsonl_records(jsonl_path: Path) -> tuple:
+    """
+    JSONL 파일에서 인덱싱할 청크를 읽습니다.
+
+    Returns:
+        (ids, documents, metadatas) - 메타데이터에는 content_hash가 들어 있음
+    """
+    documents = []
+    metadatas = []
+    ids = []
+
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+
+            document = record_document(json.loads(line))
+            if document is None:
+                continue
+            doc_id, text, metadata = document
+            documents.append(text)
+            metadatas.append(metadata)
+            ids.append(doc_id)
+
+    return ids, documents, metadatas
+
+def existing_chunks(collection, sources: set, source_file: str = None) -> dict:
+    """
+    컬렉션에서 source가 sources 중 하나이거나 jsonl_file이 source_file인 청크의 {id: 메타데이터}
+    (jsonl_file로도 찾으므로 JSONL이 비어 sources가 없어도 그 파일의 청크가 나옴)
+    """
+    conditions = []
+    if sources:
+        conditions.append({'source': {'$in': sorted(sources)}})
+    if source_file:
+        conditions.append({SOURCE_FILE_KEY: source_file})
+    if not conditions:
+        return {}
+    where = conditions[0] if len(conditions) == 1 else {'$or': conditions}
+    result = collection.get(where=where, include=['metadatas'])
+    return {doc_id: metadata or {} for doc_id, metadata in zip(result['ids'], result['metadatas'])}
+
+def existing_hashes(collection, sources: set, source_file: str = None) -> dict:
+    """existing_chunks의 {id: content_hash} (해시가 없으면 "")"""
+    return {
+        doc_id: metadata.get('content_hash', '')
+        for doc_id, metadata in existing_chunks(collection, sources, source_file).items()
+    }
+
+def prune_missing_files(collection, present: set, batch_size: int = BATCH_SIZE) -> int:
+    """
+    jsonl_file이 present(지금 있는 JSONL 파일 이름들)에 없는 청크를 지우고 지운 수를 반환합니다.
+    (JSONL 파일이 통째로 지워진 경우, jsonl_file이 없는 청크는 건드리지 않음)
+    """
+    result = collection.get(include=['metadatas'])
+    stale = [
+        doc_id for doc_id, metadata in zip(result['ids'], result['metadatas'])
+        if (metadata or {}).get(SOURCE_FILE_KEY) and metadata[SOURCE_FILE_KEY] not in present
+    ]
+    for start in range(0, len(stale), batch_size):
+        collection.delete(ids=stale[start:start + batch_size])
+    return len(stale)
+
+def plan_sync(ids: list, metadatas: list, existing: dict) -> dict:
+    """
+    JSONL 청크와 컬렉션 상태를 비교합니다.
+
+    Returns:
+        {"added", "updated", "unchanged": JSONL 안의 위치 목록, "deleted": 컬렉션에서 지울 id 목록}
+    """
+    plan = {'added': [], 'updated': [], 'unchanged': [], 'deleted': []}
+    for i, (doc_id, metadata) in enumerate(zip(ids, metadatas)):
+        if doc_id not in existing:
+            plan['added'].append(i)
+        elif existing[doc_id] != metadata['content_hash']:
+            plan['updated'].append(i)
+        else:
+            plan['unchanged'].append(i)
+    current = set(ids)
+    plan['deleted'] = [doc_id for doc_id in existing if doc_id not in current]
+    return plan
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def read_index_version(db_dir: Path, collection_name: str):
+    """컬렉션의 현재 인덱스 버전 (기록이 없으면 None)"""
+    try:
+        with open(Path(db_dir) / INDEX_VERSION_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get(collection_name)
+    except (OSError, ValueError):
+        return None
+
+def bump_index_version(db_dir: Path, collection_name: str) -> str:
+    """
+    컬렉션 내용이 바뀌었음을 기록하고 새 버전을 반환합니다. (index_data.py / build.py가 인덱싱 후 호출)
+    임시 파일에 쓴 뒤 교체하므로 읽는 쪽은 이전 버전이나 새 버전 중 하나만 봅니다.
+    """
+    path = Path(db_dir) / INDEX_VERSION_FILE
+    try:
+        versions = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        versions = {}
+    versions[collection_name] = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(versions, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp, path)
+    return versions[collection_name]
+
+def read_indexed_outputs(db_dir: Path, collection_name: str) -> dict:
+    """컬렉션에 마지막으로 인덱싱한 {JSONL 파일 이름: sha256} (기록이 없으면 빈 dict)"""
+    try:
+        with open(Path(db_dir) / INDEXED_OUTPUTS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get(collection_name) or {}
+    except (OSError, ValueError):
+        return {}
+
+def record_indexed_outputs(db_dir: Path, collection_name: str, outputs: dict):
+    """인덱싱을 마친 {JSONL 파일 이름: sha256}을 기록합니다. (임시 파일에 쓴 뒤 교체)"""
+    path = Path(db_dir) / INDEXED_OUTPUTS_FILE
+    try:
+        recorded = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        recorded = {}
+    recorded.setdefault(collection_name, {}).update(outputs)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(recorded, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp, path)
+
+def changed_outputs(manifest: dict, indexed: dict) -> set:
+    """
+    빌드 매니페스트의 출력 중 마지막으로 인덱싱한 내용과 다른 JSONL 파일 이름
+    (output_sha256과 indexed의 sha256 비교 - 전처리를 여러 번 실행해도 인덱싱 전까지는 계속 바뀐 파일)
+    """
+    return {
+        out_name for out_name, entry in manifest.get('entries', {}).items()
+        if entry.get('output_sha256') != indexed.get(out_name)
+    }
+
+class IndexJournal:
+    """
+    인덱싱 체크포인트 저널 (추가 전용 JSONL, 줄마다 fsync)
+
+    - {"event": "run_start"} 이후의 줄이 현재 실행의 진행 상황입니다.
+    - 배치는 JSONL 파일 안의 위치(batch_size개씩)로 번호를 매기고, collection.upsert가 끝난 뒤에만
+      {"event": "batch"}를 기록합니다. 파일의 sha256도 함께 기록하므로 파일 내용이 바뀌면 기록은 무시됩니다.
+    - 임베딩 호출과 upsert 사이에 프로세스가 죽으면(kill -9) 그 배치는 기록되지 않아 다시 upsert됩니다.
+      임베딩은 이미 임베딩 캐시에 저장되어 있고 upsert는 여러 번 해도 결과가 같으므로 안전합니다.
+    - 쓰다가 잘린 마지막 줄은 읽을 때 무시합니다.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries = []
+
+    def _read(self) -> list:
+        entries = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            return []
+        # 마지막 run_start 이후만 현재 실행
+        starts = [i for i, e in enumerate(entries) if e.get('event') == 'run_start']
+        return entries[starts[-1]:] if starts else []
+
+    def _append(self, entry: dict):
+        entry = {**entry, 'at': datetime.now().isoformat(timespec='seconds')}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries.append(entry)
+
+    def start_run(self, resume: bool = False) -> bool:
+        """
+        resume이면 마지막 실행의 기록을 이어받고(이어받을 기록이 있으면 True),
+        아니면 저널을 비우고 새 실행을 시작합니다.
+        """
+        if resume:
+            self.entries = self._read()
+            if self.entries:
+                return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text('', encoding='utf-8')
+        self.entries = []
+        self._append({'event': 'run_start', 'run': uuid.uuid4().hex})
+        return False
+
+    def committed_batches(self, name: str, sha256: str) -> set:
+        return {
+            e['batch'] for e in self.entries
+            if e.get('event') == 'batch' and e.get('file') == name and e.get('sha256') == sha256
+        }
+
+    def is_file_done(self, name: str, sha256: str) -> bool:
+        return any(
+            e.get('event') == 'file_done' and e.get('file') == name and e.get('sha256') == sha256
+            for e in self.entries
+        )
+
+    def record_batch(self, name: str, sha256: str, batch: int, upserted: int):
+        self._append({'event': 'batch', 'file': name, 'sha256': sha256, 'batch': batch, 'upserted': upserted})
+
+    def record_file_done(self, name: str, sha256: str, counts: dict):
+        self._append({'event': 'file_done', 'file': name, 'sha256': sha256, 'counts': counts})
+
+    def finish_run(self):
+        self._append({'event': 'run_done'})
+
+def plan_file_sync(collection, name: str, ids: list, metadatas: list) -> tuple:
+    """
+    JSONL 파일 name의 청크(ids, metadatas)를 컬렉션과 비교합니다. (prepare_sync / build.py 공용)
+    metadatas에는 jsonl_file을 기록합니다.
+
+    Returns:
+        (plan, retag) - plan은 plan_sync와 같고 deleted는 이 파일(또는 jsonl_file이 없는) 청크만,
+        retag는 내용은 그대로인데 jsonl_file만 고칠 위치 목록
+    """
+    for metadata in metadatas:
+        metadata[SOURCE_FILE_KEY] = name
+    sources = {metadata['source'] for metadata in metadatas}
+    existing = existing_chunks(collection, sources, name)
+    plan = plan_sync(ids, metadatas, {doc_id: meta.get('content_hash', '') for doc_id, meta in existing.items()})
+    # 다른 파일로 옮겨 간 청크(jsonl_file이 다른 파일)는 그 파일의 동기화가 맡으므로 지우지 않음
+    plan['deleted'] = [doc_id for doc_id in plan['deleted']
+                       if existing[doc_id].get(SOURCE_FILE_KEY) in (None, name)]
+    # 내용은 그대로인데 jsonl_file이 없거나 다른 청크 (이전 버전으로 인덱싱한 컬렉션)
+    retag = [i for i in plan['unchanged'] if existing[ids[i]].get(SOURCE_FILE_KEY) != name]
+    return plan, retag
+
+def prepare_sync(collection, jsonl_path: Path, batch_size: int = BATCH_SIZE, journal: IndexJournal = None) -> dict:
+    """
+    sync_jsonl_file의 앞부분: JSONL을 읽어 컬렉션과 비교하고 임베딩할 청크를 고릅니다.
+
+    Returns:
+        commit_sync에 넘길 상태 {"name", "sha256", "ids", "documents", "metadatas", "plan", "skip",
+        "changed": 임베딩할 위치 목록 (JSONL 순서), "retag": jsonl_file만 고칠 위치 목록, "batch_size"}
+    """
+    name = Path(jsonl_path).name
+    sha256 = file_sha256(jsonl_path) if journal else None
+    skip = journal.committed_batches(name, sha256) if journal else set()
+
+    ids, documents, metadatas = load_jsonl_records(jsonl_path)
+    plan, retag = plan_file_sync(collection, name, ids, metadatas)
+
+    # 건너뛸 배치를 뺀 나머지의 새/변경 청크
+    changed = sorted(i for i in plan['added'] + plan['updated'] if i // batch_size not in skip)
+    return {
+        'name': name, 'sha256': sha256, 'ids': ids, 'documents': documents, 'metadatas': metadatas,
+        'plan': plan, 'skip': skip, 'changed': changed, 'retag': retag, 'batch_size': batch_size,
+    }
+
+def commit_sync(collection, prepared: dict, vectors: list, journal: IndexJournal = None) -> dict:
+    """
+    sync_jsonl_file의 뒷부분: prepared['changed'] 순서의 벡터를 배치별로 upsert하고(저널 기록),
+    사라진 청크를 지운 뒤 {"added", "updated", "deleted", "unchanged"} 개수를 반환합니다.
+    """
+    name, sha256, ids = prepared['name'], prepared['sha256'], prepared['ids']
+    batch_size, skip = prepared['batch_size'], prepared['skip']
+    embeddings = dict(zip(prepared['changed'], vectors))
+
+    total_batches = (len(ids) + batch_size - 1) // batch_size
+    for batch_num in range(total_batches):
+        if batch_num in skip:
+            print(f"  [{name}] 배치 {batch_num + 1}/{total_batches} 이미 완료, 건너뜀")
+            continue
+        batch = [i for i in range(batch_num * batch_size, min((batch_num + 1) * batch_size, len(ids)))
+                 if i in embeddings]
+        if batch:
+            print(f"  [{name}] 배치 {batch_num + 1}/{total_batches} upsert 중... ({len(batch)}개 문서)")
+            collection.upsert(
+                ids=[ids[i] for i in batch],
+                embeddings=[embeddings[i] for i in batch],
+                documents=[prepared['documents'][i] for i in batch],
+                metadatas=[prepared['metadatas'][i] for i in batch],
+            )
+        if journal:
+            journal.record_batch(name, sha256, batch_num, len(batch))
+
+    retag = prepared.get('retag', [])
+    for start in range(0, len(retag), batch_size):
+        batch = retag[start:start + batch_size]
+        collection.update(ids=[ids[i] for i in batch], metadatas=[prepared['metadatas'][i] for i in batch])
+
+    stale = prepared['plan']['deleted']
+    for start in range(0, len(stale), batch_size):
+        collection.delete(ids=stale[start:start + batch_size])
+
+    counts = {key: len(value) for key, value in prepared['plan'].items()}
+    if journal:
+        journal.record_file_done(name, sha256, counts)
+    return counts
+
+def sync_jsonl_file(collection, jsonl_path: Path, embed_fn, batch_size: int = BATCH_SIZE,
+                    journal: IndexJournal = None) -> dict:
+    """
+    JSONL 파일 하나를 컬렉션과 동기화하고 {"added", "updated", "deleted", "unchanged"} 개수를 반환합니다.
+    embed_fn(list) -> list 는 새로 넣거나 바뀐 청크에만 (한 번에) 호출됩니다.
+
+    journal이 주어지면 배치(JSONL 안의 위치 기준 batch_size개)마다 upsert 후 기록하고,
+    같은 파일 내용으로 이미 기록된 배치는 건너뜁니다.
+    여러 파일을 동시에 처리할 때는 prepare_sync / commit_sync를 나눠 씁니다. (index_data.py)
+    """
+    prepared = prepare_sync(collection, jsonl_path, batch_size, journal)
+    changed = prepared['changed']
+    vectors = embed_fn([prepared['documents'][i] for i in changed]) if changed else []
+    return commit_sync(collection, prepared, vectors, journal)
+
+async def sync_jsonl_files(collection, jsonl_paths: list, aembed_fn, batch_size: int = BATCH_SIZE,
+                           journal: IndexJournal = None, on_file_done=None) -> dict:
+    """
+    JSONL 파일 여러 개를 동시에 컬렉션과 동기화합니다.
+
+    파일마다 읽기/비교(prepare_sync) → 임베딩(await aembed_fn(list)) → upsert(commit_sync) 순서로 진행하며,
+    컬렉션과 저널 접근은 전용 스레드 하나에서 차례로 실행하고 임베딩은 파일 순서와 상관없이 겹쳐 실행합니다.
+    동시 임베딩 요청 수는 aembed_fn 쪽 한도(AsyncEmbeddingClient.max_in_flight)를 모든 파일이 나눠 씁니다.
+
+    on_file_done(path, counts 또는 예외, 걸린 초, 임베딩한 청크 수)은 파일 하나가 끝날 때마다 호출됩니다.
+    한 파일이 실패해도 나머지 파일은 계속 진행합니다.
+
+    Returns:
+        {경로: counts 또는 예외} (jsonl_paths 순서)
+    """
+    loop = asyncio.get_running_loop()
+    db = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-db")
+
+    async def sync_one(path):
+        start = time.perf_counter()
+        embedded = 0
+        try:
+            prepared = await loop.run_in_executor(db, prepare_sync, collection, path, batch_size, journal)
+            texts = [prepared['documents'][i] for i in prepared['changed']]
+            vectors = await aembed_fn(texts) if texts else []
+            embedded = len(texts)
+            result = await loop.run_in_executor(db, commit_sync, collection, prepared, vectors, journal)
+        except Exception as e:
+            result = e
+        if on_file_done:
+            on_file_done(path, result, time.perf_counter() - start, embedded)
+        return result
+
+    try:
+        results = await asyncio.gather(*(sync_one(path) for path in jsonl_paths))
+    finally:
+        db.shutdown(wait=True)
+    return dict(zip(jsonl_paths, results))
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+한국어 글자 n-그램 역색인 + BM25 (벡터 검색과 RRF로 합치는 하이브리드 검색용)
+
+밀집 벡터 검색은 "배우자상속공제", "10년 이내 증여"처럼 정확한 법률 용어나 숫자를 놓치기 쉬우므로
+processed/*.jsonl 청크(제목 + 본문)의 글자 2-그램/3-그램으로 역색인을 만들어 같이 검색합니다.
+
+- 토큰: NFKC + 소문자로 바꾼 뒤 한글/한자/영문/숫자만 남기고 공백 없이 이어 붙인 문자열의 2·3-그램
+  (띄어쓰기가 달라도 "배우자 상속공제"와 "배우자상속공제"가 같은 n-그램이 됨)
+- 포스팅: 용어별로 연속된 문서 번호(int32)와 BM25 가중치(float32, idf와 문서 길이 정규화를 미리 곱해 둠)
+  → 질문은 n-그램마다 배열 구간 하나를 점수 배열에 더하기만 하면 되므로 1ms 안에 끝남
+- 증분 갱신: JSONL 파일마다 토큰화 결과를 세그먼트(lexical_index/<파일 이름>.npz, sha256 기록)로 저장하고
+  바뀐 파일만 다시 토큰화한 뒤 전체 포스팅(idf)을 다시 합칩니다. (refresh)
+
+    index = LexicalIndex(PROCESSED_DIR)
+    docs = index.query("배우자상속공제 한도", n_results=20)
+    fused = reciprocal_rank_fusion([vector_docs, docs], n_results=5)
+
+HYBRID_SEARCH=0이면 챗봇이 벡터 검색만 사용합니다. (configured_lexical_index)
+"""
+
+import os
+import io
+import re
+import json
+import time
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+import numpy as np
+from indexing import file_sha256, load_jsonl_records
+
+DEFAULT_INDEX_DIR = Path(__file__).parent / "lexical_index"
+NGRAM_SIZES = (2, 3)
+# BM25 파라미터
+K1 = 1.2
+B = 0.75
+# RRF 상수 (순위 r의 점수 1 / (RRF_K + r))
+RRF_K = 60
+# 세그먼트 형식이 바뀌면 올림 (이전 세그먼트는 다시 만듦)
+SEGMENT_VERSION = 1
+
+_KEEP = re.compile(r"[0-9a-zㄱ-ㆎ가-힣一-鿿]+")
+
+def ngrams(text: str, sizes: tuple = NGRAM_SIZES) -> list:
+    """검색용 글자 n-그램 목록 (정규화 후 한 글자뿐이면 그 글자 하나)"""
+    s = "".join(_KEEP.findall(unicodedata.normalize("NFKC", text).lower()))
+    grams = [s[i:i + n] for n in sizes for i in range(len(s) - n + 1)]
+    return grams or ([s] if s else [])
+
+def _segment_arrays(jsonl_path: Path, sha256: str) -> dict:
+    """JSONL 파일 하나를 토큰화한 세그먼트 (문서별 용어 번호/빈도 CSR + 레코드)"""
+    ids, documents, metadatas = load_jsonl_records(jsonl_path)
+    terms = {}
+    doc_offsets, term_idx, tfs, lengths = [0], [], [], []
+    for document, metadata in zip(documents, metadatas):
+        grams = ngrams(f"{metadata.get('title', '')} {document}")
+        for term, tf in Counter(grams).items():
+            term_idx.append(terms.setdefault(term, len(terms)))
+            tfs.append(min(tf, np.iinfo(np.uint16).max))
+        doc_offsets.append(len(term_idx))
+        lengths.append(len(grams))
+    return {
+        "version": np.array(SEGMENT_VERSION),
+        "sha256": np.array(sha256),
+        "terms": np.array(list(terms), dtype=str),
+        "doc_offsets": np.array(doc_offsets, dtype=np.int64),
+        "term_idx": np.array(term_idx, dtype=np.int32),
+        "tf": np.array(tfs, dtype=np.uint16),
+        "lengths": np.array(lengths, dtype=np.int32),
+        "records": np.array(json.dumps([ids, documents, metadatas], ensure_ascii=False)),
+    }
+
+class LexicalIndex:
+    """processed/*.jsonl의 BM25 역색인 (세그먼트 캐시로 증분 갱신)"""
+
+    def __init__(self, processed_dir: Path, index_dir: Path = DEFAULT_INDEX_DIR, check_interval: float = 5.0):
+        """
+        Args:
+            processed_dir: JSONL 파일 디렉토리
+            index_dir: 세그먼트 캐시 디렉토리 (None이면 저장하지 않고 메모리에서만 만듦)
+            check_interval: query가 JSONL 변경을 확인하는 최소 간격(초), None이면 refresh를 직접 호출할 때만
+        """
+        self.processed_dir = Path(processed_dir)
+        self.index_dir = Path(index_dir) if index_dir is not None else None
+        self.check_interval = check_interval
+        # 파일 이름 → {"stat": (크기, 수정 시각), "arrays": 세그먼트}
+        self._segments = {}
+        self._checked_at = None
+        # _merge가 만든 검색용 배열 묶음 (통째로 바꿔 끼우므로 검색 중인 스레드는 이전 묶음을 그대로 씀)
+        self._data = None
+        self._lock = threading.Lock()
+        self.stats = {"segments_built": 0, "segments_loaded": 0, "merges": 0, "last_refresh_s": 0.0}
+        self.refresh()
+
+    def _segment_path(self, name: str) -> Path:
+        return self.index_dir / f"{Path(name).stem}.npz"
+
+    def _load_segment(self, path: Path, sha256: str):
+        if self.index_dir is None:
+            return None
+        try:
+            with np.load(self._segment_path(path.name)) as data:
+                if int(data["version"]) != SEGMENT_VERSION or str(data["sha256"]) != sha256:
+                    return None
+                return {key: data[key] for key in data.files}
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_segment(self, path: Path, arrays: dict):
+        if self.index_dir is None:
+            return
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        target = self._segment_path(path.name)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(buffer.getvalue())
+        os.replace(tmp, target)
+
+    def refresh(self) -> bool:
+        """
+        JSONL 파일이 바뀌었으면 바뀐 파일의 세그먼트만 다시 만들고 포스팅을 다시 합칩니다.
+        바뀐 것이 있으면 True.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            paths = {path.name: path for path in sorted(self.processed_dir.glob("*.jsonl"))}
+            changed = set(self._segments) - set(paths)
+            for name in changed:
+                del self._segments[name]
+            for name, path in paths.items():
+                st = path.stat()
+                stat = (st.st_size, st.st_mtime_ns)
+                segment = self._segments.get(name)
+                if segment is not None and segment["stat"] == stat:
+                    continue
+                sha256 = file_sha256(path)
+                if segment is not None and str(segment["arrays"]["sha256"]) == sha256:
+                    segment["stat"] = stat
+                    continue
+                arrays = self._load_segment(path, sha256)
+                if arrays is None:
+                    arrays = _segment_arrays(path, sha256)
+                    self._save_segment(path, arrays)
+                    self.stats["segments_built"] += 1
+                else:
+                    self.stats["segments_loaded"] += 1
+                self._segments[name] = {"stat": stat, "arrays": arrays}
+                changed.add(name)
+            self._checked_at = time.monotonic()
+            if changed or self._data is None:
+                self._data = self._merge()
+            self.stats["last_refresh_s"] = time.perf_counter() - start
+            return bool(changed)
+
+    def _merge(self) -> dict:
+        """세그먼트들을 용어별 포스팅(CSR)으로 합치고 BM25 가중치를 계산"""
+        vocab = {}
+        ids, documents, metadatas = [], [], []
+        term_parts, doc_parts, tf_parts, length_parts = [], [], [], []
+        for name in sorted(self._segments):
+            arrays = self._segments[name]["arrays"]
+            seg_ids, seg_documents, seg_metadatas = json.loads(str(arrays["records"]))
+            base = len(ids)
+            ids += seg_ids
+            documents += seg_documents
+            metadatas += seg_metadatas
+            local = np.fromiter((vocab.setdefault(t, len(vocab)) for t in arrays["terms"].tolist()),
+                                dtype=np.int32, count=len(arrays["terms"]))
+            term_parts.append(local[arrays["term_idx"]])
+            doc_parts.append(np.repeat(np.arange(base, base + len(seg_ids), dtype=np.int32),
+                                       np.diff(arrays["doc_offsets"])))
+            tf_parts.append(arrays["tf"].astype(np.float32))
+            length_parts.append(arrays["lengths"])
+
+        n_docs = len(ids)
+        terms = np.concatenate(term_parts) if term_parts else np.zeros(0, dtype=np.int32)
+        docs = np.concatenate(doc_parts) if doc_parts else np.zeros(0, dtype=np.int32)
+        tf = np.concatenate(tf_parts) if tf_parts else np.zeros(0, dtype=np.float32)
+        lengths = np.concatenate(length_parts).astype(np.float32) if length_parts else np.zeros(0, np.float32)
+
+        order = np.argsort(terms, kind="stable")
+        terms, postings, tf = terms[order], docs[order], tf[order]
+        df = np.bincount(terms, minlength=len(vocab))
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = float(lengths.mean()) if n_docs else 1.0
+        norm = K1 * (1 - B + B * lengths[postings] / max(avgdl, 1e-9))
+        labels = np.array([metadata.get('category') or "" for metadata in metadatas], dtype=object)
+        self.stats["merges"] += 1
+        return {
+            "ids": ids, "documents": documents, "metadatas": metadatas, "vocab": vocab,
+            # 카테고리(파티션) → 문서 마스크 (query_router.py가 고른 카테고리만 검색할 때 씀)
+            "categories": {category: labels == category for category in set(labels.tolist()) if category},
+            "offsets": np.concatenate([[0], np.cumsum(df)]).astype(np.int64),
+            "postings": postings,
+            "weights": (idf[terms] * tf * (K1 + 1) / (tf + norm)).astype(np.float32),
+        }
+
+    def __len__(self) -> int:
+        return len(self._data["ids"])
+
+    @property
+    def n_terms(self) -> int:
+        """서로 다른 n-그램 수"""
+        return len(self._data["vocab"])
+
+    def nbytes(self) -> int:
+        """포스팅 배열 크기 (문서 번호 + 가중치 + 용어 구간)"""
+        data = self._data
+        return data["postings"].nbytes + data["weights"].nbytes + data["offsets"].nbytes
+
+    def search(self, query: str, k: int = 20, categories: list = None) -> tuple:
+        """
+        (문서 번호, BM25 점수) 상위 k개, 점수 내림차순 (일치하는 n-그램이 없는 문서는 제외)
+        categories를 주면 그 카테고리의 문서만
+        """
+        return self._search(self._current(), query, k, categories)
+
+    def _current(self) -> dict:
+        if self.check_interval is not None and time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+        return self._data
+
+    @staticmethod
+    def _search(data: dict, query: str, k: int, categories: list = None) -> tuple:
+        scores = np.zeros(len(data["ids"]), dtype=np.float32)
+        offsets, postings, weights = data["offsets"], data["postings"], data["weights"]
+        for term, qtf in Counter(ngrams(query)).items():
+            t = data["vocab"].get(term)
+            if t is None:
+                continue
+            start, end = offsets[t], offsets[t + 1]
+            # 한 용어의 포스팅에는 같은 문서가 한 번만 있으므로 팬시 인덱싱 덧셈으로 충분
+            scores[postings[start:end]] += qtf * weights[start:end]
+        if categories is not None:
+            allowed = np.zeros(len(scores), dtype=bool)
+            for category in categories:
+                if category in data["categories"]:
+                    allowed |= data["categories"][category]
+            scores[~allowed] = 0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return candidates, scores[candidates]
+
+    def query(self, query: str, n_results: int = 20, categories: list = None) -> list:
+        """검색 백엔드와 비슷한 형식: [{"id", "text", "metadata", "score", "rank"}, ...]"""
+        data = self._current()
+        top, scores = self._search(data, query, n_results, categories)
+        return [
+            {'id': data["ids"][i], 'text': data["documents"][i], 'metadata': dict(data["metadatas"][i]),
+             'score': float(score), 'rank': rank}
+            for rank, (i, score) in enumerate(zip(top.tolist(), scores.tolist()), 1)
+        ]
+
+def reciprocal_rank_fusion(result_lists: list, n_results: int = 5, k: int = RRF_K) -> list:
+    """
+    여러 검색 결과 목록을 id 기준 RRF(점수 합 1 / (k + 순위))로 합쳐 상위 n_results개를 반환합니다.
+    같은 문서는 먼저 나온 목록의 항목을 쓰고 "rrf_score"와 새 "rank"를 붙입니다.
+    """
+    scores, docs = {}, {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, 1):
+            scores[doc['id']] = scores.get(doc['id'], 0.0) + 1.0 / (k + rank)
+            docs.setdefault(doc['id'], doc)
+    ranked = sorted(scores, key=lambda doc_id: -scores[doc_id])[:n_results]
+    return [{**docs[doc_id], 'rrf_score': scores[doc_id], 'rank': rank} for rank, doc_id in enumerate(ranked, 1)]
+
+def hybrid_query(search_backend, lexical_index, query: str, query_embedding, n_results: int = 5,
+                 candidates: int = 20, categories: list = None) -> list:
+    """
+    벡터 검색과 BM25 검색을 후보 candidates개씩 뽑아 RRF로 합칩니다. (lexical_index가 None이면 벡터 검색만)
+
+    categories(query_router.py가 고른 파티션)를 주면 그 카테고리의 청크만 검색하고,
+    결과가 하나도 없으면 전체 카테고리에서 다시 검색합니다.
+    """
+    if lexical_index is None:
+        results = search_backend.query(query_embedding, n_results, categories=categories)
+    else:
+        candidates = max(candidates, n_results)
+        results = reciprocal_rank_fusion([
+            search_backend.query(query_embedding, candidates, categories=categories),
+            lexical_index.query(query, candidates, categories=categories),
+        ], n_results)
+    if categories is not None and not results:
+        return hybrid_query(search_backend, lexical_index, query, query_embedding, n_results, candidates)
+    return results
+
+def configured_lexical_index(processed_dir: Path):
+    """HYBRID_SEARCH=0이거나 JSONL 파일이 없으면 None, 아니면 LexicalIndex"""
+    if (os.getenv("HYBRID_SEARCH") or "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    if not any(Path(processed_dir).glob("*.jsonl")):
+        return None
+    return LexicalIndex(processed_dir)
@@ -7,50 +7,87 @@ PDF 파일들을 RAG 챗봇용 데이터베이스에 넣을 수 있도록 전처
 import os
 import re
 import json
+import argparse
+import hashlib
+import traceback
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import fitz  # PyMuPDF
+from token_budget import TokenCounter, get_tokenizer
+import profiling
+from profiling import profile_stage, profiled_iter
 
 # === 경로 설정 ===
 BASE_DIR = Path(__file__).parent
 OUT_DIR = BASE_DIR / "processed"
 OUT_DIR.mkdir(exist_ok=True)
+MANIFEST_PATH = OUT_DIR / "manifest.json"
+PROFILE_PATH = OUT_DIR / "profile.json"
 
 print("BASE_DIR:", BASE_DIR)
 print("OUT_DIR:", OUT_DIR)
 
 # === PDF → 텍스트 추출 ===
-def extract_text_from_pdf(path: Path) -> str:
-    """PDF 파일에서 텍스트를 추출합니다."""
+# 페이지 병렬 추출 기준: 이보다 페이지가 적은 PDF는 프로세스를 띄우는 비용이 더 크므로 한 프로세스에서 처리
+PAGE_PARALLEL_MIN_PAGES = 100
+# 워커 하나가 한 번에 맡는 페이지 수
+PAGE_BATCH_SIZE = 25
+
+def _extract_page_range(path: str, start: int, stop: int) -> list:
+    """워커 프로세스에서 자체 fitz 핸들로 [start, stop) 페이지의 텍스트를 추출합니다."""
+    doc = fitz.open(path)
+    try:
+        return [doc[i].get_text("text") or "" for i in range(start, stop)]
+    finally:
+        doc.close()
+
+def iter_pdf_pages(path: Path, workers: int = 1):
+    """
+    PDF 파일의 페이지 텍스트를 한 페이지씩 생성합니다.
+
+    Args:
+        workers: 1보다 크고 페이지가 PAGE_PARALLEL_MIN_PAGES 이상이면
+            PAGE_BATCH_SIZE 페이지씩 나눠 프로세스 풀에서 추출하고 페이지 순서대로 생성
+    """
     doc = fitz.open(str(path))
-    texts = []
-    for page in doc:
-        texts.append(page.get_text("text") or "")
-    doc.close()
-    return "\n".join(texts)
+    try:
+        page_count = doc.page_count
+        if workers <= 1 or page_count < PAGE_PARALLEL_MIN_PAGES:
+            for page in doc:
+                yield page.get_text("text") or ""
+            return
+    finally:
+        doc.close()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start in range(0, page_count, PAGE_BATCH_SIZE):
+            stop = min(start + PAGE_BATCH_SIZE, page_count)
+            pending.append(executor.submit(_extract_page_range, str(path), start, stop))
+            # 메모리를 일정하게 유지하기 위해 워커 수의 2배까지만 미리 제출
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def extract_text_from_pdf(path: Path, workers: int = 1) -> str:
+    """PDF 파일에서 텍스트를 추출합니다. (workers는 iter_pdf_pages 참고)"""
+    return "\n".join(iter_pdf_pages(path, workers))
 
 # === 제어 문자 제거 ===
+# 개행(\n), 탭(\t), 캐리지 리턴(\r)을 제외한 C0/C1 제어 문자와 Private Use Area (U+E000~U+F8FF)
+# str.translate는 한글처럼 ASCII가 아닌 문자마다 매핑 조회를 하므로,
+# 정규식 문자 클래스 한 번으로 지우는 쪽이 훨씬 빠릅니다. (benchmarks/bench_remove_control_chars.py)
+CONTROL_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ue000-\uf8ff]')
+
 def remove_control_chars(text: str) -> str:
     """
     제어 문자를 제거합니다 (개행, 탭 제외).
     """
-    # 개행(\n), 탭(\t), 캐리지 리턴(\r)은 유지하고 나머지 제어 문자 제거
-    # 유니코드 제어 문자 범위: \x00-\x1f, \x7f-\x9f
-    # 하지만 \n(0x0a), \t(0x09), \r(0x0d)는 유지
-    result = []
-    for char in text:
-        code = ord(char)
-        # 개행, 탭, 캐리지 리턴은 유지
-        if char in '\n\t\r':
-            result.append(char)
-        # 나머지 제어 문자는 제거
-        elif code < 32 or (127 <= code <= 159):
-            continue
-        # Private Use Area 제거 (U+E000~U+F8FF)
-        elif 0xE000 <= code <= 0xF8FF:
-            continue
-        else:
-            result.append(char)
-    return ''.join(result)
+    return CONTROL_CHARS.sub('', text)
 
 # === 기본 텍스트 정리 ===
 def clean_basic(text: str) -> str:
@@ -60,35 +97,181 @@ def clean_basic(text: str) -> str:
     - 한글 단어 중간 개행 복원
     - 불필요한 공백/개행 정리
     """
+    return _clean_whitespace(_normalize_raw(text)).strip()
+
+def _normalize_raw(text: str) -> str:
+    """제어 문자를 제거하고 CR, FF를 일반 개행으로 통일합니다."""
     # 제어 문자 제거 (개행, 탭 제외)
-    text = remove_control_chars(text)
+    text, n = CONTROL_CHARS.subn('', text)
+    if n:
+        BASIC_RULE_HITS["제어_문자"] += n
     
     # CR, FF를 일반 개행으로 통일
-    text = text.replace("\r", "\n").replace("\f", "\n")
+    return text.replace("\r", "\n").replace("\f", "\n")
 
+# clean_basic의 개행/공백 정리 규칙 (이름, 정규식, 치환 문자열)
+BASIC_RULES = [
     # (1) 한글 + 개행(1개 이상) + 한글 → 줄바꿈 제거 (단어 중간 개행 복원)
     #    예: "어느 하\n나에" 또는 "상속\n\n민법권" → "어느 하나에" 또는 "상속민법권"
     #    단, 문단 구분을 위해 "\n\n" 다음에 공백이나 다른 문자가 오는 경우는 제외
-    text = re.sub(r'([가-힣])\n+([가-힣])', r'\1\2', text)
-    
+    ("한글_개행_복원", r'([가-힣])\n+([가-힣])', r'\1\2'),
     # (1-1) 숫자 + 개행 + 숫자도 복원 (예: "제1\n\n2조" → "제12조")
-    text = re.sub(r'(\d)\n+(\d)', r'\1\2', text)
-
+    ("숫자_개행_복원", r'(\d)\n+(\d)', r'\1\2'),
     # (2) 3줄 이상 연속 개행 → 2줄로 축소 (문단 구분)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-
+    ("개행_축소", r'\n{3,}', '\n\n'),
     # (3) 문단이 아닌 단순 줄바꿈(한 줄짜리 개행)은 공백으로 변경
     #     즉, "\n\n"은 그대로 두고, 그 밖의 단일 "\n"만 공백으로 치환
-    text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)
-
+    ("단일_개행", r'(?<!\n)\n(?!\n)', ' '),
     # (4) 다시 한 번 3줄 이상 개행 정리
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    ("개행_축소_2", r'\n{3,}', '\n\n'),
+    # (5) 탭/여러 공백 → 한 칸 (이미 한 칸인 공백은 건드리지 않음)
+    ("공백_축소", r'[ \t]{2,}|\t', ' '),
+]
+
+_COMPILED_BASIC_RULES = [(name, re.compile(pattern), repl) for name, pattern, repl in BASIC_RULES]
+
+# 규칙별 적용 횟수 (clean_basic / iter_clean_basic 호출마다 누적, 제어 문자 제거 포함)
+BASIC_RULE_HITS = Counter()
+
+def _clean_whitespace(text: str) -> str:
+    """clean_basic의 개행/공백 정리 단계 (앞뒤 strip 제외, 규칙은 BASIC_RULES 참고)"""
+    for name, pattern, repl in _COMPILED_BASIC_RULES:
+        text, n = pattern.subn(repl, text)
+        if n:
+            BASIC_RULE_HITS[name] += n
+    return text
+
+def _find_safe_cut(text: str) -> int:
+    """
+    공백이 아닌 두 글자 사이의 마지막 위치를 찾습니다. (없으면 0)
+    clean_basic의 모든 규칙은 공백/개행 덩어리와 그 양옆 한 글자만 보므로
+    이 위치에서 잘라 따로 정리해도 전체를 한 번에 정리한 결과와 같습니다.
+    """
+    i = len(text) - 1
+    while i > 0:
+        if text[i] not in " \t\n" and text[i - 1] not in " \t\n":
+            return i
+        i -= 1
+    return 0
+
+def iter_clean_basic(pages):
+    """
+    페이지 단위 스트리밍 버전의 clean_basic입니다.
+    페이지 경계에서 잘린 한글 단어나 "제N조" 헤더는 작은 carry 버퍼로 넘겨
+    다음 페이지와 다시 이어 붙이므로, 생성된 조각을 모두 이으면
+    clean_basic("\n".join(pages))와 같습니다.
+    """
+    carry = ""
+    at_start = True
+    for i, page in enumerate(pages):
+        text = carry + ("\n" if i > 0 else "") + _normalize_raw(page)
+        cut = _find_safe_cut(text)
+        if cut == 0:
+            carry = text
+            continue
+        piece = _clean_whitespace(text[:cut])
+        carry = text[cut:]
+        if at_start:
+            piece = piece.lstrip()
+            at_start = False
+        yield piece
+
+    tail = _clean_whitespace(carry)
+    if at_start:
+        tail = tail.lstrip()
+    tail = tail.rstrip()
+    if tail:
+        yield tail
 
-    # (5) 탭/여러 공백 → 한 칸
-    text = re.sub(r'[ \t]+', ' ', text)
+# === 최종 청크 정리 규칙 ===
+# clean_chunk_text가 순서대로 적용하는 규칙 표입니다.
+# (이름, 정규식, 치환 문자열 또는 함수, 트리거)
+# - 트리거 문자열이 텍스트에 하나도 없으면 정규식을 돌리지 않습니다.
+# - 서로 겹치지 않는 규칙은 하나의 alternation으로 합쳤습니다.
+#   순서에 의존하는 규칙(예: "0분의 10" 복원 → "10100분의 10" 복원)은 따로 둡니다.
+CIRCLED = r'[①②③④⑤⑥⑦⑧⑨⑩]'
 
-    # (6) 앞뒤 공백/개행 정리
-    return text.strip()
+# "100분의 10", "100분의 100" 같은 정상 패턴은 분리 전에 표식으로 바꿔 두고 분리 후 복원
+# (보호 → 분리 → 복원을 별도 단계로 두어야 겹치는 입력에서도 원래 처리 순서와 결과가 같음)
+PROTECT_MARKERS = {"10": "__PROTECT_100분의10__", "100": "__PROTECT_100분의100__"}
+
+def _join_broken_lines(m):
+    # 한글 단어 / 숫자 중간 개행 복원
+    if m.group(1):
+        return m.group(1) + m.group(2)
+    return m.group(3) + m.group(4)
+
+_FRACTION_ONE = re.compile(r'(\d+분의\s*1)(\d+)')
+
+def _split_fraction(m):
+    full_match = m.group(0)
+    # 보호 표식이 포함되어 있으면 그대로 둠
+    if '__PROTECT_' in full_match:
+        return full_match
+    # "100분의 1"로 시작하는 경우는 제외
+    if full_match.startswith('100분의 1') or full_match.startswith('100분의1'):
+        return full_match
+    # 나머지는 분리 (예: "2분의 12." → "2분의 1\n\n2.")
+    return _FRACTION_ONE.sub(r'\1\n\n\2', full_match)
+
+CHUNK_RULES = [
+    # 한글 단어 / 숫자 중간 개행 복원 (추가 안전장치)
+    ("개행_복원", r'([가-힣])\n+([가-힣])|(\d)\n+(\d)', _join_broken_lines, ("\n",)),
+    # 이상한 특수문자 정리 (숫자 뒤의 ^, &, * 제거) 예: "3^" → "3"
+    ("숫자뒤_특수문자", r'(\d+)[\^&\*]', r'\1', ("^", "&", "*")),
+    # 잘못 분리된 단어 복원 예: "상속민법권" → "상속권", "상속민법" → "상속"
+    ("상속민법", r'상속민법(권?)', r'상속\1', ("상속민법",)),
+    # PDF 헤더/푸터 "민법" 제거
+    # 예: "2분의 1\n\n민법 3" → "2분의 1\n\n3", "된다.\n\n민법 ②" → "된다.\n\n②"
+    ("민법_헤더_개행", r'([가-힣\d])\n+민법\s+(' + CIRCLED + r'|\d)', r'\1\n\n\2', ("민법",)),
+    ("민법_헤더_공백", r'([가-힣\d])\s+민법\s+(' + CIRCLED + r'|\d)', r'\1 \2', ("민법",)),
+    ("민법_단독", r'\n+민법\s+(' + CIRCLED + r'|\d)', r'\n\n\1', ("민법",)),
+    # "0분의 10" → "100분의 10" (앞의 "1"이 빠진 경우)
+    ("분수_0분의10", r'0분의\s*10\b', '100분의 10', ("분의",)),
+    ("분수_0분의100", r'0분의\s*100\b', '100분의 100', ("분의",)),
+    # "10100분의 10" 같은 잘못된 패턴은 "100분의 10"으로 복원
+    ("분수_10100분의10", r'10100분의\s*10\b', '100분의 10', ("10100분의",)),
+    # "100분의 10", "100분의 100" 보호 (순서대로: 공백 있는 형태 → 붙은 형태)
+    ("분수_보호_10", r'100\s*분의\s*10\b', PROTECT_MARKERS["10"], ("분의",)),
+    ("분수_보호_100", r'100\s*분의\s*100\b', PROTECT_MARKERS["100"], ("분의",)),
+    ("분수_보호_10_붙음", r'100분의\s*10\b', PROTECT_MARKERS["10"], ("100분의",)),
+    ("분수_보호_100_붙음", r'100분의\s*100\b', PROTECT_MARKERS["100"], ("100분의",)),
+    # 잘못 붙은 숫자 분리 (예: "2분의 12." → "2분의 1\n\n2.")
+    ("분수_분리", r'\d+분의\s*1\d+', _split_fraction, ("분의",)),
+    # 보호한 패턴 복원
+    ("분수_복원_10", re.escape(PROTECT_MARKERS["10"]), '100분의 10', ("__PROTECT_",)),
+    ("분수_복원_100", re.escape(PROTECT_MARKERS["100"]), '100분의 100', ("__PROTECT_",)),
+    # "100분의 100"이 "100분의 1\n\n00"으로 잘못 분리된 경우 복원
+    ("분수_100분의100_복원", r'100분의\s*1\s+00', '100분의 100', ("100분의",)),
+    # "100분의 10"이 "100분의 1\n\n0"으로 잘못 분리된 경우 복원 (다음에 숫자가 아닌 문자가 오는 경우)
+    ("분수_100분의10_복원", r'100분의\s*1\s+0([^\d]|$)', r'100분의 10\1', ("100분의",)),
+    # (다음에 숫자가 오는 경우)
+    ("분수_100분의10_숫자", r'100분의\s*1\s+0(\d)', r'100분의 10\1', ("100분의",)),
+    # "100분의 201)" → "100분의 20\n\n1)"
+    ("분수_100분의20", r'100분의\s*20(\d+)', r'100분의 20\n\n\1', ("100분의",)),
+    # "및" 뒤 공백 추가 예: "및제" → "및 제"
+    ("및_공백", r'및([가-힣])', r'및 \1', ("및",)),
+    # 연속된 공백 정리 (3개 이상 → 2개)
+    ("연속_공백", r' {3,}', '  ', ("   ",)),
+]
+
+_COMPILED_CHUNK_RULES = [
+    (name, re.compile(pattern), repl, triggers)
+    for name, pattern, repl, triggers in CHUNK_RULES
+]
+
+# 규칙별 적용 횟수 (clean_chunk_text 호출마다 누적)
+CHUNK_RULE_HITS = Counter()
+
+def apply_chunk_rules(text: str) -> str:
+    """CHUNK_RULES를 순서대로 적용하고 규칙별 적용 횟수를 CHUNK_RULE_HITS에 누적합니다."""
+    for name, pattern, repl, triggers in _COMPILED_CHUNK_RULES:
+        if not any(t in text for t in triggers):
+            continue
+        text, n = pattern.subn(repl, text)
+        if n:
+            CHUNK_RULE_HITS[name] += n
+    return text
 
 # === 최종 청크 정리 ===
 def clean_chunk_text(text: str) -> str:
@@ -98,98 +281,14 @@ def clean_chunk_text(text: str) -> str:
     - 단어 중간 개행 복원 (추가)
     - 이상한 특수문자 정리
     - 연속된 공백 정리
+    규칙 목록은 CHUNK_RULES를 참고하세요.
     """
-    # 제어 문자 제거
-    text = remove_control_chars(text)
-    
-    # 한글 단어 중간 개행 복원 (추가 안전장치)
-    text = re.sub(r'([가-힣])\n+([가-힣])', r'\1\2', text)
-    text = re.sub(r'(\d)\n+(\d)', r'\1\2', text)
-    
-    # 이상한 특수문자 정리 (숫자 뒤의 ^, &, * 제거)
-    # 예: "3^" → "3", "3&" → "3", "3*" → "3"
-    text = re.sub(r'(\d+)[\^&\*]', r'\1', text)
-    
-    # 잘못 분리된 단어 복원
-    # 예: "상속민법권" → "상속권" (PDF에서 "상속\n\n민법권"으로 잘못 추출된 경우)
-    text = re.sub(r'상속민법권', '상속권', text)
-    text = re.sub(r'상속민법', '상속', text)  # 다른 패턴도 처리
-    
-    # PDF 헤더/푸터 제거 (숫자나 한글 다음에 "민법" 단어가 나오는 경우)
-    # 예: "2분의 1\n\n민법 3" → "2분의 1\n\n3"
-    # 예: "단독상속인이 된다.\n\n민법 ②" → "단독상속인이 된다.\n\n②"
-    text = re.sub(r'([가-힣\d])\n+민법\s+([①②③④⑤⑥⑦⑧⑨⑩]|\d)', r'\1\n\n\2', text)
-    text = re.sub(r'([가-힣\d])\s+민법\s+([①②③④⑤⑥⑦⑧⑨⑩]|\d)', r'\1 \2', text)
-    # "민법" 단독으로 남아있는 경우도 제거
-    text = re.sub(r'\n+민법\s+([①②③④⑤⑥⑦⑧⑨⑩]|\d)', r'\n\n\1', text)
-    
-    # 잘못 붙은 숫자 분리 (예: "2분의 12." → "2분의 1\n\n2.")
-    # 패턴: "분의 1" 다음에 바로 숫자가 오는 경우
-    # 단, "100분의 10", "100분의 100" 같은 경우는 제외
-    
-    # 먼저 잘못된 패턴들을 복원
-    # "0분의 10" → "100분의 10" (앞의 "1"이 빠진 경우)
-    text = re.sub(r'0분의\s*10\b', '100분의 10', text)
-    text = re.sub(r'0분의\s*100\b', '100분의 100', text)
-    
-    # "10100분의 10" 같은 잘못된 패턴은 "100분의 10"으로 복원
-    text = re.sub(r'10100분의\s*10\b', '100분의 10', text)
-    
-    # 이제 "100분의 10", "100분의 100" 같은 정상 패턴을 보호
-    text = re.sub(r'100\s*분의\s*10\b', '__PROTECT_100분의10__', text)
-    text = re.sub(r'100\s*분의\s*100\b', '__PROTECT_100분의100__', text)
-    text = re.sub(r'100분의\s*10\b', '__PROTECT_100분의10__', text)
-    text = re.sub(r'100분의\s*100\b', '__PROTECT_100분의100__', text)
-    
-    # 이제 나머지 "분의 1" 다음 숫자 분리
-    # 패턴: 숫자분의 1 + 숫자 (예: "2분의 12", "3분의 14")
-    # 단, "100분의 1"로 시작하는 것은 제외하고, 보호 마커가 있는 부분도 제외
-    # 검증 스크립트 패턴: r'\d분의\s*1\d+'
-    # 이 패턴에 맞는 모든 경우를 처리하되, "100분의 10", "100분의 100"은 이미 보호됨
-    
-    # "분의 1" 다음에 바로 숫자가 오는 모든 경우 분리
-    # 단, 보호 마커 내부는 제외
-    def split_fraction(match):
-        full_match = match.group(0)
-        # 보호 마커가 포함되어 있으면 그대로 반환
-        if '__PROTECT_' in full_match:
-            return full_match
-        # "100분의 1"로 시작하는 경우는 제외 (이미 보호됨)
-        if full_match.startswith('100분의 1') or full_match.startswith('100분의1'):
-            return full_match
-        # 나머지는 분리
-        return re.sub(r'(\d+분의\s*1)(\d+)', r'\1\n\n\2', full_match)
-    
-    # 모든 "분의 1" 다음 숫자 패턴 찾아서 처리
-    text = re.sub(r'\d+분의\s*1\d+', split_fraction, text)
-    
-    # 보호된 패턴 복원
-    text = text.replace('__PROTECT_100분의10__', '100분의 10')
-    text = text.replace('__PROTECT_100분의100__', '100분의 100')
-    
-    # "100분의 1\n\n0" 같은 잘못된 분리 복원
-    # "100분의 100"이 "100분의 1\n\n00"으로 잘못 분리된 경우
-    text = re.sub(r'100분의\s*1\n+\s*00', '100분의 100', text)
-    text = re.sub(r'100분의\s*1\s+00', '100분의 100', text)
-    # "100분의 10"이 "100분의 1\n\n0"으로 잘못 분리된 경우 (다음에 숫자나 문자가 오는 경우)
-    text = re.sub(r'100분의\s*1\n+\s*0([^\d]|$)', r'100분의 10\1', text)
-    text = re.sub(r'100분의\s*1\s+0([^\d]|$)', r'100분의 10\1', text)
-    # "100분의 10"이 "100분의 1\n\n0"으로 잘못 분리된 경우 (다음에 숫자가 오는 경우도)
-    text = re.sub(r'100분의\s*1\n+\s*0(\d)', r'100분의 10\1', text)
-    text = re.sub(r'100분의\s*1\s+0(\d)', r'100분의 10\1', text)
-    
-    # "100분의 201)" → "100분의 20\n\n1)" (100분의 20 다음에 1)이 오는 경우)
-    text = re.sub(r'100분의\s*20(\d+)', r'100분의 20\n\n\1', text)
-    
-    # "및" 뒤 공백 추가
-    # 예: "및제" → "및 제", "및증" → "및 증"
-    text = re.sub(r'및([가-힣])', r'및 \1', text)
-    
-    # 연속된 공백 정리 (3개 이상 → 2개)
-    text = re.sub(r' {3,}', '  ', text)
-    
-    # 앞뒤 공백 정리
-    return text.strip()
+    with profile_stage("clean_chunk_text"):
+        # 제어 문자 제거
+        text = remove_control_chars(text)
+        text = apply_chunk_rules(text)
+        # 앞뒤 공백 정리
+        return text.strip()
 
 # === 법령 본문 전용 추가 클리닝 ===
 def clean_law_body(body: str, article_id: str) -> str:
@@ -202,16 +301,106 @@ def clean_law_body(body: str, article_id: str) -> str:
     body = re.sub(r'법제처\s+\d+\s+국가법령정보센터', '', body)
 
     # 2) [시행일: ...] 뒤에 이번 조문 번호가 나오면서 절/관 제목 등이 붙는 패턴 제거
-    pattern_tail = (
-        r'(\[본조신설[^]]*]\s*)?'  # [본조신설 ...] (있을 수도 있고, 없을 수도 있고)
-        r'(\[시행일:[^]]*])'       # [시행일: ...]
-        r'\s*' + re.escape(article_id) + r'.*$'  # 그 뒤에 같은 조문번호 + 나머지 꼬리
-    )
-    body = re.sub(pattern_tail, r'\1\2', body).strip()
+    #    (조문마다 정규식이 달라지므로 [시행일: 이 있을 때만 컴파일)
+    if '[시행일:' in body:
+        pattern_tail = (
+            r'(\[본조신설[^]]*]\s*)?'  # [본조신설 ...] (있을 수도 있고, 없을 수도 있고)
+            r'(\[시행일:[^]]*])'       # [시행일: ...]
+            r'\s*' + re.escape(article_id) + r'.*$'  # 그 뒤에 같은 조문번호 + 나머지 꼬리
+        )
+        body = re.sub(pattern_tail, r'\1\2', body)
+
+    return body.strip()
 
-    return body
+# === 문장 분할 ===
+SENTENCE_END = re.compile(r'([.!?。]\s+|\.\s+)')
+# 문장 분할에서 보호할 구간: 태그(예: "<개정 ...>", "[본조신설 ...]")와 날짜(예: "2017. 12. 19.")
+PROTECTED_TAG = re.compile(r'<[^>]+>|\[[^\]]+\]')
+PROTECTED_DATE = re.compile(r'\d{4}\.\s*\d{1,2}\.\s*\d{1,2}\.')
+
+def _mask(match) -> str:
+    return '_' * len(match.group(0))
+
+def split_sentences(text: str, protect: bool = False) -> list:
+    """
+    마침표 등 문장 끝 기호 기준으로 문장을 나눕니다. (구분자는 앞 문장에 붙이고 앞뒤 공백 제거)
+    re.split(SENTENCE_END, text)를 두 개씩 묶은 것과 같으며, 마지막 빈 문장도 그대로 둡니다.
+
+    Args:
+        protect: True면 태그와 날짜 안의 마침표에서는 나누지 않음.
+            보호 구간을 같은 길이의 "_"로 가린 사본에서 구분자 위치만 찾고
+            원문을 그 위치로 잘라내므로 텍스트 길이에 선형입니다.
+    """
+    scan = text
+    if protect:
+        scan = PROTECTED_TAG.sub(_mask, scan)
+        scan = PROTECTED_DATE.sub(_mask, scan)
+    sentences = []
+    start = 0
+    for m in SENTENCE_END.finditer(scan):
+        sentences.append(text[start:m.end()].strip())
+        start = m.end()
+    sentences.append(text[start:].strip())
+    return sentences
+
+def _pack_sentences(sentences: list, limit: int = 500):
+    """문장들을 limit 이하로 이어 붙인 덩어리를 차례로 생성합니다. (오버랩 없음)"""
+    temp_buf = ""
+    for sent in sentences:
+        if len(temp_buf) + len(sent) + 1 <= limit:
+            temp_buf = (temp_buf + " " + sent).strip() if temp_buf else sent
+        else:
+            if temp_buf:
+                yield temp_buf
+            temp_buf = sent
+    if temp_buf:
+        yield temp_buf
 
 # === 법령형(제000조) 청킹 ===
+LAW_FOOTER_PATTERN = r'법제처\s+\d+\s+국가법령정보센터'
+ARTICLE_HEADER_PATTERN = r'(제\d+조(?:의\d+)?\s*\([^\)]*\))'
+
+def _law_record(record_id: str, article_id: str, article_title: str, text: str,
+                source_file: str, category: str, sub_chunk: int = None) -> dict:
+    """law 모드 레코드 - 필수 필드 + 선택적 필드 (값이 있을 때만 포함)"""
+    clean_title = remove_control_chars(article_title).strip()
+    record = {
+        "id": record_id,
+        "title": f"{clean_title} {article_id}" if article_title else article_id,
+        "text": text,
+        "source": source_file,
+        "category": category
+    }
+    
+    # 선택적 필드는 값이 있을 때만 추가
+    if article_id:
+        record["article_id"] = article_id
+    if article_title:
+        record["article_title"] = clean_title
+    if sub_chunk:
+        record["sub_chunk"] = sub_chunk
+    return record
+
+def _iter_law_parts(pieces):
+    """
+    텍스트 조각들을 이어 가며 re.split(ARTICLE_HEADER_PATTERN, ...) 결과를 차례로 생성합니다.
+    헤더는 첫 ")"에서 끝나므로 버퍼 안에서 찾은 마지막 헤더 앞까지는 확정된 것으로 보고
+    내보내고, 마지막 헤더부터는 다음 조각이 올 때까지 버퍼에 남겨 둡니다.
+    """
+    buf = ""
+    for piece in pieces:
+        # 국가법령정보센터 푸터 제거 (완성된 푸터만 매칭되므로 조각 단위로 해도 같음)
+        buf = re.sub(LAW_FOOTER_PATTERN, '', buf + piece)
+        last = None
+        for last in re.finditer(ARTICLE_HEADER_PATTERN, buf):
+            pass
+        if last is None or last.start() == 0:
+            continue
+        yield from re.split(ARTICLE_HEADER_PATTERN, buf[:last.start()])
+        buf = buf[last.start():]
+    if buf:
+        yield from re.split(ARTICLE_HEADER_PATTERN, buf)
+
 def chunk_law(text: str, source_file: str, category: str, id_prefix: str, max_chunk_size: int = 1200, overlap: int = 100):
     """
     법령 문서를 "제000조" 형식 기준으로 청킹합니다.
@@ -220,17 +409,57 @@ def chunk_law(text: str, source_file: str, category: str, id_prefix: str, max_ch
     Args:
         max_chunk_size: 조문이 이 길이를 초과하면 추가 분할 (기본 1500자)
     """
-    # 국가법령정보센터 푸터 제거
-    text = re.sub(r'법제처\s+\d+\s+국가법령정보센터', '', text)
+    return list(iter_law_chunks([text], source_file, category, id_prefix, max_chunk_size, overlap))
 
-    # "제000조(조문제목)" 형식 기준 분리
-    pattern = r'(제\d+조(?:의\d+)?\s*\([^\)]*\))'
-    parts = re.split(pattern, text)
+def iter_law_chunks(pieces, source_file: str, category: str, id_prefix: str, max_chunk_size: int = 1200, overlap: int = 100):
+    """
+    chunk_law의 스트리밍 버전입니다.
+    clean_basic을 거친 텍스트 조각(iter_clean_basic 출력 등)을 받아 조문이 끝날 때마다
+    청크 레코드를 생성합니다.
+    """
+    emitted = 0
+
+    for article_id, article_title, body in _iter_law_articles(pieces):
+        def record(text, sub_chunk=None):
+            nonlocal emitted
+            emitted += 1
+            return _law_record(f"{id_prefix}_{emitted:04d}", article_id, article_title,
+                               text, source_file, category, sub_chunk)
+
+        # 조문이 너무 길면 추가 분할
+        # 단, 각주/부칙이 긴 경우도 고려하여 더 작게 분할
+        # 500자 이상이면 무조건 분할
+        if len(body) <= 500:
+            cleaned_text = clean_chunk_text(body)
+            # 너무 짧은 청크는 제외 (20자 미만)
+            if len(cleaned_text) >= 20:
+                yield record(cleaned_text)
+            continue
 
-    chunks = []
+        sub_chunks = _split_law_body(body, overlap)
+
+        # 분할된 청크들을 추가
+        for i, sub_body in enumerate(sub_chunks):
+            sub_chunk = i + 1 if len(sub_chunks) > 1 else None
+            cleaned_text = clean_chunk_text(sub_body)
+            # 500자 초과면 문장 단위로 다시 분할
+            if len(cleaned_text) > 500:
+                pieces = _pack_sentences(split_sentences(cleaned_text))
+            else:
+                pieces = [cleaned_text]
+            for piece in pieces:
+                # 너무 짧은 청크는 제외 (20자 미만)
+                if len(piece) >= 20:
+                    yield record(piece, sub_chunk)
+
+def _iter_law_articles(pieces):
+    """
+    텍스트 조각들에서 조문을 차례로 찾아 (article_id, article_title, body)를 생성합니다.
+    body는 clean_law_body와 긴 각주 분리를 거친 조문 본문입니다.
+    """
     current_title = None
 
-    for part in parts:
+    for part in _iter_law_parts(pieces):
         if not part.strip():
             continue
 
@@ -272,244 +501,70 @@ def chunk_law(text: str, source_file: str, category: str, id_prefix: str, max_ch
                 else:
                     # 본문이 너무 짧으면 각주 포함
                     body = body.strip()
+
+            yield article_id, article_title, body
+
+def _split_law_body(body: str, overlap: int) -> list:
+    """
+    500자를 넘는 조문 본문을 문단 → 문장 → 쉼표/연결어 순으로 나눠 500자 이하 덩어리로 만듭니다.
+    """
+    # 문단 단위로 분할 (2줄 이상 연속 개행 기준)
+    paragraphs = [p.strip() for p in body.split("\n\n") if p.strip()]
+    
+    sub_chunks = []
+    buf = ""
+    
+    for para in paragraphs:
+        # 문단 자체가 너무 길면 문장 단위로도 분할
+        # 500자 이상이면 무조건 분할
+        if len(para) > 500:
+            # 먼저 현재 버퍼 저장
+            if buf:
+                sub_chunks.append(buf)
+                # 오버랩을 위해 버퍼의 뒷부분을 남김
+                buf = buf[-overlap:] if overlap > 0 else ""
             
-            # 조문이 너무 길면 추가 분할
-            # 단, 각주/부칙이 긴 경우도 고려하여 더 작게 분할
-            # 500자 이상이면 무조건 분할
-            if len(body) > 500:
-                # 문단 단위로 분할 (2줄 이상 연속 개행 기준)
-                paragraphs = [p.strip() for p in body.split("\n\n") if p.strip()]
-                
-                sub_chunks = []
-                buf = ""
-                
-                for para in paragraphs:
-                    # 문단 자체가 너무 길면 문장 단위로도 분할
-                    # 500자 이상이면 무조건 분할
-                    if len(para) > 500:
-                        # 먼저 현재 버퍼 저장
-                        if buf:
-                            sub_chunks.append(buf)
-                            # 오버랩을 위해 버퍼의 뒷부분을 남김
-                            buf = buf[-overlap:] if overlap > 0 else ""
-                        
-                        # 문장 단위로 분할 (한글 마침표, 숫자 마침표 등)
-                        # 단, 날짜 형식(예: "2017. 12. 19.")이나 태그(예: "<개정 ...>")는 보호
-                        
-                        # 먼저 보호할 패턴을 임시 마커로 치환 (역순으로 처리하여 인덱스 문제 방지)
-                        protected = {}
-                        counter = 0
-                        
-                        # 태그 패턴 보호 (예: "<개정 ...>" 또는 "[본조신설 ...]")
-                        tag_pattern = r'<[^>]+>|\[[^\]]+\]'
-                        tag_matches = list(re.finditer(tag_pattern, para))
-                        for match in reversed(tag_matches):  # 역순으로 처리
-                            marker = f"__TAG_{counter}__"
-                            protected[marker] = match.group(0)
-                            para = para[:match.start()] + marker + para[match.end():]
-                            counter += 1
-                        
-                        # 날짜 패턴 보호 (예: "2017. 12. 19." 또는 "2020. 12. 22.")
-                        # 태그 보호 후에 처리
-                        date_pattern = r'\d{4}\.\s*\d{1,2}\.\s*\d{1,2}\.'
-                        date_matches = list(re.finditer(date_pattern, para))
-                        for match in reversed(date_matches):  # 역순으로 처리
-                            marker = f"__DATE_{counter}__"
-                            protected[marker] = match.group(0)
-                            para = para[:match.start()] + marker + para[match.end():]
-                            counter += 1
-                        
-                        # 이제 문장 단위로 분할
-                        sentences = re.split(r'([.!?。]\s+|\.\s+)', para)
-                        sentence_parts = []
-                        for i in range(0, len(sentences), 2):
-                            if i < len(sentences):
-                                sentence = sentences[i] + (sentences[i+1] if i+1 < len(sentences) else "")
-                                sentence_parts.append(sentence.strip())
-                        
-                        # 보호된 패턴 복원 (전체 문장 리스트에 대해)
-                        for j, sent in enumerate(sentence_parts):
-                            for marker, original in protected.items():
-                                sent = sent.replace(marker, original)
-                            sentence_parts[j] = sent
-                        
-                        # 문장들을 합치면서 청크 생성 (최대 500자)
-                        # 단일 문장이 500자 초과면 더 세밀하게 분할
-                        for sent in sentence_parts:
-                            # 단일 문장이 500자 초과면 쉼표나 연결어 기준으로 분할
-                            if len(sent) > 500:
-                                # 쉼표, 그리고, 또는 등으로 분할
-                                parts = re.split(r'([,，]\s+|그리고|또는|및)', sent)
-                                for part in parts:
-                                    if part.strip():
-                                        if len(buf) + len(part) + 1 <= 500:
-                                            buf = (buf + " " + part).strip() if buf else part
-                                        else:
-                                            if buf:
-                                                sub_chunks.append(buf)
-                                            buf = part # 오버랩 적용 안함 (너무 짧은 단위라 복잡도 증가 우려)
-                            elif len(buf) + len(sent) + 1 <= 500:
-                                buf = (buf + " " + sent).strip() if buf else sent
+            # 문장 단위로 분할 (한글 마침표, 숫자 마침표 등)
+            # 단, 날짜 형식(예: "2017. 12. 19.")이나 태그(예: "<개정 ...>")는 보호
+            # 문장들을 합치면서 청크 생성 (최대 500자)
+            # 단일 문장이 500자 초과면 더 세밀하게 분할
+            for sent in split_sentences(para, protect=True):
+                # 단일 문장이 500자 초과면 쉼표나 연결어 기준으로 분할
+                if len(sent) > 500:
+                    # 쉼표, 그리고, 또는 등으로 분할
+                    parts = re.split(r'([,，]\s+|그리고|또는|및)', sent)
+                    for part in parts:
+                        if part.strip():
+                            if len(buf) + len(part) + 1 <= 500:
+                                buf = (buf + " " + part).strip() if buf else part
                             else:
                                 if buf:
                                     sub_chunks.append(buf)
-                                    # 오버랩 적용
-                                    buf = (buf[-overlap:] + " " + sent).strip() if overlap > 0 else sent
-                                else:
-                                    buf = sent
-                    elif len(buf) + len(para) + 2 <= 500:
-                        buf = (buf + "\n\n" + para).strip() if buf else para
-                    else:
-                        # 버퍼가 있으면 저장하고 새로 시작
-                        if buf:
-                            sub_chunks.append(buf)
-                            # 오버랩 적용
-                            buf = buf[-overlap:] if overlap > 0 else ""
-                        # 문단 자체가 500자 초과면 문장 단위로 분할
-                        if len(para) > 500:
-                            sentences = re.split(r'([.!?。]\s+|\.\s+)', para)
-                            sentence_parts = []
-                            for i in range(0, len(sentences), 2):
-                                if i < len(sentences):
-                                    sentence = sentences[i] + (sentences[i+1] if i+1 < len(sentences) else "")
-                                    sentence_parts.append(sentence.strip())
-                            
-                            for sent in sentence_parts:
-                                if len(sent) > 500:
-                                    parts = re.split(r'([,，]\s+|그리고|또는|및)', sent)
-                                    for part in parts:
-                                        if part.strip():
-                                            if len(part) > 500:
-                                                sub_chunks.append(part[:500])
-                                                if len(part) > 500:
-                                                    sub_chunks.append(part[500:])
-                                            else:
-                                                sub_chunks.append(part)
-                                else:
-                                    sub_chunks.append(sent)
-                        else:
-                            buf = para
-                
-                if buf:
-                    # 버퍼가 500자 초과면 분할
-                    if len(buf) > 500:
-                        # 문장 단위로 분할
-                        sentences = re.split(r'([.!?。]\s+|\.\s+)', buf)
-                        sentence_parts = []
-                        for i in range(0, len(sentences), 2):
-                            if i < len(sentences):
-                                sentence = sentences[i] + (sentences[i+1] if i+1 < len(sentences) else "")
-                                sentence_parts.append(sentence.strip())
-                        
-                        temp_buf = ""
-                        for sent in sentence_parts:
-                            if len(temp_buf) + len(sent) + 1 <= 500:
-                                temp_buf = (temp_buf + " " + sent).strip() if temp_buf else sent
-                            else:
-                                if temp_buf:
-                                    sub_chunks.append(temp_buf)
-                                temp_buf = sent
-                        if temp_buf:
-                            sub_chunks.append(temp_buf)
-                    else:
+                                buf = part # 오버랩 적용 안함 (너무 짧은 단위라 복잡도 증가 우려)
+                elif len(buf) + len(sent) + 1 <= 500:
+                    buf = (buf + " " + sent).strip() if buf else sent
+                else:
+                    if buf:
                         sub_chunks.append(buf)
-                
-                # 분할된 청크들을 추가
-                for i, sub_body in enumerate(sub_chunks):
-                    cleaned_text = clean_chunk_text(sub_body)
-                    # 너무 짧은 청크는 제외 (20자 미만)
-                    # 500자 초과면 다시 분할
-                    if len(cleaned_text) > 500:
-                        # 문장 단위로 다시 분할
-                        sentences = re.split(r'([.!?。]\s+|\.\s+)', cleaned_text)
-                        sentence_parts = []
-                        for j in range(0, len(sentences), 2):
-                            if j < len(sentences):
-                                sentence = sentences[j] + (sentences[j+1] if j+1 < len(sentences) else "")
-                                sentence_parts.append(sentence.strip())
-                        
-                        temp_buf = ""
-                        for sent in sentence_parts:
-                            if len(temp_buf) + len(sent) + 1 <= 500:
-                                temp_buf = (temp_buf + " " + sent).strip() if temp_buf else sent
-                            else:
-                                if temp_buf and len(temp_buf) >= 20:
-                                    # 기존 청크 추가 로직
-                                    chunk_num = len(chunks) + 1
-                                    chunk_record = {
-                                        "id": f"{id_prefix}_{chunk_num:04d}",
-                                        "title": f"{remove_control_chars(article_title).strip()} {article_id}" if article_title else article_id,
-                                        "text": temp_buf,
-                                        "source": source_file,
-                                        "category": category
-                                    }
-                                    if article_id:
-                                        chunk_record["article_id"] = article_id
-                                    if article_title:
-                                        chunk_record["article_title"] = remove_control_chars(article_title).strip()
-                                    if len(sub_chunks) > 1:
-                                        chunk_record["sub_chunk"] = i + 1
-                                    chunks.append(chunk_record)
-                                temp_buf = sent
-                        if temp_buf and len(temp_buf) >= 20:
-                            chunk_num = len(chunks) + 1
-                            chunk_record = {
-                                "id": f"{id_prefix}_{chunk_num:04d}",
-                                "title": f"{remove_control_chars(article_title).strip()} {article_id}" if article_title else article_id,
-                                "text": temp_buf,
-                                "source": source_file,
-                                "category": category
-                            }
-                            if article_id:
-                                chunk_record["article_id"] = article_id
-                            if article_title:
-                                chunk_record["article_title"] = remove_control_chars(article_title).strip()
-                            if len(sub_chunks) > 1:
-                                chunk_record["sub_chunk"] = i + 1
-                            chunks.append(chunk_record)
-                    elif len(cleaned_text) >= 20:
-                        # law 모드 - 필수 필드 + 선택적 필드 (값이 있을 때만 포함)
-                        chunk_num = len(chunks) + 1
-                        chunk_record = {
-                            "id": f"{id_prefix}_{chunk_num:04d}",
-                            "title": f"{remove_control_chars(article_title).strip()} {article_id}" if article_title else article_id,
-                            "text": cleaned_text,
-                            "source": source_file,
-                            "category": category
-                        }
-                        
-                        # 선택적 필드는 값이 있을 때만 추가
-                        if article_id:
-                            chunk_record["article_id"] = article_id
-                        if article_title:
-                            chunk_record["article_title"] = remove_control_chars(article_title).strip()
-                        if len(sub_chunks) > 1:
-                            chunk_record["sub_chunk"] = i + 1
-                        
-                        chunks.append(chunk_record)
-            else:
-                cleaned_text = clean_chunk_text(body)
-                # 너무 짧은 청크는 제외 (20자 미만)
-                if len(cleaned_text) >= 20:
-                    # law 모드 - 필수 필드 + 선택적 필드 (값이 있을 때만 포함)
-                    chunk_num = len(chunks) + 1
-                    chunk_record = {
-                        "id": f"{id_prefix}_{chunk_num:04d}",
-                        "title": f"{remove_control_chars(article_title).strip()} {article_id}" if article_title else article_id,
-                        "text": cleaned_text,
-                        "source": source_file,
-                        "category": category
-                    }
-                    
-                    # 선택적 필드는 값이 있을 때만 추가
-                    if article_id:
-                        chunk_record["article_id"] = article_id
-                    if article_title:
-                        chunk_record["article_title"] = remove_control_chars(article_title).strip()
-                    
-                    chunks.append(chunk_record)
-
-    return chunks
+                        # 오버랩 적용
+                        buf = (buf[-overlap:] + " " + sent).strip() if overlap > 0 else sent
+                    else:
+                        buf = sent
+        elif len(buf) + len(para) + 2 <= 500:
+            buf = (buf + "\n\n" + para).strip() if buf else para
+        else:
+            # 버퍼가 있으면 저장하고 새로 시작 (500자 이하 문단이므로 오버랩 없이 시작)
+            if buf:
+                sub_chunks.append(buf)
+            buf = para
+    
+    if buf:
+        # 버퍼가 500자 초과면 문장 단위로 분할
+        if len(buf) > 500:
+            sub_chunks.extend(_pack_sentences(split_sentences(buf)))
+        else:
+            sub_chunks.append(buf)
+    return sub_chunks
 
 # === 심플 문단+길이 청킹 ===
 def chunk_simple(text: str, source_file: str, category: str, id_prefix: str, overlap: int = 100):
@@ -518,15 +573,55 @@ def chunk_simple(text: str, source_file: str, category: str, id_prefix: str, ove
     - 최소 길이: 300자
     - 최대 길이: 900자
     """
-    # 문단 기준 분리
-    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+    return list(iter_simple_chunks([text], source_file, category, id_prefix, overlap))
+
+def _iter_paragraphs(pieces):
+    """텍스트 조각들을 이어 가며 "\n\n" 기준 문단을 차례로 생성합니다."""
+    buf = ""
+    for piece in pieces:
+        parts = (buf + piece).split("\n\n")
+        buf = parts.pop()
+        for p in parts:
+            if p.strip():
+                yield p.strip()
+    if buf.strip():
+        yield buf.strip()
 
-    chunks = []
+def _simple_record(record_id: str, text: str, source_file: str, category: str) -> dict:
+    """simple 모드 레코드 (기본 필드만 포함)"""
+    # 제목 생성 (제어 문자 제거)
+    title = text[:50].replace("\n", " ").replace("\t", " ")
+    return {
+        "id": record_id,
+        "title": remove_control_chars(title).strip(),
+        "text": text,
+        "source": source_file,
+        "category": category
+    }
+
+def iter_simple_chunks(pieces, source_file: str, category: str, id_prefix: str, overlap: int = 100):
+    """
+    chunk_simple의 스트리밍 버전입니다.
+    문단이 들어오는 대로 청크를 만들고 레코드를 바로 생성합니다.
+    """
+    chunks = []  # 아직 레코드로 내보내지 않은 청크
+    chunk_index = 0
     buf = ""
     min_len = 300
     max_len = 500  # law 모드와 일관성 유지
 
-    for p in paragraphs:
+    def flush():
+        nonlocal chunk_index
+        for c in chunks:
+            # 번호는 20자 미만으로 제외되는 청크도 포함하여 매김
+            chunk_index += 1
+            cleaned_text = clean_chunk_text(c)
+            # 너무 짧은 청크는 제외 (20자 미만)
+            if len(cleaned_text) >= 20:
+                yield _simple_record(f"{id_prefix}_{chunk_index:04d}", cleaned_text, source_file, category)
+        chunks.clear()
+
+    for p in _iter_paragraphs(pieces):
         # 문단 자체가 너무 길면 문장 단위로 분할
         if len(p) > max_len:
             # 먼저 현재 버퍼 저장
@@ -539,17 +634,10 @@ def chunk_simple(text: str, source_file: str, category: str, id_prefix: str, ove
             else:
                  buf = ""
             
-            # 문장 단위로 분할
-            sentences = re.split(r'([.!?。]\s+|\.\s+)', p)
-            sentence_parts = []
-            for i in range(0, len(sentences), 2):
-                if i < len(sentences):
-                    sentence = sentences[i] + (sentences[i+1] if i+1 < len(sentences) else "")
-                    sentence_parts.append(sentence.strip())
-            
+            # 문장 단위로 분할 (law 모드와 같은 분할기, 보호 없이 기존 re.split과 같은 위치에서 나눔)
             # 문장들을 합치면서 청크 생성 (최대 500자)
             # 단일 문장이 500자 초과면 더 세밀하게 분할
-            for sent in sentence_parts:
+            for sent in split_sentences(p):
                 # 단일 문장이 500자 초과면 쉼표나 연결어 기준으로 분할
                 if len(sent) > 500:
                     # 쉼표, 그리고, 또는 등으로 분할
@@ -584,26 +672,116 @@ def chunk_simple(text: str, source_file: str, category: str, id_prefix: str, ove
             else:
                 buf = p
 
+        yield from flush()
+
     if buf and len(buf) >= min_len:
         chunks.append(buf)
+    yield from flush()
+
+# === 토큰 예산 청킹 ===
+# 글자 수 대신 토큰 수로 청크 크기를 맞추는 모드 (process_file의 token_budget 참고)
+DEFAULT_TOKEN_BUDGET = {
+    "tokenizer": "estimate",   # token_budget.get_tokenizer 이름
+    "max_tokens": 400,         # 청크 최대 토큰 수 (추정기 기준 약 500자)
+    "overlap_tokens": 40,      # 앞 청크 끝에서 다시 넣을 문장들의 토큰 수 상한
+}
 
-    records = []
-    for i, c in enumerate(chunks, start=1):
-        cleaned_text = clean_chunk_text(c)
-        # 너무 짧은 청크는 제외 (20자 미만)
+CLAUSE_SPLIT = re.compile(r'(?<=[,，])\s+')
+
+# 예산을 넘는 텍스트를 나누는 순서: 문장 → 쉼표 (그래도 넘으면 TokenCounter.split)
+_TOKEN_SPLITTERS = [
+    lambda text: split_sentences(text, protect=True),
+    CLAUSE_SPLIT.split,
+]
+
+def _fit_units(text: str, counter: TokenCounter, max_tokens: int, level: int = 0):
+    """text를 필요한 만큼만 잘게 나눠 max_tokens 이하 단위들을 생성합니다."""
+    if not text:
+        return
+    if counter.count(text) <= max_tokens:
+        yield text
+    elif level < len(_TOKEN_SPLITTERS):
+        for part in _TOKEN_SPLITTERS[level](text):
+            yield from _fit_units(part.strip(), counter, max_tokens, level + 1)
+    else:
+        yield from counter.split(text, max_tokens)
+
+def _token_units(text: str, counter: TokenCounter, max_tokens: int):
+    """문단별로 (단위 텍스트, 앞 단위와의 구분자)를 생성합니다."""
+    for para in text.split("\n\n"):
+        sep = "\n\n"
+        for unit in _fit_units(para.strip(), counter, max_tokens):
+            yield unit, sep
+            sep = " "
+
+def _pack_token_units(units, counter: TokenCounter, max_tokens: int, overlap_tokens: int):
+    """
+    단위들을 max_tokens 이하 청크로 합칩니다.
+    청크 토큰 수는 단위별 (캐시된) 토큰 수의 합으로 계산하고,
+    오버랩은 앞 청크 끝의 단위들을 overlap_tokens 이내로 다음 청크 앞에 다시 넣습니다.
+    """
+    buf = []  # (텍스트, 구분자, 토큰 수)
+    total = 0
+    for text, sep in units:
+        n = counter.count(text)
+        if buf and total + n > max_tokens:
+            yield buf[0][0] + "".join(s + t for t, s, _ in buf[1:])
+            keep, kept = [], 0
+            for unit in reversed(buf[1:]):
+                if kept + unit[2] > overlap_tokens or kept + unit[2] + n > max_tokens:
+                    break
+                keep.insert(0, unit)
+                kept += unit[2]
+            buf, total = keep, kept
+        buf.append((text, sep, n))
+        total += n
+    if buf:
+        yield buf[0][0] + "".join(s + t for t, s, _ in buf[1:])
+
+def _token_counter(token_budget: dict) -> TokenCounter:
+    return TokenCounter(get_tokenizer(token_budget.get("tokenizer", "estimate")))
+
+def iter_law_token_chunks(pieces, source_file: str, category: str, id_prefix: str,
+                          token_budget: dict = None, counter: TokenCounter = None):
+    """
+    iter_law_chunks의 토큰 예산 버전입니다.
+    조문 본문을 token_budget["max_tokens"] 이하 청크로 나누고 오버랩도 토큰 수로 맞춥니다.
+    """
+    budget = {**DEFAULT_TOKEN_BUDGET, **(token_budget or {})}
+    counter = counter or _token_counter(budget)
+    emitted = 0
+
+    for article_id, article_title, body in _iter_law_articles(pieces):
+        units = _token_units(body, counter, budget["max_tokens"])
+        sub_chunks = list(_pack_token_units(units, counter, budget["max_tokens"], budget["overlap_tokens"]))
+        for i, sub_body in enumerate(sub_chunks):
+            cleaned_text = clean_chunk_text(sub_body)
+            # 너무 짧은 청크는 제외 (20자 미만)
+            if len(cleaned_text) >= 20:
+                emitted += 1
+                yield _law_record(f"{id_prefix}_{emitted:04d}", article_id, article_title,
+                                  cleaned_text, source_file, category,
+                                  i + 1 if len(sub_chunks) > 1 else None)
+
+def iter_simple_token_chunks(pieces, source_file: str, category: str, id_prefix: str,
+                             token_budget: dict = None, counter: TokenCounter = None):
+    """
+    iter_simple_chunks의 토큰 예산 버전입니다.
+    문단 경계를 넘어 문장들을 token_budget["max_tokens"] 이하 청크로 합칩니다.
+    """
+    budget = {**DEFAULT_TOKEN_BUDGET, **(token_budget or {})}
+    counter = counter or _token_counter(budget)
+    units = (
+        unit
+        for para in _iter_paragraphs(pieces)
+        for unit in _token_units(para, counter, budget["max_tokens"])
+    )
+    chunks = _pack_token_units(units, counter, budget["max_tokens"], budget["overlap_tokens"])
+    for chunk_index, chunk in enumerate(chunks, 1):
+        cleaned_text = clean_chunk_text(chunk)
+        # 너무 짧은 청크는 제외 (20자 미만, 번호는 제외된 청크도 포함)
         if len(cleaned_text) >= 20:
-            # 제목 생성 (제어 문자 제거)
-            title = cleaned_text[:50].replace("\n", " ").replace("\t", " ")
-            
-            # simple 모드는 기본 필드만 포함
-            records.append({
-                "id": f"{id_prefix}_{i:04d}",
-                "title": remove_control_chars(title).strip(),
-                "text": cleaned_text,
-                "source": source_file,
-                "category": category
-            })
-    return records
+            yield _simple_record(f"{id_prefix}_{chunk_index:04d}", cleaned_text, source_file, category)
 
 # === 파일별 설정 ===
 files_config = [
@@ -651,92 +829,423 @@ files_config = [
     },
 ]
 
+# === JSONL 저장 ===
+def _fsync_dir(path: Path):
+    """rename 결과가 디스크에 남도록 디렉토리를 fsync합니다. (지원하지 않는 OS에서는 무시)"""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+@contextmanager
+def atomic_write(path: Path, buffer_size: int = 1 << 20):
+    """
+    같은 디렉토리의 임시 파일(.<이름>.tmp)에 쓰고 fsync한 뒤 path로 원자적으로 교체합니다.
+    쓰는 도중 실패하거나 프로세스가 죽어도 path에는 이전 파일이 그대로 남습니다.
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    f = open(tmp_path, "w", encoding="utf-8", buffering=buffer_size)
+    try:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+    except BaseException:
+        f.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    f.close()
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+def write_jsonl(path: Path, records) -> int:
+    """레코드를 생성되는 대로 JSONL로 저장하고 (atomic_write) 저장한 레코드 수를 반환합니다."""
+    count = 0
+    with atomic_write(path) as f:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def _titled_law_records(law_chunks):
+    """law 모드는 분할된 조문의 제목에 "(부분 N)"을 붙여 JSONL 레코드로 사용"""
+    for ch in law_chunks:
+        if ch.get("sub_chunk"):
+            ch["title"] += f" (부분 {ch['sub_chunk']})"
+        yield ch
+
+# === 파일 하나 처리 ===
+def iter_file_records(cfg: dict, pieces, token_budget: dict = None):
+    """
+    정리된 텍스트 조각(pieces)을 files_config 항목의 모드에 맞게 청킹하여 JSONL 레코드를 생성합니다.
+    (process_file과 build.py의 청킹 스테이지 공용)
+    """
+    if token_budget is not None:
+        chunker = iter_law_token_chunks if cfg["mode"] == "law" else iter_simple_token_chunks
+        records = chunker(
+            pieces,
+            source_file=cfg["raw_name"],
+            category=cfg["category"],
+            id_prefix=cfg["id_prefix"],
+            token_budget=token_budget,
+        )
+        if cfg["mode"] == "law":
+            records = _titled_law_records(records)
+        return records
+    if cfg["mode"] == "law":
+        return _titled_law_records(iter_law_chunks(
+            pieces,
+            source_file=cfg["raw_name"],
+            category=cfg["category"],
+            id_prefix=cfg["id_prefix"]
+        ))
+    return iter_simple_chunks(
+        pieces,
+        source_file=cfg["raw_name"],
+        category=cfg["category"],
+        id_prefix=cfg["id_prefix"],
+    )
+
+def process_file(cfg: dict, stream: bool = False, page_workers: int = 1, token_budget: dict = None) -> int:
+    """
+    files_config 항목 하나를 전처리하여 JSONL로 저장합니다.
+    전역 상태로는 규칙 적용 횟수(BASIC_RULE_HITS, CHUNK_RULE_HITS)만 누적합니다.
+    프로세스 풀에서 실행하면 그 카운터는 작업 프로세스의 것이므로, 횟수가 필요하면
+    profile_file처럼 실행 전후 차이를 반환값에 담아 부모 프로세스로 넘깁니다.
+
+    Args:
+        stream: True면 페이지 단위로 추출/정리/청킹하여 문서 전체 문자열을 만들지 않음
+        page_workers: 큰 PDF의 페이지 병렬 추출 프로세스 수 (iter_pdf_pages 참고)
+        token_budget: 주어지면 글자 수 대신 토큰 수로 청킹 (DEFAULT_TOKEN_BUDGET 참고)
+
+    Returns:
+        저장된 레코드 수
+    """
+    raw_path = BASE_DIR / cfg["raw_name"]
+    out_path = OUT_DIR / cfg["out_name"]
+
+    if not raw_path.exists():
+        raise FileNotFoundError(f"파일이 없음: {raw_path}")
+
+    # 1) PDF → 텍스트 (스테이지 이름은 --profile 보고서에 쓰임)
+    if stream:
+        pages = profiled_iter("extract", iter_pdf_pages(raw_path, page_workers))
+        pieces = profiled_iter("clean_basic", iter_clean_basic(pages))
+    else:
+        with profile_stage("extract"):
+            text = extract_text_from_pdf(raw_path, page_workers)
+        with profile_stage("clean_basic"):
+            pieces = [clean_basic(text)]
+
+    # 2) 모드별 청킹 (레코드는 만들어지는 대로 생성)
+    records = iter_file_records(cfg, pieces, token_budget)
+
+    # 3) JSONL 저장 (임시 파일에 스트리밍 후 원자적 교체)
+    with profile_stage("write"):
+        return write_jsonl(out_path, profiled_iter("chunk", records))
+
+def extract_and_clean(cfg: dict) -> str:
+    """files_config 항목 하나의 PDF 텍스트를 추출하고 clean_basic까지 적용합니다. (build.py의 프로세스 풀용)"""
+    raw_path = BASE_DIR / cfg["raw_name"]
+    if not raw_path.exists():
+        raise FileNotFoundError(f"파일이 없음: {raw_path}")
+    return clean_basic(extract_text_from_pdf(raw_path))
+
+def chunk_records(cfg: dict, text: str, token_budget: dict = None) -> list:
+    """extract_and_clean 결과를 청킹하여 레코드 목록을 반환합니다. (build.py의 프로세스 풀용)"""
+    return list(iter_file_records(cfg, [text], token_budget))
+
+def profile_file(cfg: dict, stream: bool = False, page_workers: int = 1, token_budget: dict = None) -> dict:
+    """
+    process_file을 프로파일러를 켠 상태로 실행하고 파일 하나의 프로파일 보고서를 반환합니다.
+    페이지 병렬 추출(page_workers > 1)의 자식 프로세스 CPU 시간/메모리는 포함되지 않습니다.
+
+    Returns:
+        {"records", "total", "stages", "rule_hits": {"clean_basic", "clean_chunk_text"}}
+    """
+    basic_hits, chunk_hits = BASIC_RULE_HITS.copy(), CHUNK_RULE_HITS.copy()
+    with profiling.enabled() as profiler:
+        count = process_file(cfg, stream, page_workers, token_budget)
+    return {
+        "records": count,
+        "total": profiler.total,
+        "stages": profiler.report(),
+        "rule_hits": {
+            "clean_basic": dict(BASIC_RULE_HITS - basic_hits),
+            "clean_chunk_text": dict(CHUNK_RULE_HITS - chunk_hits),
+        },
+    }
+
+def _build_file(cfg: dict, stream: bool, page_workers: int, token_budget: dict, profile: bool) -> tuple:
+    """(레코드 수, 프로파일 보고서 또는 None) - 순차/병렬 빌드 공용"""
+    if profile:
+        report = profile_file(cfg, stream, page_workers, token_budget)
+        return report["records"], report
+    return process_file(cfg, stream, page_workers, token_budget), None
+
+def _report_result(cfg: dict, count: int = None, error: Exception = None) -> int:
+    """파일 하나의 처리 결과를 출력하고 합계에 더할 레코드 수를 반환합니다."""
+    out_path = OUT_DIR / cfg["out_name"]
+    if error is not None:
+        if isinstance(error, FileNotFoundError):
+            print(f"  [ERROR] {error}")
+        else:
+            print(f"  [ERROR] 처리 실패: {error}")
+            traceback.print_exception(type(error), error, error.__traceback__)
+        return 0
+
+    print(f"  ✓ 레코드 수: {count}")
+    print(f"  ✓ 저장 완료: {out_path}")
+    return count
+
+# === 빌드 매니페스트 ===
+# 정리/청킹 코드가 들어 있는 파일들 (내용이 바뀌면 모든 항목을 다시 빌드)
+PIPELINE_SOURCES = [Path(__file__), BASE_DIR / "token_budget.py"]
+
+def file_sha256(path: Path) -> str:
+    """파일 내용의 sha256 해시를 반환합니다."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def pipeline_code_version() -> str:
+    """정리/청킹 코드의 버전 (PIPELINE_SOURCES 내용 해시)"""
+    h = hashlib.sha256()
+    for src in PIPELINE_SOURCES:
+        h.update(src.read_bytes())
+    return h.hexdigest()[:16]
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict:
+    """
+    processed/manifest.json을 읽습니다. 없거나 깨졌으면 빈 매니페스트를 반환합니다.
+
+    형식:
+        {"updated_at": ..., "entries": {out_name: {"pdf_sha256", "config", "code_version",
+                                                  "output_sha256", "records", "built_at",
+                                                  "changed"}}}
+    "changed"는 이 항목을 마지막으로 빌드했을 때 출력 내용이 실제로 바뀌었는지를 나타냅니다. (건너뛴 실행은 그대로 둠)
+    index_data.py --only-changed는 이 값 대신 output_sha256을 마지막으로 인덱싱한 해시와 비교합니다.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"entries": {}}
+    manifest.setdefault("entries", {})
+    return manifest
+
+def save_manifest(manifest: dict, path: Path = MANIFEST_PATH):
+    """매니페스트를 저장합니다. (atomic_write)"""
+    manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    with atomic_write(path) as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+def manifest_inputs(cfg: dict, code_version: str, token_budget: dict = None) -> dict:
+    """매니페스트 항목의 입력 부분 (PDF 해시, 설정, 코드 버전, 토큰 예산)"""
+    return {
+        "pdf_sha256": file_sha256(BASE_DIR / cfg["raw_name"]),
+        "config": cfg,
+        "code_version": code_version,
+        "token_budget": token_budget,
+    }
+
+def manifest_entry(inputs: dict, out_path: Path, count: int, previous: dict = None) -> dict:
+    """빌드가 끝난 출력 파일의 매니페스트 항목"""
+    output_sha256 = file_sha256(out_path)
+    return {
+        **inputs,
+        "output_sha256": output_sha256,
+        "records": count,
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "changed": output_sha256 != (previous or {}).get("output_sha256"),
+    }
+
+def _is_up_to_date(entry: dict, inputs: dict, out_path: Path) -> bool:
+    """입력(PDF 해시, 설정, 코드 버전)이 모두 같고 출력 파일도 그대로인지 확인합니다."""
+    if not entry or not out_path.exists():
+        return False
+    if any(entry.get(key) != value for key, value in inputs.items()):
+        return False
+    return entry.get("output_sha256") == file_sha256(out_path)
+
+# === 프로파일 보고서 ===
+def save_profile_report(file_reports: dict, path: Path = PROFILE_PATH, **options):
+    """
+    파일별 프로파일 보고서를 JSON으로 저장하고 콘솔에 요약 표를 출력합니다.
+    규칙 적용 횟수는 파일별 값과 전체 합계를 함께 기록합니다.
+    """
+    rule_totals = {"clean_basic": Counter(), "clean_chunk_text": Counter()}
+    for report in file_reports.values():
+        for group, hits in report["rule_hits"].items():
+            rule_totals[group].update(hits)
+    data = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "code_version": pipeline_code_version(),
+        "options": options,
+        "files": file_reports,
+        "rule_hits": {group: dict(hits.most_common()) for group, hits in rule_totals.items()},
+    }
+    with atomic_write(path) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+    print("\n" + "="*50)
+    print("=== 프로파일 (스테이지 시간은 안쪽 스테이지를 뺀 자기 시간) ===")
+    print(profiling.format_table(file_reports))
+    top_rules = (rule_totals["clean_basic"] + rule_totals["clean_chunk_text"]).most_common(5)
+    print("규칙 적용 상위: " + ", ".join(f"{name} {n}" for name, n in top_rules))
+    print(f"보고서 저장: {path}")
+
 # === 메인 루프: 6개 PDF 자동 전처리 ===
-def main():
+def main(workers: int = 1, stream: bool = False, force: bool = False, page_workers: int = None,
+         token_budget: dict = None, profile: Path = None):
+    """
+    files_config의 모든 PDF를 전처리합니다.
+    manifest.json에 기록된 입력과 같은 항목은 건너뜁니다.
+
+    Args:
+        workers: 1보다 크면 파일 단위로 프로세스 풀에서 병렬 처리
+        stream: 페이지 스트리밍 모드 사용 여부 (process_file 참고)
+        force: True면 매니페스트와 관계없이 모두 다시 빌드
+        page_workers: 큰 PDF 하나의 페이지를 나눠 추출할 프로세스 수.
+            None이면 순차 처리일 때 CPU 수, 파일 단위 병렬 처리일 때 1 (프로세스 풀 중첩 방지)
+        token_budget: 토큰 예산 청킹 설정 (None이면 기존 글자 수 기준 청킹)
+        profile: 주어지면 모든 PDF를 다시 빌드하면서 스테이지별 프로파일 보고서(JSON)를 이 경로에 저장
+    """
+    if page_workers is None:
+        page_workers = (os.cpu_count() or 1) if workers <= 1 else 1
     total_records = 0
-    
+    manifest = load_manifest()
+    entries = manifest["entries"]
+    code_version = pipeline_code_version()
+    profile_reports = {}
+    if profile:
+        force = True
+
+    # 1) 입력이 바뀐 항목만 고르기
+    todo = []
+    inputs = {}
     for cfg in files_config:
         raw_path = BASE_DIR / cfg["raw_name"]
         out_path = OUT_DIR / cfg["out_name"]
+        if raw_path.exists():
+            inputs[cfg["out_name"]] = manifest_inputs(cfg, code_version, token_budget)
+            entry = entries.get(cfg["out_name"])
+            if not force and _is_up_to_date(entry, inputs[cfg["out_name"]], out_path):
+                print(f"변경 없음, 건너뜀: {cfg['raw_name']} (레코드 수: {entry['records']})")
+                total_records += entry["records"]
+                continue
+        todo.append(cfg)
 
-        print("\n" + "="*50)
-        print(f"처리 시작: {raw_path.name}")
-        
-        if not raw_path.exists():
-            print(f"  [ERROR] 파일이 없음: {raw_path}")
-            continue
+    failed = []  # 처리하지 못한 PDF 이름 (오류는 출력하고 나머지 파일은 계속 처리)
 
-        try:
-            # 1) PDF → 텍스트
-            print("  → PDF 텍스트 추출 중...")
-            raw_text = extract_text_from_pdf(raw_path)
-            text = clean_basic(raw_text)
-
-            # 2) 모드별 청킹
-            print(f"  → {cfg['mode']} 모드로 청킹 중...")
-            if cfg["mode"] == "law":
-                law_chunks = chunk_law(
-                    text,
-                    source_file=cfg["raw_name"],
-                    category=cfg["category"],
-                    id_prefix=cfg["id_prefix"]
-                )
-                # law 모드는 id를 여기서 붙여서 JSONL 레코드로 변환
-                records = []
-                for i, ch in enumerate(law_chunks, start=1):
-                    article_title = ch.get('article_title', '')
-                    article_id = ch.get('article_id', '')
-                    sub_chunk = ch.get('sub_chunk')
-                    
-                    # 제목 생성 (제어 문자 제거)
-                    title = f"{article_title} {article_id}".strip()
-                    if sub_chunk:
-                        title += f" (부분 {sub_chunk})"
-                    title = remove_control_chars(title).strip()
-                    
-                    # law 모드 - 필수 필드 + 선택적 필드 (값이 있을 때만 포함)
-                    record = {
-                        "id": f"{cfg['id_prefix']}_{i:04d}",
-                        "title": title,
-                        "text": ch["text"],
-                        "source": ch["source"],
-                        "category": ch["category"]
-                    }
-                    
-                    # 선택적 필드는 값이 있을 때만 추가
-                    if article_id:
-                        record["article_id"] = article_id
-                    if article_title:
-                        record["article_title"] = remove_control_chars(article_title).strip()
-                    if sub_chunk:
-                        record["sub_chunk"] = sub_chunk
-                    
-                    records.append(record)
+    def record_build(cfg, count=None, error=None, report=None):
+        nonlocal total_records
+        total_records += _report_result(cfg, count=count, error=error)
+        if error is not None:
+            failed.append(cfg["raw_name"])
+            return
+        if report is not None:
+            profile_reports[cfg["out_name"]] = report
+        out_name = cfg["out_name"]
+        entries[out_name] = manifest_entry(inputs[out_name], OUT_DIR / out_name, count, entries.get(out_name))
+
+    # 2) 빌드
+    if workers <= 1:
+        for cfg in todo:
+            print("\n" + "="*50)
+            print(f"처리 시작: {cfg['raw_name']}")
+            print(f"  → PDF 텍스트 추출 및 {cfg['mode']} 모드 청킹 중...")
+            try:
+                count, report = _build_file(cfg, stream, page_workers, token_budget, bool(profile))
+            except Exception as e:
+                record_build(cfg, error=e)
             else:
-                records = chunk_simple(
-                    text,
-                    source_file=cfg["raw_name"],
-                    category=cfg["category"],
-                    id_prefix=cfg["id_prefix"],
-                )
-
-            # 3) JSONL 저장
-            with open(out_path, "w", encoding="utf-8") as f:
-                for rec in records:
-                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-
-            print(f"  ✓ 레코드 수: {len(records)}")
-            print(f"  ✓ 저장 완료: {out_path}")
-            total_records += len(records)
-            
-        except Exception as e:
-            print(f"  [ERROR] 처리 실패: {e}")
-            import traceback
-            traceback.print_exc()
+                record_build(cfg, count=count, report=report)
+    elif todo:
+        # 큰 PDF부터 제출해야 전체 소요 시간이 가장 큰 파일에 가까워짐
+        def pdf_size(cfg):
+            raw_path = BASE_DIR / cfg["raw_name"]
+            return raw_path.stat().st_size if raw_path.exists() else 0
+
+        print(f"병렬 처리: 워커 {workers}개")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                cfg["out_name"]: executor.submit(_build_file, cfg, stream, page_workers, token_budget, bool(profile))
+                for cfg in sorted(todo, key=pdf_size, reverse=True)
+            }
+            # 출력은 files_config 순서대로 정리
+            for cfg in todo:
+                print("\n" + "="*50)
+                print(f"처리 결과: {cfg['raw_name']}")
+                try:
+                    count, report = futures[cfg["out_name"]].result()
+                except Exception as e:
+                    record_build(cfg, error=e)
+                else:
+                    record_build(cfg, count=count, report=report)
+
+    save_manifest(manifest)
+    if profile:
+        save_profile_report(profile_reports, Path(profile), workers=workers, stream=stream)
 
     print("\n" + "="*50)
-    print(f"=== 전체 처리 완료 (총 {total_records}개 레코드) ===")
+    print(f"=== 전체 처리 완료 (총 {total_records}개 레코드, 다시 빌드 {len(todo)}개 파일) ===")
+    if failed:
+        print(f"실패 {len(failed)}개 파일: {', '.join(failed)}")
+    return total_records
 
 if __name__ == "__main__":
-    main()
-
+    parser = argparse.ArgumentParser(description="PDF 파일들을 RAG용 JSONL로 전처리합니다.")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="파일 단위 병렬 처리 프로세스 수 (기본 1: 순차 처리)"
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="페이지 단위 스트리밍 추출/정리 (큰 PDF에서 메모리 사용량 일정)"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="manifest.json과 관계없이 모든 PDF를 다시 빌드"
+    )
+    parser.add_argument(
+        "--page-workers", type=int, default=None,
+        help=f"페이지가 {PAGE_PARALLEL_MIN_PAGES}쪽 이상인 PDF를 페이지 단위로 나눠 추출할 프로세스 수 "
+             "(기본: 순차 처리면 CPU 수, --workers 사용 시 1)"
+    )
+    parser.add_argument(
+        "--token-budget", type=int, default=None, metavar="MAX_TOKENS",
+        help="글자 수 대신 토큰 수로 청킹 (청크 최대 토큰 수, 예: 400)"
+    )
+    parser.add_argument(
+        "--overlap-tokens", type=int, default=DEFAULT_TOKEN_BUDGET["overlap_tokens"],
+        help=f"토큰 예산 모드의 오버랩 토큰 수 (기본 {DEFAULT_TOKEN_BUDGET['overlap_tokens']})"
+    )
+    parser.add_argument(
+        "--tokenizer", default=DEFAULT_TOKEN_BUDGET["tokenizer"],
+        help="토큰 예산 모드의 토크나이저: estimate(기본, 오프라인 추정) | tiktoken | tiktoken:<인코딩>"
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const=str(PROFILE_PATH), default=None, metavar="PATH",
+        help="스테이지/파일별 wall·CPU 시간, tracemalloc 최대 메모리, 규칙 적용 횟수를 측정해 "
+             f"JSON으로 저장 (기본 {PROFILE_PATH.relative_to(BASE_DIR)}, 모든 PDF를 다시 빌드)"
+    )
+    args = parser.parse_args()
+    token_budget = None
+    if args.token_budget is not None:
+        token_budget = {
+            "tokenizer": args.tokenizer,
+            "max_tokens": args.token_budget,
+            "overlap_tokens": args.overlap_tokens,
+        }
+    main(workers=args.workers, stream=args.stream, force=args.force, page_workers=args.page_workers,
+         token_budget=token_budget, profile=args.profile)
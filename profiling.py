@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+전처리 파이프라인 스테이지별 프로파일러
+
+    with profiling.enabled() as profiler:
+        with profile_stage("extract"):
+            ...
+        records = profiled_iter("chunk", records)   # 제너레이터는 next() 단위로 측정
+    profiler.report()
+
+- wall/CPU 시간은 스테이지 자기 시간입니다. (안쪽 스테이지에서 보낸 시간은 빠짐)
+  스트리밍 모드처럼 제너레이터가 서로 맞물려 돌아도 시간이 두 번 세어지지 않습니다.
+- 메모리는 스테이지 코드가 실행되는 동안 tracemalloc 기준 최대 사용량이
+  스테이지 시작 시점보다 얼마나 늘었는지입니다.
+- 프로파일러가 꺼져 있으면 profile_stage는 아무것도 하지 않는 공용 컨텍스트를 돌려줍니다.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+_NULL_STAGE = nullcontext()
+_active = None  # 현재 프로세스에서 켜져 있는 StageProfiler
+
+class StageProfiler:
+    """스테이지 이름별 호출 수, wall/CPU 자기 시간, 최대 메모리 증가량을 모읍니다."""
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self._stack = []
+
+    def _memory(self) -> tuple:
+        """(현재 사용량, 직전 측정 이후 최대 사용량)을 읽고 최대값을 초기화합니다."""
+        if not self.trace_memory:
+            return 0, 0
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        return current, peak
+
+    def enter(self, name: str):
+        current, peak = self._memory()
+        if self._stack:
+            parent = self._stack[-1]
+            parent["peak"] = max(parent["peak"], peak)
+        self._stack.append({
+            "name": name,
+            "wall": time.perf_counter(),
+            "cpu": time.process_time(),
+            "child_wall": 0.0,
+            "child_cpu": 0.0,
+            "base": current,
+            "peak": current,
+        })
+
+    def exit(self):
+        wall_end, cpu_end = time.perf_counter(), time.process_time()
+        frame = self._stack.pop()
+        _, peak = self._memory()
+        wall = wall_end - frame["wall"]
+        cpu = cpu_end - frame["cpu"]
+
+        stats = self.stages.setdefault(frame["name"], {
+            "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_bytes": 0,
+        })
+        stats["calls"] += 1
+        stats["wall_s"] += wall - frame["child_wall"]
+        stats["cpu_s"] += cpu - frame["child_cpu"]
+        stats["peak_bytes"] = max(stats["peak_bytes"], max(frame["peak"], peak) - frame["base"])
+
+        if self._stack:
+            parent = self._stack[-1]
+            parent["child_wall"] += wall
+            parent["child_cpu"] += cpu
+
+    @contextmanager
+    def stage(self, name: str):
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def report(self) -> dict:
+        """스테이지별 통계 (시간은 소수점 6자리로 반올림)"""
+        return {
+            name: {**stats, "wall_s": round(stats["wall_s"], 6), "cpu_s": round(stats["cpu_s"], 6)}
+            for name, stats in self.stages.items()
+        }
+
+@contextmanager
+def enabled(trace_memory: bool = True):
+    """
+    이 블록 안에서 profile_stage / profiled_iter가 측정하도록 프로파일러를 켭니다.
+    블록 전체의 wall/CPU 시간과 최대 메모리는 profiler.total에 기록됩니다.
+    """
+    global _active
+    profiler = StageProfiler(trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if trace_memory:
+        tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    wall, cpu = time.perf_counter(), time.process_time()
+    previous, _active = _active, profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+        profiler.total = {
+            "wall_s": round(time.perf_counter() - wall, 6),
+            "cpu_s": round(time.process_time() - cpu, 6),
+            "peak_bytes": (tracemalloc.get_traced_memory()[1] - base) if trace_memory else 0,
+        }
+        if started_tracing:
+            tracemalloc.stop()
+
+def profile_stage(name: str):
+    """프로파일러가 켜져 있으면 name 스테이지로 측정하는 컨텍스트를 반환합니다."""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name)
+
+def profiled_iter(name: str, iterable):
+    """제너레이터의 next() 호출 하나하나를 name 스테이지로 측정합니다."""
+    profiler = _active
+    if profiler is None:
+        return iterable
+
+    def gen():
+        it = iter(iterable)
+        while True:
+            profiler.enter(name)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                profiler.exit()
+            yield item
+    return gen()
+
+def format_table(file_reports: dict) -> str:
+    """파일별 프로파일 결과를 스테이지 합계 표와 파일별 합계 표로 만듭니다."""
+    totals = {}
+    for report in file_reports.values():
+        for name, stats in report["stages"].items():
+            agg = totals.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_bytes": 0})
+            agg["calls"] += stats["calls"]
+            agg["wall_s"] += stats["wall_s"]
+            agg["cpu_s"] += stats["cpu_s"]
+            agg["peak_bytes"] = max(agg["peak_bytes"], stats["peak_bytes"])
+
+    # 한글 머리글은 화면에서 두 칸을 차지하므로 그만큼 폭을 줄여 맞춤
+    lines = [f"{'스테이지':<16}{'호출':>6}{'wall(s)':>10}{'cpu(s)':>10}{'peak(MB)':>10}"]
+    for name, agg in sorted(totals.items(), key=lambda kv: -kv[1]["wall_s"]):
+        lines.append(f"{name:<20}{agg['calls']:>8}{agg['wall_s']:>10.3f}{agg['cpu_s']:>10.3f}"
+                     f"{agg['peak_bytes'] / 2**20:>10.1f}")
+    lines.append("")
+    lines.append(f"{'파일':<38}{'레코드':>5}{'wall(s)':>10}{'cpu(s)':>10}{'peak(MB)':>10}")
+    for out_name, report in file_reports.items():
+        total = report["total"]
+        lines.append(f"{out_name:<40}{report['records']:>8}{total['wall_s']:>10.3f}{total['cpu_s']:>10.3f}"
+                     f"{total['peak_bytes'] / 2**20:>10.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+질문 임베딩 LRU 캐시 (메모리 + 선택적 디스크 계층)
+
+챗봇 질문은 "상속세 신고 기한", "유류분"처럼 자주 반복되므로 검색 경로의 임베딩 호출 앞에 둡니다.
+질문을 정규화(NFKC, 공백 정리, 끝의 물음표/마침표 제거)한 문자열을 메모리 키로 쓰고
+(임베딩은 정규화한 문자열이 아니라 사용자가 입력한 원래 질문으로 만듦)
+
+- 메모리: 항목 수(max_entries)와 벡터 바이트 수(max_bytes)로 제한하는 LRU, 항목마다 TTL(ttl초)
+- 디스크: EmbeddingCache(SQLite)를 넘기면 메모리에 없을 때 조회하고 새 임베딩을 저장
+  (문서 임베딩과 같은 캐시를 쓰므로 정규화한 질문 앞에 QUERY_KEY_PREFIX를 붙인 해시를 키로 씀)
+  (Streamlit 워커/프로세스끼리 적중을 공유, 임베딩은 모델이 같으면 바뀌지 않으므로 TTL 없음)
+
+    cache = QueryEmbeddingCache(provider.embed_query, provider.model, disk=EmbeddingCache())
+    vector = cache.embed("상속세 신고 기한은?")
+    print(cache.report())
+
+stats()는 메모리/디스크 적중, 미스, 적중률, 적중으로 아낀 임베딩 시간(saved_s)을 반환합니다.
+환경 변수 QUERY_CACHE_SIZE / QUERY_CACHE_MB / QUERY_CACHE_TTL로 기본 한도를 바꿀 수 있습니다.
+(configured_query_cache)
+"""
+
+import os
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from embedding_cache import text_sha256
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_TTL = 24 * 60 * 60
+
+# 디스크 계층 키 접두사 (정규화한 질문 키가 같은 글자의 문서 텍스트 키와 겹치지 않도록)
+QUERY_KEY_PREFIX = "query\0"
+
+# 질문 끝에서 떼어낼 문장 부호
+_TRAILING_PUNCT = re.compile(r"[\s?？!！.。~…]+$")
+
+def normalize_query(query: str) -> str:
+    """NFKC 정규화, 연속 공백을 하나로, 앞뒤 공백과 끝의 물음표/마침표 제거"""
+    text = " ".join(unicodedata.normalize("NFKC", query).split())
+    return _TRAILING_PUNCT.sub("", text) or text
+
+class QueryEmbeddingCache:
+    """정규화한 질문 → 임베딩 벡터 LRU 캐시"""
+
+    def __init__(self, embed_fn, model: str, dimensions: int = None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL, disk=None, clock=time.monotonic):
+        """
+        Args:
+            embed_fn: 질문 하나를 받아 벡터 하나를 반환하는 함수 (예: provider.embed_query)
+            model, dimensions: 디스크 계층의 키 (EmbeddingCache와 같은 의미)
+            ttl: 메모리 항목의 유효 시간(초), None이면 만료 없음
+            disk: EmbeddingCache 또는 None
+        """
+        self.embed_fn = embed_fn
+        self.model = model
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk = disk
+        self.clock = clock
+        # 키 → (벡터, 바이트 수, 만료 시각, 임베딩에 걸린 초)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0,
+                         "saved_s": 0.0, "miss_s": 0.0}
+
+    def _get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] is not None and entry[2] <= self.clock():
+            self._remove(key)
+            self.counters["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def _put(self, key: str, vector: list, cost: float):
+        if key in self._entries:
+            self._remove(key)
+        nbytes = 4 * len(vector)
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        self._entries[key] = (vector, nbytes, expires, cost)
+        self._bytes += nbytes
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def _average_miss_s(self) -> float:
+        misses = self.counters["misses"]
+        return self.counters["miss_s"] / misses if misses else 0.0
+
+    def embed(self, query: str) -> list:
+        """
+        질문의 임베딩 (메모리 → 디스크 → embed_fn 순서로 찾고, 찾은 벡터는 메모리에 넣음)
+        정규화한 질문은 캐시 키로만 쓰고 embed_fn에는 원래 질문을 넘김
+        """
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._get(key)
+            if entry is not None:
+                self.counters["hits"] += 1
+                self.counters["saved_s"] += entry[3]
+                return list(entry[0])
+
+        start = time.perf_counter()
+        if self.disk is not None:
+            digest = text_sha256(QUERY_KEY_PREFIX + key)
+            found = self.disk.get_many(self.model, self.dimensions, [digest])
+            if digest in found:
+                vector = list(found[digest])
+                with self._lock:
+                    cost = self._average_miss_s()
+                    self.counters["disk_hits"] += 1
+                    self.counters["saved_s"] += max(0.0, cost - (time.perf_counter() - start))
+                    self._put(key, vector, cost)
+                return list(vector)
+
+        vector = list(self.embed_fn(query))
+        if self.disk is not None:
+            self.disk.put_many(self.model, self.dimensions, [digest], [vector])
+        cost = time.perf_counter() - start
+        with self._lock:
+            self.counters["misses"] += 1
+            self.counters["miss_s"] += cost
+            self._put(key, vector, cost)
+        return list(vector)
+
+    def clear(self):
+        """메모리 계층 비우기 (디스크 계층은 그대로)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """카운터, 적중률(메모리+디스크), 현재 메모리 항목 수/바이트 수"""
+        with self._lock:
+            counters = dict(self.counters)
+            entries, nbytes = len(self._entries), self._bytes
+        lookups = counters["hits"] + counters["disk_hits"] + counters["misses"]
+        hits = counters["hits"] + counters["disk_hits"]
+        return {**counters, "hit_rate": hits / lookups if lookups else 0.0, "entries": entries, "bytes": nbytes}
+
+    def report(self) -> str:
+        """캐시 효과 요약 한 줄"""
+        s = self.stats()
+        return (f"질문 임베딩 캐시: 적중 {s['hits']}회 + 디스크 {s['disk_hits']}회, 미스 {s['misses']}회 "
+                f"(적중률 {s['hit_rate']:.0%}), 아낀 시간 {s['saved_s']:.2f}s, "
+                f"메모리 {s['entries']}개 / {s['bytes'] / 1024:.0f}KB")
+
+def configured_query_cache(provider, disk=None) -> QueryEmbeddingCache:
+    """
+    임베딩 제공자용 질문 캐시 (QUERY_CACHE_SIZE, QUERY_CACHE_MB, QUERY_CACHE_TTL 환경 변수 반영)
+    원격이 아닌 제공자(local)는 디스크 계층을 쓰지 않습니다. QUERY_CACHE_TTL=0이면 만료 없음.
+    """
+    ttl = float(os.getenv("QUERY_CACHE_TTL") or DEFAULT_TTL)
+    return QueryEmbeddingCache(
+        provider.embed_query, provider.model, provider.dimensions,
+        max_entries=int(os.getenv("QUERY_CACHE_SIZE") or DEFAULT_MAX_ENTRIES),
+        max_bytes=int(float(os.getenv("QUERY_CACHE_MB") or DEFAULT_MAX_BYTES / 2**20) * 2**20),
+        ttl=ttl or None,
+        disk=disk if provider.remote else None,
+    )
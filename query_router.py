@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+카테고리 파티션 라우팅 (질문마다 검색할 카테고리를 1~2개로 좁힘)
+
+청크는 metadata의 category로 다섯 파티션(PARTITIONS)으로 나뉩니다. 민법 상속편 질문에 상증법 조문이,
+안심상속 신청 질문에 세금 상식이 섞여 들어오지 않도록 질문을 먼저 파티션으로 보내고 그 안에서만 검색합니다.
+
+1. 키워드: 공백을 지운 질문에 PARTITION_KEYWORDS의 단어가 몇 개 들어 있는지 셈
+   최고 점수의 절반 이상인 카테고리를 고르고, max_partitions개를 넘는데 점수로 가를 수 없으면 2단계로
+2. 중심 벡터: 카테고리별 청크 임베딩 평균(단위 벡터)과 질문 임베딩의 코사인 유사도
+   1위와 2위 차이가 margin 이상이면 1위, 2위와 3위 차이가 margin 이상이면 1·2위
+3. 둘 다 확실하지 않으면 None (전체 카테고리 검색)
+
+    router = PartitionRouter(search_backend.category_centroids())
+    categories = router.route(query, query_embedding)     # ["법령_민법_상속"] 또는 None
+    docs = hybrid_query(search_backend, lexical_index, query, query_embedding, categories=categories)
+
+PARTITION_ROUTING=0이면 라우팅하지 않고, PARTITION_MARGIN으로 중심 벡터 여유(기본 0.05)를 바꿀 수 있습니다.
+(configured_router)
+"""
+
+import os
+import re
+import threading
+import unicodedata
+import numpy as np
+
+PARTITIONS = ("법령_민법_상속", "법령_상속세증여세", "세금_안내", "행정기준", "안심상속_안내")
+
+# 세금 일반 용어와 생활 사례 용어는 법령과 국세청 안내 양쪽에 넣어 두 파티션이 함께 골라지게 함
+_TAX_TERMS = (
+    "상속세", "증여세", "세금", "공제", "신고", "납부", "세액", "과세",
+    "아파트", "주택", "부모님", "자녀", "혼인", "출산", "창업자금", "보험",
+)
+_INQUIRY_TERMS = ("재산조회", "통합처리", "안심상속")
+
+PARTITION_KEYWORDS = {
+    "법령_민법_상속": (
+        "민법", "유류분", "유언", "유증", "한정승인", "단순승인", "상속포기", "대습상속", "상속순위",
+        "상속인의순위", "법정상속분", "상속분", "기여분", "상속재산분할", "분할협의", "상속회복",
+        "재산분리", "상속인의부존재", "특별연고자", "상속결격", "검인",
+    ),
+    "법령_상속세증여세": _TAX_TERMS + (
+        "상속세및증여세법", "상증법", "상증세법", "과세가액", "과세표준", "세율", "가산세", "연부연납",
+        "물납", "비과세", "과세특례", "증여추정", "증여의제", "가업상속", "영농상속", "할증과세",
+        "공익법인", "시행령", "납세의무",
+    ),
+    "세금_안내": _TAX_TERMS + (
+        "국세청", "홈택스", "절세", "세금상식", "사례", "종부세", "종합부동산세",
+    ),
+    "행정기준": _INQUIRY_TERMS + (
+        "재산조회기준", "피후견인", "후견인", "행정안전부", "조회기관", "신청정보", "처리기한", "수수료",
+    ),
+    "안심상속_안내": _INQUIRY_TERMS + (
+        "원스톱", "정부24", "주민센터", "사망신고", "신청방법", "구비서류", "방문신청", "온라인신청",
+    ),
+}
+
+DEFAULT_MARGIN = 0.05
+DEFAULT_MAX_PARTITIONS = 2
+
+def _compact(text: str) -> str:
+    return re.sub(r"\s+", "", unicodedata.normalize("NFKC", text)).lower()
+
+def keyword_scores(query: str, keywords: dict = None) -> dict:
+    """
+    {카테고리: 질문에 들어 있는 키워드 수} (0점 카테고리 제외)
+    긴 키워드부터 찾고 찾은 부분은 지우므로 "사망신고"의 "신고", "상속세및증여세법"의 "상속세"는 따로 세지 않음
+    """
+    owners = {}
+    for category, words in (keywords or PARTITION_KEYWORDS).items():
+        for word in words:
+            owners.setdefault(_compact(word), []).append(category)
+    compact = _compact(query)
+    scores = {}
+    for word in sorted(owners, key=len, reverse=True):
+        if word in compact:
+            compact = compact.replace(word, "\0")
+            for category in owners[word]:
+                scores[category] = scores.get(category, 0) + 1
+    return scores
+
+class PartitionRouter:
+    """질문 → 검색할 카테고리 목록 (확실하지 않으면 None = 전체)"""
+
+    def __init__(self, centroids: dict = None, margin: float = DEFAULT_MARGIN,
+                 max_partitions: int = DEFAULT_MAX_PARTITIONS, keywords: dict = None):
+        """
+        Args:
+            centroids: {카테고리: 중심 벡터} (검색 백엔드의 category_centroids(), 없으면 키워드만 사용)
+            margin: 중심 벡터 코사인 유사도에서 고른 카테고리와 나머지 사이에 필요한 최소 차이
+        """
+        self.keywords = keywords or PARTITION_KEYWORDS
+        self.margin = margin
+        self.max_partitions = max_partitions
+        self.categories = list((centroids or {}).keys())
+        self.centroids = None
+        if self.categories:
+            matrix = np.asarray([centroids[c] for c in self.categories], dtype=np.float32)
+            self.centroids = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        self.counters = {"keyword": 0, "centroid": 0, "fallback": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _by_keywords(self, query: str):
+        scores = keyword_scores(query, self.keywords)
+        if not scores:
+            return None
+        best = max(scores.values())
+        ranked = sorted((c for c in scores if scores[c] * 2 >= best), key=lambda c: -scores[c])
+        if len(ranked) > self.max_partitions:
+            if scores[ranked[self.max_partitions - 1]] == scores[ranked[self.max_partitions]]:
+                return None
+            ranked = ranked[:self.max_partitions]
+        return ranked
+
+    def _by_centroids(self, query_embedding):
+        if self.centroids is None or query_embedding is None or not len(query_embedding):
+            return None
+        if len(self.categories) == 1:
+            return list(self.categories)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        similarities = self.centroids @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        order = np.argsort(-similarities, kind="stable")
+        ranked = similarities[order]
+        for n in range(1, min(self.max_partitions, len(order) - 1) + 1):
+            if ranked[n - 1] - ranked[n] >= self.margin:
+                return [self.categories[i] for i in order[:n]]
+        return None
+
+    def route(self, query: str, query_embedding=None):
+        """검색할 카테고리 목록, 확실하지 않으면 None"""
+        categories = self._by_keywords(query)
+        if categories is not None:
+            self._count("keyword")
+            return categories
+        categories = self._by_centroids(query_embedding)
+        if categories is not None:
+            self._count("centroid")
+            return categories
+        self._count("fallback")
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        total = sum(counters.values())
+        return {**counters, "routed_rate": (total - counters["fallback"]) / total if total else 0.0}
+
+    def report(self) -> str:
+        """라우팅 요약 한 줄"""
+        s = self.stats()
+        return (f"파티션 라우팅: 키워드 {s['keyword']}회, 중심 벡터 {s['centroid']}회, "
+                f"전체 검색 {s['fallback']}회 (좁힌 비율 {s['routed_rate']:.0%})")
+
+def configured_router(search_backend=None):
+    """
+    PARTITION_ROUTING=0이면 None, 아니면 PartitionRouter
+    search_backend에 category_centroids()가 있으면 중심 벡터도 사용 (PARTITION_MARGIN, 기본 0.05)
+    """
+    if (os.getenv("PARTITION_ROUTING") or "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    centroids = None
+    if hasattr(search_backend, "category_centroids"):
+        centroids = search_backend.category_centroids()
+    return PartitionRouter(centroids, margin=float(os.getenv("PARTITION_MARGIN") or DEFAULT_MARGIN))
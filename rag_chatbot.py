@@ -7,10 +7,17 @@ RAG 기반 유산상속 상담 챗봇
 
 import os
 from pathlib import Path
-import chromadb
-from chromadb.config import Settings
 from openai import OpenAI
 from dotenv import load_dotenv
+from embedding_cache import EmbeddingCache
+from embedding_providers import get_embedding_provider, collection_name_for
+from query_cache import configured_query_cache
+from answer_cache import configured_answer_cache
+from indexing import read_index_version
+from lexical_index import configured_lexical_index, hybrid_query
+from query_router import configured_router
+from article_lookup import ArticleIndex
+from vector_store import open_search_backend
 
 # 환경 변수 로드
 load_dotenv()
@@ -18,61 +25,55 @@ load_dotenv()
 # === 설정 ===
 BASE_DIR = Path(__file__).parent
 DB_DIR = BASE_DIR / "chroma_db"
+PROCESSED_DIR = BASE_DIR / "processed"
 
 # OpenAI 클라이언트 초기화
 openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# ChromaDB 클라이언트 초기화
-chroma_client = chromadb.PersistentClient(
-    path=str(DB_DIR),
-    settings=Settings(anonymized_telemetry=False)
-)
+# 임베딩 캐시 (index_data.py와 공유, 같은 질문은 다시 임베딩하지 않음)
+embedding_cache = EmbeddingCache()
 
-# 컬렉션 가져오기
-collection_name = "well_dying_legacy_data"
+# 임베딩 제공자 (EMBEDDING_PROVIDER=openai|local, 인덱싱할 때와 같아야 함)
+embedding_provider = get_embedding_provider()
+
+# 질문 임베딩 LRU 캐시 (정규화한 질문 키, 메모리 + 위 임베딩 캐시를 디스크 계층으로, query_cache.report()로 적중률 확인)
+query_cache = configured_query_cache(embedding_provider, disk=embedding_cache)
+
+# 검색 백엔드 (VECTOR_STORE=chroma|numpy, 임베딩 제공자/모델마다 별도 컬렉션)
+collection_name = collection_name_for(embedding_provider)
 try:
-    collection = chroma_client.get_collection(name=collection_name)
-except:
-    print(f"오류: '{collection_name}' 컬렉션을 찾을 수 없습니다.")
-    print("먼저 'python index_data.py'를 실행하여 데이터를 인덱싱하세요.")
+    search_backend = open_search_backend(collection_name, db_dir=DB_DIR)
+except FileNotFoundError as e:
+    print(f"오류: {e}")
     exit(1)
 
-def get_embedding(text: str, model: str = "text-embedding-3-small") -> list:
-    """텍스트를 임베딩 벡터로 변환"""
-    response = openai_client.embeddings.create(
-        model=model,
-        input=text
-    )
-    return response.data[0].embedding
+# 글자 n-그램 BM25 역색인 (정확한 법률 용어/숫자 검색, 벡터 결과와 RRF로 합침, HYBRID_SEARCH=0이면 사용 안 함)
+lexical_index = configured_lexical_index(PROCESSED_DIR)
+
+# 카테고리 파티션 라우터 (키워드/카테고리 중심 벡터로 검색할 카테고리를 1~2개로 좁힘, 불확실하면 전체, PARTITION_ROUTING=0이면 사용 안 함)
+partition_router = configured_router(search_backend)
+
+# 조문 번호 색인 ("민법 제1112조"처럼 조문 번호가 있는 질문은 임베딩/벡터 검색 없이 바로 조회)
+article_index = ArticleIndex(PROCESSED_DIR)
+
+# 의미 기반 답변 캐시 (질문 임베딩 유사도 + 같은 검색 문서일 때 답변 재사용, 인덱스 버전이 바뀌면 비움)
+answer_cache = configured_answer_cache(lambda: read_index_version(DB_DIR, collection_name))
 
-def search_relevant_docs(query: str, n_results: int = 5) -> list:
-    """쿼리와 관련된 문서 검색"""
+def get_embedding(text: str) -> list:
+    """질문을 임베딩 벡터로 변환 (질문 임베딩 캐시 사용)"""
+    return query_cache.embed(text)
+
+def search_relevant_docs(query: str, n_results: int = 5, query_embedding: list = None) -> list:
+    """쿼리와 관련된 문서 검색 (query_embedding이 있으면 다시 임베딩하지 않음)"""
     # 쿼리 임베딩 생성
-    query_embedding = get_embedding(query)
-    
-    # 벡터 검색
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=n_results,
-        include=['documents', 'metadatas', 'distances']
-    )
-    
-    # 결과 정리
-    relevant_docs = []
-    if results['documents'] and len(results['documents'][0]) > 0:
-        for i, (doc, metadata, distance) in enumerate(zip(
-            results['documents'][0],
-            results['metadatas'][0],
-            results['distances'][0]
-        )):
-            relevant_docs.append({
-                'text': doc,
-                'metadata': metadata,
-                'distance': distance,
-                'rank': i + 1
-            })
+    if query_embedding is None:
+        query_embedding = get_embedding(query)
     
-    return relevant_docs
+    # 질문이 속한 카테고리 파티션만 검색 (None이면 전체)
+    categories = partition_router.route(query, query_embedding) if partition_router else None
+
+    # 벡터 검색 + BM25 검색을 RRF로 합침 (결과: [{"id", "text", "metadata", "rank", ...}, ...])
+    return hybrid_query(search_backend, lexical_index, query, query_embedding, n_results, categories=categories)
 
 def format_context(docs: list) -> str:
     """검색된 문서들을 컨텍스트로 포맷팅"""
@@ -163,9 +164,20 @@ def generate_response(query: str, context: str) -> str:
         return f"오류가 발생했습니다: {e}"
 
 def chat(query: str, n_results: int = 5) -> dict:
-    """RAG 챗봇 메인 함수"""
-    # 관련 문서 검색
-    relevant_docs = search_relevant_docs(query, n_results)
+    """RAG 챗봇 메인 함수 (단일 턴이므로 비슷한 질문의 답변은 답변 캐시에서 재사용)"""
+    # 조문 번호가 있으면 임베딩 없이 그 조문 청크를 바로 사용
+    relevant_docs = article_index.lookup(query)
+    query_embedding = None
+    if not relevant_docs:
+        # 관련 문서 검색
+        query_embedding = get_embedding(query)
+        relevant_docs = search_relevant_docs(query, n_results, query_embedding)
+        
+        # 같은 문서를 근거로 한 비슷한 질문의 답변이 있으면 그대로 사용
+        doc_ids = [doc['id'] for doc in relevant_docs]
+        cached = answer_cache.lookup(query_embedding, doc_ids)
+        if cached is not None:
+            return cached
     
     # 컨텍스트 생성
     context = format_context(relevant_docs)
@@ -173,11 +185,14 @@ def chat(query: str, n_results: int = 5) -> dict:
     # 답변 생성
     answer = generate_response(query, context)
     
-    return {
+    result = {
         'answer': answer,
         'sources': [doc['metadata'] for doc in relevant_docs],
         'num_sources': len(relevant_docs)
     }
+    if query_embedding is not None and not answer.startswith("오류가 발생했습니다"):
+        answer_cache.store(query_embedding, doc_ids, result)
+    return result
 
 def interactive_chat():
     """대화형 챗봇"""
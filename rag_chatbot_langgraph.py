@@ -8,13 +8,20 @@ RAG 기반 유산상속 상담 챗봇 (LangGraph 버전)
 import os
 from pathlib import Path
 from typing import TypedDict, List, Dict, Any
-import chromadb
-from chromadb.config import Settings
 from openai import OpenAI
 from dotenv import load_dotenv
+from embedding_cache import EmbeddingCache
+from embedding_providers import get_embedding_provider, collection_name_for
+from query_cache import configured_query_cache
+from answer_cache import configured_answer_cache
+from indexing import read_index_version
+from lexical_index import configured_lexical_index, hybrid_query
+from query_router import configured_router
+from article_lookup import ArticleIndex
+from vector_store import open_search_backend
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage, BaseMessage, AIMessage
 import logging
 
@@ -31,6 +38,7 @@ load_dotenv()
 # === 설정 ===
 BASE_DIR = Path(__file__).parent
 DB_DIR = BASE_DIR / "chroma_db"
+PROCESSED_DIR = BASE_DIR / "processed"
 
 # OpenAI 클라이언트 초기화
 openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -43,30 +51,40 @@ llm = ChatOpenAI(
     api_key=os.getenv("OPENAI_API_KEY")
 )
 
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+# 임베딩 제공자 (EMBEDDING_PROVIDER=openai|local, 인덱싱할 때와 같아야 함)
+embedding_provider = get_embedding_provider()
 
-# ChromaDB 클라이언트 초기화
-chroma_client = chromadb.PersistentClient(
-    path=str(DB_DIR),
-    settings=Settings(anonymized_telemetry=False)
-)
+# 임베딩 캐시 (index_data.py, rag_chatbot.py와 공유)
+embedding_cache = EmbeddingCache()
 
-# 컬렉션 가져오기
-collection_name = "well_dying_legacy_data"
+# 질문 임베딩 LRU 캐시 (정규화한 질문 키, 메모리 + 위 임베딩 캐시를 디스크 계층으로, query_cache.report()로 적중률 확인)
+query_cache = configured_query_cache(embedding_provider, disk=embedding_cache)
+
+# 검색 백엔드 (VECTOR_STORE=chroma|numpy, 임베딩 제공자/모델마다 별도 컬렉션)
+collection_name = collection_name_for(embedding_provider)
 try:
-    collection = chroma_client.get_collection(name=collection_name)
-except:
-    logger.error(f"오류: '{collection_name}' 컬렉션을 찾을 수 없습니다.")
-    logger.error("먼저 'python index_data.py'를 실행하여 데이터를 인덱싱하세요.")
+    search_backend = open_search_backend(collection_name, db_dir=DB_DIR)
+except FileNotFoundError as e:
+    logger.error(f"오류: {e}")
     exit(1)
 
+# 글자 n-그램 BM25 역색인 (정확한 법률 용어/숫자 검색, 벡터 결과와 RRF로 합침, HYBRID_SEARCH=0이면 사용 안 함)
+lexical_index = configured_lexical_index(PROCESSED_DIR)
+
+# 카테고리 파티션 라우터 (키워드/카테고리 중심 벡터로 검색할 카테고리를 1~2개로 좁힘, 불확실하면 전체, PARTITION_ROUTING=0이면 사용 안 함)
+partition_router = configured_router(search_backend)
+
+# 조문 번호 색인 ("민법 제1112조"처럼 조문 번호가 있는 질문은 임베딩/벡터 검색 없이 바로 조회)
+article_index = ArticleIndex(PROCESSED_DIR)
+
+# 의미 기반 답변 캐시 (대화 기록이 없는 첫 질문에만 사용, 인덱스 버전이 바뀌면 비움)
+answer_cache = configured_answer_cache(lambda: read_index_version(DB_DIR, collection_name))
+
 # === LangGraph State 정의 ===
 class GraphState(TypedDict):
     """그래프 상태"""
     query: str
+    query_embedding: List[float]
     relevant_docs: List[Dict[str, Any]]
     context: str
     answer: str
@@ -75,38 +93,42 @@ class GraphState(TypedDict):
     messages: List[BaseMessage] # 대화 기록
 
 # === 노드 함수들 ===
+def article_lookup_node(state: GraphState) -> GraphState:
+    """조문 번호 조회 노드 (질문에 제N조(의M)가 있고 색인에 있으면 그 조문 청크를 검색 결과로 사용)"""
+    relevant_docs = article_index.lookup(state["query"])
+    if relevant_docs:
+        logger.info(f"조문 직접 조회: {[doc['id'] for doc in relevant_docs]}")
+    return {
+        **state,
+        "query_embedding": [],
+        "relevant_docs": relevant_docs,
+        "num_sources": len(relevant_docs)
+    }
+
+def route_after_article_lookup(state: GraphState) -> str:
+    """조문을 찾았으면 바로 컨텍스트 포맷팅, 아니면 임베딩 검색"""
+    return "format_context" if state["relevant_docs"] else "search"
+
 def search_node(state: GraphState) -> GraphState:
     """문서 검색 노드"""
     query = state["query"]
     n_results = 5
     
-    # 쿼리 임베딩 생성
-    query_embedding = embeddings.embed_query(query)
+    # 쿼리 임베딩 생성 (자주 나오는 질문은 질문 임베딩 캐시에서)
+    query_embedding = query_cache.embed(query)
     
-    # 벡터 검색
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=n_results,
-        include=['documents', 'metadatas', 'distances']
-    )
-    
-    # 결과 정리
-    relevant_docs = []
-    if results['documents'] and len(results['documents'][0]) > 0:
-        for i, (doc, metadata, distance) in enumerate(zip(
-            results['documents'][0],
-            results['metadatas'][0],
-            results['distances'][0]
-        )):
-            relevant_docs.append({
-                'text': doc,
-                'metadata': metadata,
-                'distance': distance,
-                'rank': i + 1
-            })
+    # 질문이 속한 카테고리 파티션만 검색 (None이면 전체)
+    categories = partition_router.route(query, query_embedding) if partition_router else None
+    if categories:
+        logger.info(f"검색 파티션: {categories}")
+
+    # 벡터 검색 + BM25 검색을 RRF로 합침 (결과: [{"id", "text", "metadata", "rank", ...}, ...])
+    relevant_docs = hybrid_query(search_backend, lexical_index, query, query_embedding, n_results,
+                                 categories=categories)
     
     return {
         **state,
+        "query_embedding": query_embedding,
         "relevant_docs": relevant_docs,
         "num_sources": len(relevant_docs)
     }
@@ -149,6 +171,12 @@ def generate_node(state: GraphState) -> GraphState:
     query = state["query"]
     context = state["context"]
     
+    # 대화 기록이 없는 단일 턴 질문이면 같은 문서를 근거로 한 비슷한 질문의 답변을 재사용
+    # (조문 직접 조회는 질문 임베딩이 없으므로 캐시하지 않음)
+    single_turn = not state.get("messages") and bool(state.get("query_embedding"))
+    doc_ids = [doc['id'] for doc in state["relevant_docs"]]
+    cached = answer_cache.lookup(state["query_embedding"], doc_ids) if single_turn else None
+    
     system_prompt = """당신은 'well-dying(존엄한 삶의 마무리)'을 주제로 사용자에게 정보와 정서적 안정감을 제공하는 챗봇입니다.
 사용자의 질문에 대해 제공된 법률 문서와 안내 자료를 바탕으로 정확하고 친절하게 답변해주세요.
 
@@ -199,17 +227,22 @@ def generate_node(state: GraphState) -> GraphState:
 문서 기반 정보와 일반 지식을 구분하여 명확하게 답변해주세요."""
 
     try:
-        # 대화 기록이 있으면 포함
-        messages = [SystemMessage(content=system_prompt)]
-        
-        # 이전 대화 기록 추가 (최근 5개만)
-        if "messages" in state and state["messages"]:
-            messages.extend(state["messages"][-5:])
+        if cached is not None:
+            answer = cached["answer"]
+        else:
+            # 대화 기록이 있으면 포함
+            messages = [SystemMessage(content=system_prompt)]
             
-        messages.append(HumanMessage(content=user_prompt))
-        
-        response = llm.invoke(messages)
-        answer = response.content
+            # 이전 대화 기록 추가 (최근 5개만)
+            if "messages" in state and state["messages"]:
+                messages.extend(state["messages"][-5:])
+                
+            messages.append(HumanMessage(content=user_prompt))
+            
+            response = llm.invoke(messages)
+            answer = response.content
+            if single_turn:
+                answer_cache.store(state["query_embedding"], doc_ids, {"answer": answer})
     except Exception as e:
         logger.error(f"답변 생성 중 오류 발생: {e}")
         answer = f"오류가 발생했습니다: {e}"
@@ -234,12 +267,17 @@ def create_rag_graph():
     workflow = StateGraph(GraphState)
     
     # 노드 추가
+    workflow.add_node("article_lookup", article_lookup_node)
     workflow.add_node("search", search_node)
     workflow.add_node("format_context", format_context_node)
     workflow.add_node("generate", generate_node)
     
     # 엣지 추가
-    workflow.set_entry_point("search")
+    workflow.set_entry_point("article_lookup")
+    workflow.add_conditional_edges(
+        "article_lookup", route_after_article_lookup,
+        {"format_context": "format_context", "search": "search"}
+    )
     workflow.add_edge("search", "format_context")
     workflow.add_edge("format_context", "generate")
     workflow.add_edge("generate", END)
@@ -276,6 +314,7 @@ def chat(query: str, n_results: int = 5, thread_id: str = "default_thread") -> d
     
     initial_state = {
         "query": query,
+        "query_embedding": [],
         "relevant_docs": [],
         "context": "",
         "answer": "",
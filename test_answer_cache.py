@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+from answer_cache import SemanticAnswerCache
+from indexing import bump_index_version, read_index_version
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestSemanticAnswerCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_hit_needs_similar_query_and_same_documents(self):
+        cache = SemanticAnswerCache(threshold=0.95, clock=self.clock)
+        answer = {"answer": "상속개시일이 속하는 달의 말일부터 6개월 이내", "sources": [{"source": "법.pdf"}]}
+        cache.store([1.0, 0.0, 0.1], ["law_0067", "tax_0003"], answer)
+
+        # 문서 순서는 상관없고, 돌려받은 답변을 고쳐도 캐시는 그대로
+        hit = cache.lookup([1.0, 0.02, 0.1], ["tax_0003", "law_0067"])
+        self.assertEqual(hit, answer)
+        hit["answer"] = "수정"
+        self.assertEqual(cache.lookup([2.0, 0.0, 0.2], ["law_0067", "tax_0003"]), answer)
+
+        self.assertIsNone(cache.lookup([1.0, 0.02, 0.1], ["law_0067"]))   # 근거 문서가 다름
+        self.assertIsNone(cache.lookup([0.0, 1.0, 0.0], ["law_0067", "tax_0003"]))   # 다른 질문
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["near_misses"]), (2, 2, 1))
+
+    def test_ttl_lru_and_index_version(self):
+        with tempfile.TemporaryDirectory() as db_dir:
+            self.assertIsNone(read_index_version(db_dir, "c"))
+            cache = SemanticAnswerCache(max_entries=2, ttl=60, clock=self.clock,
+                                        version_fn=lambda: read_index_version(db_dir, "c"))
+            cache.store([1.0, 0.0], ["a"], {"answer": "A"})
+            cache.store([0.0, 1.0], ["b"], {"answer": "B"})
+            self.assertIsNotNone(cache.lookup([1.0, 0.0], ["a"]))   # A를 최근 사용
+            cache.store([1.0, 1.0], ["c"], {"answer": "C"})          # B가 밀려남
+            self.assertIsNone(cache.lookup([0.0, 1.0], ["b"]))
+            self.assertEqual(cache.stats()["evictions"], 1)
+
+            self.clock.now = 61
+            self.assertIsNone(cache.lookup([1.0, 0.0], ["a"]))
+            self.assertEqual(cache.stats()["expired"], 2)
+
+            cache.store([1.0, 0.0], ["a"], {"answer": "A"})
+            bump_index_version(db_dir, "other")
+            self.assertIsNotNone(cache.lookup([1.0, 0.0], ["a"]))   # 다른 컬렉션의 버전은 무관
+            version = bump_index_version(db_dir, "c")
+            self.assertEqual(read_index_version(db_dir, "c"), version)
+            self.assertIsNone(cache.lookup([1.0, 0.0], ["a"]))
+            self.assertEqual(cache.stats()["invalidations"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from article_lookup import ArticleIndex, parse_article_refs
+
+def write_articles(path: Path, source: str, category: str, articles: list):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, (article_id, sub_chunk) in enumerate(articles):
+            record = {"id": f"{path.stem}_{i:04d}", "title": f"조문 {article_id}", "source": source,
+                      "category": category, "article_id": article_id,
+                      "text": f"{source} {article_id} 본문입니다. 상속과 관련된 규정을 담고 있습니다."}
+            if sub_chunk is not None:
+                record["sub_chunk"] = sub_chunk
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+class TestParseArticleRefs(unittest.TestCase):
+    def test_statute_and_article_forms(self):
+        self.assertEqual(parse_article_refs("민법 제1112조 알려줘"), [("법령_민법_상속", "제1112조")])
+        self.assertEqual(parse_article_refs("상속세 및 증여세법 제 18 조의 2는?"), [("법령_상속세증여세", "제18조의2")])
+        self.assertEqual(parse_article_refs("제1조"), [(None, "제1조")])
+        self.assertEqual(parse_article_refs("민법 1112조와 1113조, 상증법 제18조"), [
+            ("법령_민법_상속", "제1112조"), ("법령_민법_상속", "제1113조"), ("법령_상속세증여세", "제18조"),
+        ])
+        # "제"도 법령 이름도 없는 숫자+조는 금액일 수 있으므로 무시
+        self.assertEqual(parse_article_refs("상속재산이 10조 원이면 세금은?"), [])
+        # 법령 이름이 질문에 있어도 바로 앞이 아니거나 금액 단위가 붙으면 조문이 아님
+        self.assertEqual(parse_article_refs("상속세법상 재산이 1조 원이면 세율은?"), [])
+        self.assertEqual(parse_article_refs("상속재산 2조 원일 때 상속세 및 증여세법 계산"), [])
+        self.assertEqual(parse_article_refs("민법상 유류분, 재산 3조 원"), [])
+        self.assertEqual(parse_article_refs("민법 3조 원"), [])
+        self.assertEqual(parse_article_refs("유류분이 뭐야?"), [])
+
+class TestArticleIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        write_articles(self.dir / "civil.jsonl", "민법.pdf", "법령_민법_상속", [("제1112조", None), ("제1조", None)])
+        # 다른 조문 뒤에 다시 나온 제1조(civil의 제1조, tax의 마지막 제1조)부터는 부칙
+        write_articles(self.dir / "tax.jsonl", "상증법.pdf", "법령_상속세증여세",
+                       [("제1조", None), ("제18조", None), ("제18조의2", 2), ("제18조의2", 1), ("제1조", None)])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup_by_article_id(self):
+        index = ArticleIndex(self.dir, check_interval=None)
+        docs = index.lookup("상속세법 제18조의2")
+        self.assertEqual([doc["metadata"]["sub_chunk"] for doc in docs], ["1", "2"])
+        self.assertEqual([doc["rank"] for doc in docs], [1, 2])
+        self.assertEqual(index.chunk_ids("법령_민법_상속", "제1112조"), ["civil_0000"])
+        # 법령 이름이 없으면 그 번호가 있는 모든 법령, 법령 이름이 있으면 그 법령만
+        self.assertEqual(sorted(doc["id"] for doc in index.lookup("부칙 제1조")), ["civil_0001", "tax_0004"])
+        self.assertEqual(index.lookup("민법 제18조"), [])
+        # 부칙 조문은 질문에 "부칙"이 있을 때만
+        self.assertEqual([doc["id"] for doc in index.lookup("상속세및증여세법 제1조")], ["tax_0000"])
+        self.assertEqual([doc["id"] for doc in index.lookup("제1조")], ["tax_0000"])
+        self.assertEqual(index.lookup("민법 제1조"), [])
+        self.assertEqual([doc["id"] for doc in index.lookup("민법 부칙 제1조")], ["civil_0001"])
+
+        write_articles(self.dir / "civil.jsonl", "민법.pdf", "법령_민법_상속", [("제1113조", None)])
+        self.assertTrue(index.refresh())
+        self.assertEqual(len(index.lookup("민법 제1113조")), 1)
+        self.assertEqual(index.lookup("민법 제1112조"), [])
+
+if __name__ == '__main__':
+    unittest.main()
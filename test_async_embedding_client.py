@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import openai
+from async_embedding_client import AsyncEmbeddingClient, TokenBucket, retry_after_seconds
+
+class StubEmbeddingServer:
+    """
+    /v1/embeddings 스텁 서버
+    responses에 (상태 코드, 헤더)를 넣어 두면 앞 요청부터 차례로 그 오류를 돌려주고,
+    다 쓰면 [글자 수, 입력 순번] 벡터를 (순서를 뒤집어) 돌려줍니다.
+    """
+
+    def __init__(self, responses=(), delay: float = 0.02):
+        self.responses = list(responses)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    scripted = stub.responses.pop(0) if stub.responses else None
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.in_flight -= 1
+                if scripted:
+                    status, headers = scripted
+                    payload = json.dumps({"error": {"message": "stub", "type": "stub"}}).encode()
+                    self.send_response(status)
+                    for key, value in headers.items():
+                        self.send_header(key, value)
+                else:
+                    data = [{"object": "embedding", "index": i, "embedding": [float(len(t)), float(i)]}
+                            for i, t in enumerate(body["input"])]
+                    payload = json.dumps({"object": "list", "data": data[::-1], "model": body["model"],
+                                          "usage": {"prompt_tokens": 1, "total_tokens": 1}}).encode()
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class TestAsyncEmbeddingClient(unittest.TestCase):
+    def client(self, stub, **kwargs):
+        return AsyncEmbeddingClient(api_key="test", base_url=stub.base_url, base_delay=0.01, **kwargs)
+
+    def test_concurrent_batches_keep_input_order(self):
+        stub = StubEmbeddingServer()
+        try:
+            client = self.client(stub, max_in_flight=3, max_inputs=2)
+            texts = ["가" * n for n in range(1, 12)]
+            vectors = client.embed_sync(texts)
+        finally:
+            stub.close()
+        self.assertEqual([v[0] for v in vectors], [float(n) for n in range(1, 12)])
+        self.assertEqual(stub.requests, 6)
+        self.assertLessEqual(stub.max_in_flight, 3)
+        self.assertGreater(stub.max_in_flight, 1)
+        self.assertEqual(client.stats["inputs"], 11)
+
+    def test_concurrent_calls_share_in_flight_limit(self):
+        stub = StubEmbeddingServer()
+        try:
+            client = self.client(stub, max_in_flight=2, max_inputs=1)
+
+            async def run():
+                return await asyncio.gather(*(client.embed([f"파일{i}-{j}" for j in range(3)]) for i in range(3)))
+
+            results = asyncio.run(run())
+        finally:
+            stub.close()
+        self.assertEqual(len(results), 3)
+        self.assertEqual(stub.requests, 9)
+        self.assertEqual(stub.max_in_flight, 2)
+
+    def test_elapsed_counts_overlapping_calls_once(self):
+        stub = StubEmbeddingServer(delay=0.1)
+        try:
+            client = self.client(stub, max_in_flight=4)
+
+            async def run():
+                start = time.perf_counter()
+                await asyncio.gather(*(client.embed([f"파일{i}"]) for i in range(4)))
+                return time.perf_counter() - start
+
+            wall = asyncio.run(run())
+        finally:
+            stub.close()
+        # 네 호출이 겹쳐 실행되었으므로 호출별 시간의 합(약 0.4초)이 아니라 실제 경과 시간
+        self.assertGreaterEqual(client.stats["elapsed_s"], 0.1)
+        self.assertLessEqual(client.stats["elapsed_s"], wall)
+        self.assertLess(client.stats["elapsed_s"], 0.3)
+
+    def test_retries_rate_limit_and_server_errors(self):
+        stub = StubEmbeddingServer([
+            (429, {"Retry-After": "0.05"}),
+            (429, {"Retry-After-Ms": "20"}),
+            (503, {}),
+        ])
+        try:
+            client = self.client(stub, max_in_flight=1)
+            start = time.perf_counter()
+            self.assertEqual(client.embed_sync(["가나"]), [[2.0, 0.0]])
+            elapsed = time.perf_counter() - start
+        finally:
+            stub.close()
+        self.assertEqual(client.stats["retries"], 3)
+        self.assertEqual(client.stats["rate_limited"], 2)
+        self.assertEqual(client.stats["server_errors"], 1)
+        self.assertGreaterEqual(elapsed, 0.07)
+        self.assertIn("재시도 3회", client.report())
+
+    def test_gives_up_on_client_errors_and_after_max_retries(self):
+        stub = StubEmbeddingServer([(400, {})] + [(500, {})] * 3)
+        try:
+            with self.assertRaises(openai.BadRequestError):
+                self.client(stub).embed_sync(["가"])
+            with self.assertRaises(openai.InternalServerError):
+                self.client(stub, max_retries=2).embed_sync(["가"])
+        finally:
+            stub.close()
+        self.assertEqual(stub.requests, 4)
+
+class TestTokenBucket(unittest.TestCase):
+    def test_waits_for_refill(self):
+        bucket = TokenBucket(rate_per_minute=6000)  # 초당 100
+        bucket.tokens = 0
+        start = time.perf_counter()
+        waited = asyncio.run(bucket.acquire(10))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+        self.assertGreater(waited, 0)
+
+    def test_retry_after_parsing(self):
+        self.assertEqual(retry_after_seconds({"retry-after": "2"}), 2.0)
+        self.assertEqual(retry_after_seconds({"retry-after-ms": "250", "retry-after": "2"}), 0.25)
+        self.assertIsNone(retry_after_seconds({}))
+        self.assertEqual(retry_after_seconds({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import asyncio
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+import chromadb
+from chromadb.config import Settings
+from build import BuildPipeline
+from indexing import SOURCE_FILE_KEY, load_jsonl_records
+from preprocess_pdfs import files_config
+
+class SlowProvider:
+    """배치마다 잠깐 기다렸다가 [글자 수, 1] 벡터를 돌려주는 가짜 임베딩 제공자"""
+    remote = False
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.calls = []
+
+    async def aembed(self, texts):
+        self.calls.append(len(texts))
+        await asyncio.sleep(self.delay)
+        return [[float(len(t)), 1.0] for t in texts]
+
+class TestBuildPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out_dir = Path(self.tmp.name)
+        client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+        self.collection = client.create_collection(name=f"test_{uuid.uuid4().hex}")
+        # 조문 26개짜리 작은 법령 PDF
+        self.files = [cfg for cfg in files_config if cfg["id_prefix"] == "rule"]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_pipeline(self, provider, **options):
+        pipeline = BuildPipeline(self.collection, provider, out_dir=self.out_dir, workers=1, **options)
+        return pipeline, asyncio.run(pipeline.run(self.files))
+
+    def test_streams_into_collection_with_backpressure(self):
+        provider = SlowProvider()
+        pipeline, totals = self.run_pipeline(provider, batch_size=2, queue_size=1, embed_concurrency=1)
+
+        ids, _, _ = load_jsonl_records(self.out_dir / self.files[0]["out_name"])
+        self.assertEqual(totals["added"], len(ids))
+        self.assertEqual(sorted(self.collection.get()["ids"]), sorted(ids))
+        self.assertEqual(provider.calls, [2] * (len(ids) // 2) + [1] * (len(ids) % 2))
+        # 임베딩이 느리면 청킹 스테이지가 가득 찬 큐 앞에서 기다림
+        self.assertGreater(pipeline.stats["chunk"].blocked_s, 0)
+        self.assertEqual(pipeline.stats["store"].chunks, len(ids))
+        self.assertIn("chunks/s", pipeline.report())
+
+        provider = SlowProvider()
+        _, totals = self.run_pipeline(provider)
+        self.assertEqual(totals["unchanged"], len(ids))
+        self.assertEqual(provider.calls, [])
+
+    def test_keeps_the_same_jsonl_file_invariants_as_index_data(self):
+        out_name = self.files[0]["out_name"]
+        self.run_pipeline(SlowProvider(0))
+        ids, _, _ = load_jsonl_records(self.out_dir / out_name)
+        stored = self.collection.get(include=["metadatas"])
+        self.assertEqual({m[SOURCE_FILE_KEY] for m in stored["metadatas"]}, {out_name})
+
+        # 이전 버전으로 인덱싱한 청크(jsonl_file 없음), 이 파일에서 사라진 청크(source도 다름),
+        # 다른 파일로 옮겨 간 청크(source는 같지만 jsonl_file이 다름)
+        metadata = stored["metadatas"][0]
+        untagged = {k: v for k, v in metadata.items() if k != SOURCE_FILE_KEY}
+        self.collection.update(ids=[ids[0]], metadatas=[untagged])
+        self.collection.add(
+            ids=["gone_0001", "moved_0001"], embeddings=[[1.0, 1.0], [1.0, 1.0]], documents=["사라진", "옮겨 간"],
+            metadatas=[{**metadata, "source": "예전.pdf", "content_hash": "x"},
+                       {**metadata, SOURCE_FILE_KEY: "other.jsonl", "content_hash": "x"}],
+        )
+
+        provider = SlowProvider(0)
+        _, totals = self.run_pipeline(provider)
+        self.assertEqual(provider.calls, [])
+        self.assertEqual(totals["deleted"], 1)
+        self.assertEqual(sorted(self.collection.get()["ids"]), sorted(ids + ["moved_0001"]))
+        self.assertEqual(self.collection.get(ids=[ids[0]])["metadatas"][0][SOURCE_FILE_KEY], out_name)
+
+if __name__ == '__main__':
+    unittest.main()
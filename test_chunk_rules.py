@@ -0,0 +1,100 @@
+import re
+import random
+import unittest
+from preprocess_pdfs import clean_chunk_text, remove_control_chars, CHUNK_RULE_HITS
+
+# 기준 구현 (고치지 말 것 - 새 구현이 이 결과와 같아야 함)
+def legacy_remove_control_chars(text: str) -> str:
+    """기존 구현: 문자마다 코드 포인트 범위를 확인"""
+    result = []
+    for char in text:
+        code = ord(char)
+        if char in '\n\t\r':
+            result.append(char)
+        elif code < 32 or (127 <= code <= 159):
+            continue
+        elif 0xE000 <= code <= 0xF8FF:
+            continue
+        else:
+            result.append(char)
+    return ''.join(result)
+
+def legacy_chunk_rules(text: str) -> str:
+    """규칙 엔진 도입 전의 clean_chunk_text re.sub 체인 (결과 비교용 기준 구현)"""
+    text = re.sub(r'([가-힣])\n+([가-힣])', r'\1\2', text)
+    text = re.sub(r'(\d)\n+(\d)', r'\1\2', text)
+    text = re.sub(r'(\d+)[\^&\*]', r'\1', text)
+    text = re.sub(r'상속민법권', '상속권', text)
+    text = re.sub(r'상속민법', '상속', text)
+    text = re.sub(r'([가-힣\d])\n+민법\s+([①②③④⑤⑥⑦⑧⑨⑩]|\d)', r'\1\n\n\2', text)
+    text = re.sub(r'([가-힣\d])\s+민법\s+([①②③④⑤⑥⑦⑧⑨⑩]|\d)', r'\1 \2', text)
+    text = re.sub(r'\n+민법\s+([①②③④⑤⑥⑦⑧⑨⑩]|\d)', r'\n\n\1', text)
+    text = re.sub(r'0분의\s*10\b', '100분의 10', text)
+    text = re.sub(r'0분의\s*100\b', '100분의 100', text)
+    text = re.sub(r'10100분의\s*10\b', '100분의 10', text)
+    text = re.sub(r'100\s*분의\s*10\b', '__PROTECT_100분의10__', text)
+    text = re.sub(r'100\s*분의\s*100\b', '__PROTECT_100분의100__', text)
+    text = re.sub(r'100분의\s*10\b', '__PROTECT_100분의10__', text)
+    text = re.sub(r'100분의\s*100\b', '__PROTECT_100분의100__', text)
+
+    def split_fraction(match):
+        full_match = match.group(0)
+        if '__PROTECT_' in full_match:
+            return full_match
+        if full_match.startswith('100분의 1') or full_match.startswith('100분의1'):
+            return full_match
+        return re.sub(r'(\d+분의\s*1)(\d+)', r'\1\n\n\2', full_match)
+
+    text = re.sub(r'\d+분의\s*1\d+', split_fraction, text)
+    text = text.replace('__PROTECT_100분의10__', '100분의 10')
+    text = text.replace('__PROTECT_100분의100__', '100분의 100')
+    text = re.sub(r'100분의\s*1\n+\s*00', '100분의 100', text)
+    text = re.sub(r'100분의\s*1\s+00', '100분의 100', text)
+    text = re.sub(r'100분의\s*1\n+\s*0([^\d]|$)', r'100분의 10\1', text)
+    text = re.sub(r'100분의\s*1\s+0([^\d]|$)', r'100분의 10\1', text)
+    text = re.sub(r'100분의\s*1\n+\s*0(\d)', r'100분의 10\1', text)
+    text = re.sub(r'100분의\s*1\s+0(\d)', r'100분의 10\1', text)
+    text = re.sub(r'100분의\s*20(\d+)', r'100분의 20\n\n\1', text)
+    text = re.sub(r'및([가-힣])', r'및 \1', text)
+    return re.sub(r' {3,}', '  ', text)
+
+def legacy_clean_chunk_text(text: str) -> str:
+    """규칙 엔진 도입 전의 clean_chunk_text"""
+    return legacy_chunk_rules(remove_control_chars(text)).strip()
+
+class TestRemoveControlChars(unittest.TestCase):
+    def test_matches_legacy_loop_on_bmp(self):
+        text = "".join(chr(c) for c in range(0x10000) if not 0xD800 <= c < 0xE000)
+        self.assertEqual(remove_control_chars(text), legacy_remove_control_chars(text))
+
+    def test_keeps_newline_tab_cr(self):
+        self.assertEqual(remove_control_chars("가\x00\n\t\r\x85\ue000나"), "가\n\t\r나")
+
+class TestChunkRules(unittest.TestCase):
+    def test_known_fixes(self):
+        self.assertEqual(clean_chunk_text("상속민법권 및제1항"), "상속권 및 제1항")
+        self.assertEqual(clean_chunk_text("2분의 12. 다음"), "2분의 1\n\n2. 다음")
+        self.assertEqual(clean_chunk_text("100 분의10 을"), "100분의 10 을")
+        self.assertEqual(clean_chunk_text("5분의 1100분의 10"), "5분의 1100분의 10")
+        # 보호 구간과 분리 구간이 겹치는 경우도 보호 → 분리 → 복원 순서의 결과와 같아야 함
+        for text in ("100분의 100 분의10", "100 분의 100 분의 10 이내"):
+            self.assertEqual(clean_chunk_text(text), legacy_clean_chunk_text(text), repr(text))
+        self.assertEqual(clean_chunk_text("100분의 100 분의10"), "10100분의 100분의 10")
+
+    def test_matches_legacy_chain_on_random_text(self):
+        # 규칙끼리 겹치는 경우를 많이 만들도록 규칙에 나오는 토큰만 섞음
+        tokens = ["가", "상속", "민법", "권", "100", "10", "0", "1", "2", "20", "분의",
+                  "100 분의", " ", "   ", "\n", "\n\n", "\t", "\x85", "^", "및", "①", ".", "을", "\x01"]
+        rng = random.Random(0)
+        for _ in range(50000):
+            text = "".join(rng.choice(tokens) for _ in range(rng.randint(1, 16)))
+            self.assertEqual(clean_chunk_text(text), legacy_clean_chunk_text(text), repr(text))
+
+    def test_rule_hits_are_counted(self):
+        CHUNK_RULE_HITS.clear()
+        clean_chunk_text("상속민법 및제 상속민법권")
+        self.assertEqual(CHUNK_RULE_HITS["상속민법"], 2)
+        self.assertEqual(CHUNK_RULE_HITS["및_공백"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
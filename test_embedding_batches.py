@@ -0,0 +1,16 @@
+import unittest
+from embedding_batches import MAX_TOKENS_PER_INPUT, iter_request_batches
+
+class TestRequestBatches(unittest.TestCase):
+    def test_respects_input_and_token_limits(self):
+        texts = ["가" * n for n in (5, 5, 5, 5, 5, 12, 1)]
+        self.assertEqual(list(iter_request_batches(texts, max_inputs=3, max_tokens=15)),
+                         [(0, 3), (3, 5), (5, 7)])
+        self.assertEqual(list(iter_request_batches([])), [])
+
+    def test_rejects_input_over_token_limit(self):
+        with self.assertRaises(ValueError):
+            list(iter_request_batches(["가" * (MAX_TOKENS_PER_INPUT + 1)]))
+
+if __name__ == '__main__':
+    unittest.main()
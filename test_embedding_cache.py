@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+from pathlib import Path
+from embedding_cache import EmbeddingCache
+
+class CountingEmbedder:
+    """받은 텍스트를 기록하고 [길이, 첫 글자 코드] 벡터를 돌려주는 가짜 임베딩 함수"""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), float(ord(t[0]))] for t in texts]
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "cache.sqlite3"
+        self.cache = EmbeddingCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_only_missing_texts_are_embedded(self):
+        embed = CountingEmbedder()
+        first = self.cache.embed(["가", "나나", "가"], embed, "m")
+        self.assertEqual(first, [[1.0, 44032.0], [2.0, 45208.0], [1.0, 44032.0]])
+        self.assertEqual(embed.calls, [["가", "나나"]])
+
+        self.assertEqual(self.cache.embed(["나나", "다"], embed, "m")[0], [2.0, 45208.0])
+        self.assertEqual(embed.calls[-1], ["다"])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 4))
+
+    def test_key_includes_model_and_dimensions(self):
+        embed = CountingEmbedder()
+        self.cache.embed(["가"], embed, "m")
+        self.cache.embed(["가"], embed, "m", dimensions=256)
+        self.cache.embed(["가"], embed, "other")
+        self.assertEqual(len(embed.calls), 3)
+
+    def test_persists_across_instances(self):
+        self.cache.embed(["가"], CountingEmbedder(), "m")
+        reopened = EmbeddingCache(self.path)
+        embed = CountingEmbedder()
+        self.assertEqual(reopened.embed_one("가", lambda t: embed([t])[0], "m"), [1.0, 44032.0])
+        self.assertEqual(embed.calls, [])
+        reopened.close()
+
+    def test_evicts_least_recently_used(self):
+        self.cache.max_bytes = 8 * 3  # float32 2개짜리 벡터 3개
+        embed = CountingEmbedder()
+        self.cache.embed(["가", "나", "다"], embed, "m")
+        self.cache.embed(["가"], embed, "m")       # "가"를 최근 사용으로
+        self.cache.embed(["라"], embed, "m")       # 초과 → "나"부터 삭제
+        self.assertTrue(self.cache.evictions >= 1)
+        self.assertLessEqual(self.cache.stats()["bytes"], 8 * 3)
+        before = len(embed.calls)
+        self.cache.embed(["가"], embed, "m")
+        self.assertEqual(len(embed.calls), before)
+
+if __name__ == '__main__':
+    unittest.main()
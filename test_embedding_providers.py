@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import numpy as np
+from embedding_cache import EmbeddingCache
+from embedding_providers import (
+    BASE_COLLECTION_NAME, HashedNgramEmbeddingProvider, OpenAIEmbeddingProvider,
+    get_embedding_provider, collection_name_for, embed_cached,
+)
+
+class TestHashedNgramEmbeddingProvider(unittest.TestCase):
+    def setUp(self):
+        self.provider = HashedNgramEmbeddingProvider(dimensions=256)
+
+    def test_deterministic_across_processes(self):
+        text = "상속인은 상속개시된 때로부터 피상속인의 재산에 관한 포괄적 권리의무를 승계한다."
+        vector = self.provider.embed_query(text)
+        code = ("from embedding_providers import HashedNgramEmbeddingProvider;"
+                f"print(HashedNgramEmbeddingProvider(dimensions=256).embed_query({text!r}))")
+        other = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                               cwd=Path(__file__).parent, env={**os.environ, "PYTHONHASHSEED": "123"})
+        self.assertEqual(eval(other.stdout), vector)
+
+    def test_unit_length_and_normalized_text(self):
+        vectors = np.array(self.provider.embed(["상속  포기\n신고", "상속 포기 신고", "ＡＢＣ", "abc", "", " "]))
+        self.assertEqual(vectors.shape, (6, 256))
+        np.testing.assert_allclose(np.linalg.norm(vectors[:4], axis=1), 1.0, rtol=1e-5)
+        np.testing.assert_array_equal(vectors[0], vectors[1])
+        np.testing.assert_array_equal(vectors[2], vectors[3])
+        self.assertFalse(vectors[4:].any())
+
+    def test_shared_ngrams_rank_higher(self):
+        query, near, far = self.provider.embed_array([
+            "상속을 포기하려면",
+            "상속인은 상속개시 있음을 안 날부터 3월내에 상속을 포기할 수 있다.",
+            "증여세 과세표준은 증여재산가액에서 공제액을 뺀 금액으로 한다.",
+        ])
+        self.assertGreater(query @ near, query @ far)
+
+class TestProviderSelection(unittest.TestCase):
+    def test_environment_selects_provider(self):
+        with mock.patch.dict(os.environ, {"EMBEDDING_PROVIDER": "local", "EMBEDDING_DIMENSIONS": "64"}):
+            provider = get_embedding_provider()
+        self.assertIsInstance(provider, HashedNgramEmbeddingProvider)
+        self.assertEqual(provider.dimensions, 64)
+        with mock.patch.dict(os.environ, {"EMBEDDING_PROVIDER": "", "EMBEDDING_MODEL": ""}):
+            provider = get_embedding_provider(api_key="test")
+        self.assertIsInstance(provider, OpenAIEmbeddingProvider)
+        self.assertEqual(collection_name_for(provider), BASE_COLLECTION_NAME)
+        with self.assertRaises(ValueError):
+            get_embedding_provider("word2vec")
+
+    def test_collection_name_per_model(self):
+        name = collection_name_for(HashedNgramEmbeddingProvider(dimensions=64))
+        self.assertEqual(name, "well_dying_legacy_data__hashed-char-ngram-1-3-d64")
+        self.assertEqual(collection_name_for(OpenAIEmbeddingProvider("text-embedding-3-large", api_key="test")),
+                         "well_dying_legacy_data__text-embedding-3-large")
+
+    def test_only_remote_providers_use_the_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = EmbeddingCache(Path(tmp) / "cache.sqlite3")
+            try:
+                embed_cached(HashedNgramEmbeddingProvider(dimensions=8), ["가나"], cache)
+                self.assertEqual(cache.stats()["entries"], 0)
+
+                remote = mock.Mock(remote=True, model="m", dimensions=None)
+                remote.embed.return_value = [[1.0, 2.0]]
+                self.assertEqual(embed_cached(remote, ["가나"], cache), [[1.0, 2.0]])
+                self.assertEqual(embed_cached(remote, ["가나"], cache), [[1.0, 2.0]])
+                remote.embed.assert_called_once_with(["가나"])
+            finally:
+                cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import json
+import asyncio
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+import chromadb
+from chromadb.config import Settings
+from indexing import IndexJournal, prune_missing_files, sync_jsonl_file, sync_jsonl_files
+
+def write_records(path: Path, texts: dict, source: str = "법.pdf"):
+    with open(path, "w", encoding="utf-8") as f:
+        for doc_id, text in texts.items():
+            record = {"id": doc_id, "title": doc_id, "text": text, "source": source, "category": "법령"}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+class SyncTestCase(unittest.TestCase):
+    """임시 JSONL 경로와 메모리 컬렉션, 호출을 기록하는 가짜 임베딩 함수"""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "law.jsonl"
+        client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+        self.collection = client.create_collection(f"test_{uuid.uuid4().hex}")
+        self.embedded = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def embed(self, texts):
+        self.embedded.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+class TestIncrementalSync(SyncTestCase):
+    def test_only_changes_are_written(self):
+        body = "상속인은 상속개시 있음을 안 날부터 3월내에 단순승인이나 한정승인 또는 포기를 할 수 있다."
+        write_records(self.path, {f"law_{i:04d}": f"{body} ({i})" for i in range(1, 6)})
+        self.assertEqual(sync_jsonl_file(self.collection, self.path, self.embed),
+                         {"added": 5, "updated": 0, "unchanged": 0, "deleted": 0})
+
+        # 다시 실행하면 아무것도 임베딩하지 않음
+        self.assertEqual(sync_jsonl_file(self.collection, self.path, self.embed)["unchanged"], 5)
+        self.assertEqual(len(self.embedded), 1)
+
+        # 청크 수가 줄고(4, 5 삭제) 하나가 바뀌고 하나가 새로 생김
+        records = {f"law_{i:04d}": f"{body} ({i})" for i in range(1, 4)}
+        records["law_0002"] += " 개정"
+        records["law_0100"] = f"{body} (새 조문)"
+        write_records(self.path, records)
+        self.assertEqual(sync_jsonl_file(self.collection, self.path, self.embed),
+                         {"added": 1, "updated": 1, "unchanged": 2, "deleted": 2})
+        self.assertEqual(self.embedded[-1], [records["law_0002"], records["law_0100"]])
+        self.assertEqual(sorted(self.collection.get()["ids"]), sorted(records))
+        stored = self.collection.get(ids=["law_0002"], include=["documents"])
+        self.assertEqual(stored["documents"], [records["law_0002"]])
+
+    def test_emptied_and_deleted_files_lose_their_chunks(self):
+        body = "피상속인의 배우자는 그 법정상속분의 2분의 1을 유류분으로 한다."
+        other = Path(self.tmp.name) / "guide.jsonl"
+        write_records(self.path, {f"law_{i:04d}": f"{body} ({i})" for i in range(3)})
+        write_records(other, {f"guide_{i:04d}": f"{body} 안내 ({i})" for i in range(2)}, source="안내.pdf")
+        sync_jsonl_file(self.collection, self.path, self.embed)
+        sync_jsonl_file(self.collection, other, self.embed)
+
+        # 레코드가 모두 사라진 파일: source로는 찾을 수 없어도 jsonl_file로 찾아 지움
+        self.path.write_text("", encoding="utf-8")
+        self.assertEqual(sync_jsonl_file(self.collection, self.path, self.embed),
+                         {"added": 0, "updated": 0, "unchanged": 0, "deleted": 3})
+        self.assertEqual(sorted(self.collection.get()["ids"]), ["guide_0000", "guide_0001"])
+
+        # 파일 자체가 지워진 경우
+        other.unlink()
+        self.assertEqual(prune_missing_files(self.collection, {self.path.name}), 2)
+        self.assertEqual(self.collection.count(), 0)
+
+class CrashingCollection:
+    """upsert를 fail_on번째 호출에서 실패시키는 컬렉션 래퍼 (임베딩 후 add 전에 죽는 상황)"""
+    def __init__(self, collection, fail_on):
+        self.collection = collection
+        self.fail_on = fail_on
+        self.upserts = 0
+
+    def upsert(self, **kwargs):
+        self.upserts += 1
+        if self.upserts == self.fail_on:
+            raise RuntimeError("killed")
+        return self.collection.upsert(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+class TestResumableSync(SyncTestCase):
+    def test_resume_skips_committed_batches(self):
+        records = {f"law_{i:04d}": f"상속세 과세표준 신고 기한에 관한 조문 본문 {i}" for i in range(1, 8)}
+        write_records(self.path, records)
+        journal_path = Path(self.tmp.name) / "journal.jsonl"
+
+        journal = IndexJournal(journal_path)
+        self.assertFalse(journal.start_run(resume=True))  # 기록 없음 → 새 실행
+        with self.assertRaises(RuntimeError):
+            sync_jsonl_file(CrashingCollection(self.collection, fail_on=2), self.path, self.embed,
+                            batch_size=3, journal=journal)
+        self.assertEqual(self.collection.count(), 3)
+        # 쓰다가 잘린 줄
+        with open(journal_path, "a", encoding="utf-8") as f:
+            f.write('{"event": "batch", "fi')
+
+        resumed = IndexJournal(journal_path)
+        self.assertTrue(resumed.start_run(resume=True))
+        self.assertEqual(resumed.committed_batches(self.path.name, resumed.entries[-1]["sha256"]), {0})
+        counts = sync_jsonl_file(self.collection, self.path, self.embed, batch_size=3, journal=resumed)
+        self.assertEqual(counts, {"added": 4, "updated": 0, "unchanged": 3, "deleted": 0})
+        self.assertEqual(self.embedded[-1], [records[f"law_{i:04d}"] for i in range(4, 8)])
+        self.assertEqual(self.collection.count(), 7)
+        self.assertTrue(resumed.is_file_done(self.path.name, resumed.entries[-1]["sha256"]))
+
+class TestConcurrentSync(SyncTestCase):
+    def test_files_embed_concurrently_and_failures_are_isolated(self):
+        paths = []
+        for n in range(3):
+            path = Path(self.tmp.name) / f"file{n}.jsonl"
+            write_records(path, {f"f{n}_{i:04d}": f"유류분 반환 청구에 관한 조문 본문 {n}-{i}" for i in range(4)},
+                          source=f"{n}.pdf")
+            paths.append(path)
+        bad = Path(self.tmp.name) / "bad.jsonl"
+        bad.write_text("{깨진 줄\n", encoding="utf-8")
+        state = {"in_flight": 0, "max": 0}
+
+        async def aembed(texts):
+            state["in_flight"] += 1
+            state["max"] = max(state["max"], state["in_flight"])
+            await asyncio.sleep(0.05)
+            state["in_flight"] -= 1
+            return self.embed(texts)
+
+        done = []
+        results = asyncio.run(sync_jsonl_files(
+            self.collection, paths + [bad], aembed,
+            on_file_done=lambda path, result, seconds, embedded: done.append((path, embedded))))
+
+        # 파일 세 개의 임베딩이 겹쳐 실행되고, 깨진 파일은 예외로 돌아옴
+        self.assertEqual(state["max"], 3)
+        self.assertEqual([results[p] for p in paths], [{"added": 4, "updated": 0, "unchanged": 0, "deleted": 0}] * 3)
+        self.assertIsInstance(results[bad], Exception)
+        self.assertEqual(sorted(embedded for _, embedded in done), [0, 4, 4, 4])
+        self.assertEqual(self.collection.count(), 12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from lexical_index import LexicalIndex, hybrid_query, ngrams, reciprocal_rank_fusion
+
+def write_records(path: Path, records: dict, category: str = "법령"):
+    with open(path, "w", encoding="utf-8") as f:
+        for doc_id, (title, text) in records.items():
+            record = {"id": doc_id, "title": title, "text": text, "source": path.stem, "category": category}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+class TestLexicalIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.processed = Path(self.tmp.name) / "processed"
+        self.processed.mkdir()
+        self.index_dir = Path(self.tmp.name) / "lexical_index"
+        write_records(self.processed / "tax.jsonl", {
+            "tax_0019": ("배우자 상속공제 제19조", "거주자의 사망으로 상속이 개시되어 배우자가 실제 상속받은 금액을 상속세 과세가액에서 공제한다."),
+            "tax_0013": ("상속세 과세가액 제13조", "상속개시일 전 10년 이내에 피상속인이 상속인에게 증여한 재산가액을 가산한다."),
+            "tax_0067": ("상속세 과세표준신고 제67조", "상속개시일이 속하는 달의 말일부터 6개월 이내에 상속세의 과세가액 및 과세표준을 신고하여야 한다."),
+        })
+        write_records(self.processed / "civil.jsonl", {
+            "civil_1112": ("유류분의 권리자와 유류분 제1112조", "상속인의 유류분은 다음 각호에 의한다. 피상속인의 배우자는 그 법정상속분의 2분의 1"),
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_exact_terms_rank_first_regardless_of_spacing(self):
+        self.assertEqual(ngrams("배우자 상속"), ["배우", "우자", "자상", "상속", "배우자", "우자상", "자상속"])
+        self.assertEqual(ngrams("법?"), ["법"])
+        index = LexicalIndex(self.processed, self.index_dir)
+        self.assertEqual(index.query("배우자상속공제")[0]["id"], "tax_0019")
+        self.assertEqual(index.query("10년 이내 증여")[0]["id"], "tax_0013")
+        self.assertEqual(index.query("쀏쀏"), [])
+        scores = [doc["score"] for doc in index.query("상속세 신고")]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_only_changed_files_are_rebuilt(self):
+        index = LexicalIndex(self.processed, self.index_dir, check_interval=None)
+        self.assertEqual(index.stats["segments_built"], 2)
+        self.assertFalse(index.refresh())
+
+        # 다른 프로세스는 저장된 세그먼트를 읽기만 함
+        self.assertEqual(LexicalIndex(self.processed, self.index_dir).stats["segments_loaded"], 2)
+
+        write_records(self.processed / "civil.jsonl", {
+            "civil_1115": ("유류분의 보전 제1115조", "유류분권리자가 피상속인의 증여 및 유증으로 인하여 그 유류분에 부족이 생긴 때에는 반환을 청구할 수 있다."),
+        })
+        self.assertTrue(index.refresh())
+        self.assertEqual(index.stats["segments_built"], 3)
+        self.assertEqual(index.query("유류분 반환 청구")[0]["id"], "civil_1115")
+        self.assertNotIn("civil_1112", [doc["id"] for doc in index.query("유류분")])
+        self.assertEqual(len(index), 4)
+
+    def test_category_filter_and_fallback(self):
+        write_records(self.processed / "civil.jsonl", {
+            "civil_1112": ("유류분의 권리자와 유류분 제1112조", "피상속인의 배우자는 그 법정상속분의 2분의 1"),
+        }, category="민법")
+        index = LexicalIndex(self.processed, self.index_dir, check_interval=None)
+        self.assertEqual([doc["id"] for doc in index.query("배우자", categories=["민법"])], ["civil_1112"])
+        self.assertNotIn("civil_1112", [doc["id"] for doc in index.query("배우자", categories=["법령"])])
+
+        class Vectors:
+            def query(self, embedding, n_results, categories=None):
+                return []
+        # 고른 파티션에 결과가 없으면 전체 카테고리에서 다시 검색
+        docs = hybrid_query(Vectors(), index, "10년 이내 증여", [0.0], 3, categories=["민법"])
+        self.assertEqual(docs[0]["id"], "tax_0013")
+
+    def test_reciprocal_rank_fusion(self):
+        vector = [{"id": "a", "distance": 0.1}, {"id": "b", "distance": 0.2}, {"id": "c", "distance": 0.3}]
+        lexical = [{"id": "c", "score": 9.0}, {"id": "d", "score": 5.0}]
+        fused = reciprocal_rank_fusion([vector, lexical], n_results=3)
+        self.assertEqual([doc["id"] for doc in fused], ["c", "a", "b"])
+        self.assertEqual(fused[0]["distance"], 0.3)   # 먼저 나온 목록의 항목을 씀
+        self.assertEqual([doc["rank"] for doc in fused], [1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
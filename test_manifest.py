@@ -0,0 +1,100 @@
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import fitz
+import preprocess_pdfs
+from indexing import changed_outputs, read_indexed_outputs, record_indexed_outputs
+
+CFG = {"raw_name": "guide.pdf", "out_name": "guide_simple.jsonl", "mode": "simple",
+       "id_prefix": "guide", "category": "세금_안내"}
+
+def write_pdf(path: Path, lines: list):
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, line in enumerate(lines):
+        page.insert_text((72, 72 + 20 * i), line)
+    doc.save(str(path))
+    doc.close()
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.out = self.base / "processed"
+        self.out.mkdir()
+        write_pdf(self.base / CFG["raw_name"], ["Inheritance tax is filed within six months of the death."] * 8)
+        self.code_version = "v1"
+        manifest_path = self.out / "manifest.json"
+        load_manifest, save_manifest = preprocess_pdfs.load_manifest, preprocess_pdfs.save_manifest
+        for name, value in (("BASE_DIR", self.base), ("OUT_DIR", self.out), ("files_config", [CFG]),
+                            ("load_manifest", lambda: load_manifest(manifest_path)),
+                            ("save_manifest", lambda manifest: save_manifest(manifest, manifest_path))):
+            patcher = mock.patch.object(preprocess_pdfs, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(preprocess_pdfs, "pipeline_code_version", lambda: self.code_version)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_main(self) -> int:
+        """main을 실행하고 실제로 빌드한 파일 수를 반환합니다."""
+        with mock.patch.object(preprocess_pdfs, "_build_file", wraps=preprocess_pdfs._build_file) as build, \
+                contextlib.redirect_stdout(io.StringIO()):
+            preprocess_pdfs.main(page_workers=1)
+        return build.call_count
+
+    def entry(self) -> dict:
+        manifest = json.loads((self.out / "manifest.json").read_text(encoding="utf-8"))
+        return manifest["entries"][CFG["out_name"]]
+
+    def test_skips_unchanged_inputs_and_rebuilds_on_pdf_or_code_change(self):
+        self.assertEqual(self.run_main(), 1)
+        first = self.entry()
+        self.assertTrue(first["changed"])
+        self.assertGreater(first["records"], 0)
+
+        # 입력이 같으면 건너뛰고 changed도 그대로 (인덱서가 아직 가져가지 않았을 수 있음)
+        self.assertEqual(self.run_main(), 0)
+        self.assertEqual(self.entry(), first)
+
+        # 코드 버전만 바뀌면 다시 빌드하지만 출력은 같음
+        self.code_version = "v2"
+        self.assertEqual(self.run_main(), 1)
+        self.assertEqual(self.entry()["output_sha256"], first["output_sha256"])
+        self.assertFalse(self.entry()["changed"])
+        self.assertEqual(self.run_main(), 0)
+
+        # PDF 내용이 바뀌면 다시 빌드
+        write_pdf(self.base / CFG["raw_name"], ["Gift tax is filed within three months of the gift date."] * 8)
+        self.assertEqual(self.run_main(), 1)
+        self.assertNotEqual(self.entry()["pdf_sha256"], first["pdf_sha256"])
+        self.assertTrue(self.entry()["changed"])
+
+        # 출력 파일이 지워지거나 바뀌어도 다시 빌드
+        (self.out / CFG["out_name"]).unlink()
+        self.assertEqual(self.run_main(), 1)
+
+    def test_changed_output_stays_pending_until_indexed(self):
+        self.run_main()
+        manifest = json.loads((self.out / "manifest.json").read_text(encoding="utf-8"))
+        self.assertEqual(changed_outputs(manifest, read_indexed_outputs(self.base, "docs")), {CFG["out_name"]})
+
+        # 인덱싱 전에 전처리를 한 번 더 실행해도 바뀐 파일로 남음
+        self.run_main()
+        manifest = json.loads((self.out / "manifest.json").read_text(encoding="utf-8"))
+        self.assertEqual(changed_outputs(manifest, read_indexed_outputs(self.base, "docs")), {CFG["out_name"]})
+
+        record_indexed_outputs(self.base, "docs", {CFG["out_name"]: self.entry()["output_sha256"]})
+        self.assertEqual(changed_outputs(manifest, read_indexed_outputs(self.base, "docs")), set())
+        # 다른 컬렉션은 따로 기록
+        self.assertEqual(changed_outputs(manifest, read_indexed_outputs(self.base, "other")), {CFG["out_name"]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,32 @@
+import re
 import unittest
-from preprocess_pdfs import chunk_simple, chunk_law
+from preprocess_pdfs import chunk_simple, chunk_law, split_sentences
+
+# 기준 구현 (고치지 말 것 - split_sentences(protect=True)가 이 결과와 같아야 함)
+def legacy_split_sentences(para: str) -> list:
+    """기존 chunk_law의 문장 분할: 보호 구간을 마커로 치환한 뒤 문장마다 마커를 되돌림"""
+    protected = {}
+    counter = 0
+    for match in reversed(list(re.finditer(r'<[^>]+>|\[[^\]]+\]', para))):
+        marker = f"__TAG_{counter}__"
+        protected[marker] = match.group(0)
+        para = para[:match.start()] + marker + para[match.end():]
+        counter += 1
+    for match in reversed(list(re.finditer(r'\d{4}\.\s*\d{1,2}\.\s*\d{1,2}\.', para))):
+        marker = f"__DATE_{counter}__"
+        protected[marker] = match.group(0)
+        para = para[:match.start()] + marker + para[match.end():]
+        counter += 1
+    sentences = re.split(r'([.!?。]\s+|\.\s+)', para)
+    sentence_parts = []
+    for i in range(0, len(sentences), 2):
+        sentence = sentences[i] + (sentences[i+1] if i+1 < len(sentences) else "")
+        sentence_parts.append(sentence.strip())
+    for j, sent in enumerate(sentence_parts):
+        for marker, original in protected.items():
+            sent = sent.replace(marker, original)
+        sentence_parts[j] = sent
+    return sentence_parts
 
 class TestChunking(unittest.TestCase):
     def test_chunk_simple_overlap(self):
@@ -41,5 +68,26 @@ class TestChunking(unittest.TestCase):
         overlap_text = chunk1_text[-20:]
         self.assertIn(overlap_text, chunk2_text)
 
+class TestSplitSentences(unittest.TestCase):
+    def test_protected_tags_and_dates_are_not_split(self):
+        para = "상속은 개시된다. <개정 2017. 12. 19.> 다음 문장. [본조신설 2020. 1. 1.] 끝."
+        self.assertEqual(
+            split_sentences(para, protect=True),
+            ["상속은 개시된다.", "<개정 2017. 12. 19.> 다음 문장.", "[본조신설 2020. 1. 1.] 끝."]
+        )
+        self.assertEqual(split_sentences(para, protect=True), legacy_split_sentences(para))
+
+    def test_unprotected_split_keeps_trailing_empty_sentence(self):
+        self.assertEqual(split_sentences("가. 나. "), ["가.", "나.", ""])
+
+    def test_unprotected_split_matches_simple_mode_re_split(self):
+        # simple 모드의 기존 분할: 날짜 안의 마침표에서도 나눔 (출력 유지를 위해 보호하지 않음)
+        para = "판례(대법원 2004.07.07. 선고)에 따릅니다. 신고 기한은? 6개월! 끝.\t다음"
+        parts = re.split(r'([.!?。]\s+|\.\s+)', para)
+        legacy = [(parts[i] + (parts[i + 1] if i + 1 < len(parts) else "")).strip()
+                  for i in range(0, len(parts), 2)]
+        self.assertEqual(split_sentences(para), legacy)
+        self.assertIn("판례(대법원 2004.07.07.", split_sentences(para))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,135 @@
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import fitz
+import preprocess_pdfs
+from preprocess_pdfs import (
+    PAGE_PARALLEL_MIN_PAGES, extract_text_from_pdf, write_jsonl,
+    clean_basic, iter_clean_basic,
+    chunk_law, iter_law_chunks,
+    chunk_simple, iter_simple_chunks,
+)
+
+class TestPageStreaming(unittest.TestCase):
+    def setUp(self):
+        # 페이지 경계에서 한글 단어와 "제N조" 헤더가 잘리는 경우를 포함
+        self.pages = [
+            "\x0c  제1조(목적) 이 법은 상속에 관한 사항을 정함을 목\n",
+            "적으로 한다. <개정 2020. 12. 22.>\n\n\n제2조(정의) 이 법에서 사용하는 용어의 뜻은 다음과 같다. 상속\n",
+            "\n민법권 및증여 ① 제1\n",
+            "2조에 따른다.\n\n제3조의2",
+            "(과세표준) 과세표준은 100분의 10을 곱한 금액으로 한다. 법제처 12 국가법령정보센터\n",
+            "   \n\n",
+        ]
+        self.full = "\n".join(self.pages)
+
+    def test_clean_basic_pieces_match_full_document(self):
+        pieces = list(iter_clean_basic(self.pages))
+        self.assertTrue(len(pieces) > 1)
+        self.assertEqual("".join(pieces), clean_basic(self.full))
+
+    def test_law_chunks_match_full_document(self):
+        pieces = list(iter_clean_basic(self.pages))
+        expected = chunk_law(clean_basic(self.full), "src", "cat", "law")
+        self.assertEqual(list(iter_law_chunks(pieces, "src", "cat", "law")), expected)
+        self.assertEqual([c["article_id"] for c in expected], ["제1조", "제2조", "제3조의2"])
+
+    def test_simple_chunks_match_full_document(self):
+        pages = [("가나다라마바사 " * 20 + "\n") for _ in range(30)]
+        pieces = list(iter_clean_basic(pages))
+        expected = chunk_simple(clean_basic("\n".join(pages)), "src", "cat", "s")
+        self.assertTrue(len(expected) > 1)
+        self.assertEqual(list(iter_simple_chunks(pieces, "src", "cat", "s")), expected)
+
+class TestPageParallelExtraction(unittest.TestCase):
+    def test_page_parallel_matches_single_process(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "big.pdf"
+            doc = fitz.open()
+            for i in range(PAGE_PARALLEL_MIN_PAGES + 10):
+                doc.new_page().insert_text((72, 72), f"page {i}")
+            doc.save(str(path))
+            doc.close()
+
+            text = extract_text_from_pdf(path)
+            self.assertIn(f"page {PAGE_PARALLEL_MIN_PAGES + 9}", text)
+            self.assertEqual(extract_text_from_pdf(path, workers=2), text)
+
+class TestParallelMain(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        # 페이지 단위 병렬 추출 대상인 큰 법령 PDF, 작은 안내 PDF, 깨진 PDF
+        doc = fitz.open()
+        for i in range(1, PAGE_PARALLEL_MIN_PAGES + 11):
+            doc.new_page().insert_text((72, 72), f"제{i}조(목적) 이 법은 상속에 관한 {i}번째 사항을 정한다.",
+                                       fontname="korea")
+        doc.save(str(self.base / "law.pdf"))
+        doc.close()
+        doc = fitz.open()
+        page = doc.new_page()
+        for i in range(12):
+            page.insert_text((72, 72 + 20 * i), f"Inheritance tax return {i} is filed within six months.")
+        doc.save(str(self.base / "guide.pdf"))
+        doc.close()
+        (self.base / "broken.pdf").write_bytes(b"not a pdf")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_main(self, out_dir: Path, **options):
+        """
+        main을 out_dir에 실행하고 (레코드 수, 출력) 반환
+        워커 프로세스가 패치한 전역 변수에 기대지 않도록 설정의 경로는 절대 경로로 줌
+        """
+        out_dir.mkdir()
+        files = [
+            {"raw_name": str(self.base / name), "out_name": str(out_dir / f"{name}.jsonl"), "mode": mode,
+             "id_prefix": name.split(".")[0], "category": "test"}
+            for name, mode in (("law.pdf", "law"), ("broken.pdf", "simple"), ("guide.pdf", "simple"))
+        ]
+        load_manifest, save_manifest = preprocess_pdfs.load_manifest, preprocess_pdfs.save_manifest
+        output = io.StringIO()
+        with mock.patch.object(preprocess_pdfs, "files_config", files), \
+                mock.patch.object(preprocess_pdfs, "load_manifest", lambda: load_manifest(out_dir / "m.json")), \
+                mock.patch.object(preprocess_pdfs, "save_manifest",
+                                  lambda manifest: save_manifest(manifest, out_dir / "m.json")), \
+                contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+            total = preprocess_pdfs.main(**options)
+        return total, output.getvalue()
+
+    def test_process_pool_output_matches_sequential_run(self):
+        sequential, _ = self.run_main(self.base / "seq", workers=1, page_workers=1)
+        parallel, output = self.run_main(self.base / "par", workers=2, page_workers=2)
+
+        self.assertGreater(sequential, PAGE_PARALLEL_MIN_PAGES)
+        self.assertEqual(parallel, sequential)
+        for name in ("law.pdf.jsonl", "guide.pdf.jsonl"):
+            self.assertEqual((self.base / "par" / name).read_bytes(), (self.base / "seq" / name).read_bytes())
+        # 깨진 PDF는 워커 안에서 실패해도 예외가 올라오지 않고 오류로 모아서 보고
+        self.assertFalse((self.base / "par" / "broken.pdf.jsonl").exists())
+        self.assertIn("[ERROR] 처리 실패", output)
+        self.assertIn(f"실패 1개 파일: {self.base / 'broken.pdf'}", output)
+
+class TestAtomicJsonlWriter(unittest.TestCase):
+    def test_failed_write_keeps_previous_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "out.jsonl"
+            self.assertEqual(write_jsonl(path, ({"id": i} for i in range(3))), 3)
+
+            def broken_records():
+                yield {"id": "new"}
+                raise RuntimeError("killed")
+
+            with self.assertRaises(RuntimeError):
+                write_jsonl(path, broken_records())
+            lines = path.read_text(encoding="utf-8").splitlines()
+            self.assertEqual([json.loads(line)["id"] for line in lines], [0, 1, 2])
+            self.assertEqual(sorted(p.name for p in Path(tmp).iterdir()), ["out.jsonl"])
+
+if __name__ == '__main__':
+    unittest.main()
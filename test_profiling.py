@@ -0,0 +1,46 @@
+import time
+import unittest
+import profiling
+from profiling import profile_stage, profiled_iter
+from preprocess_pdfs import BASIC_RULE_HITS, clean_basic
+
+class TestStageProfiler(unittest.TestCase):
+    def test_disabled_profiler_is_noop(self):
+        data = [1, 2, 3]
+        self.assertIs(profiled_iter("x", data), data)
+        with profile_stage("x"):
+            pass
+
+    def test_nested_stages_report_self_time(self):
+        def slow_items():
+            for i in range(3):
+                time.sleep(0.01)
+                yield i
+
+        with profiling.enabled() as profiler:
+            with profile_stage("outer"):
+                self.assertEqual(list(profiled_iter("inner", slow_items())), [0, 1, 2])
+        stages = profiler.report()
+        self.assertEqual(stages["inner"]["calls"], 4)  # StopIteration 호출 포함
+        self.assertGreaterEqual(stages["inner"]["wall_s"], 0.03)
+        self.assertLess(stages["outer"]["wall_s"], 0.01)
+        self.assertGreaterEqual(profiler.total["wall_s"], 0.03)
+
+    def test_peak_memory_is_tracked(self):
+        with profiling.enabled() as profiler:
+            with profile_stage("alloc"):
+                block = bytearray(4 << 20)
+                del block
+        self.assertGreaterEqual(profiler.report()["alloc"]["peak_bytes"], 4 << 20)
+
+class TestBasicRuleHits(unittest.TestCase):
+    def test_clean_basic_rule_hits_are_counted(self):
+        BASIC_RULE_HITS.clear()
+        self.assertEqual(clean_basic("상속\n\n민법권\x00 및\t\t제1조.\n\n\n\n다음"), "상속민법권 및 제1조.\n\n다음")
+        self.assertEqual(BASIC_RULE_HITS["한글_개행_복원"], 1)
+        self.assertEqual(BASIC_RULE_HITS["제어_문자"], 1)
+        self.assertEqual(BASIC_RULE_HITS["공백_축소"], 1)
+        self.assertEqual(BASIC_RULE_HITS["개행_축소"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+from pathlib import Path
+from embedding_cache import EmbeddingCache
+from query_cache import QueryEmbeddingCache, normalize_query
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class QueryEmbedder:
+    """받은 질문을 기록하고 [길이, 1] 벡터를 돌려주는 가짜 질문 임베딩 함수"""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return [float(len(text)), 1.0]
+
+class TestQueryEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.embed = QueryEmbedder()
+        self.clock = FakeClock()
+
+    def test_normalized_queries_share_an_entry(self):
+        self.assertEqual(normalize_query("  상속세   신고 기한은？ "), "상속세 신고 기한은")
+        self.assertEqual(normalize_query("???"), "???")
+        cache = QueryEmbeddingCache(self.embed, "m", clock=self.clock)
+        first = cache.embed("상속세 신고 기한은?")
+        self.assertEqual(cache.embed("상속세  신고 기한은"), first)
+        # 정규화한 문자열은 키로만 쓰고, 임베딩은 원래 질문으로
+        self.assertEqual(self.embed.calls, ["상속세 신고 기한은?"])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+        self.assertGreaterEqual(stats["saved_s"], 0.0)
+
+    def test_bounded_by_entries_bytes_and_ttl(self):
+        cache = QueryEmbeddingCache(self.embed, "m", max_entries=2, ttl=60, clock=self.clock)
+        cache.embed("유류분")
+        cache.embed("한정승인")
+        cache.embed("유류분")          # 최근 사용 → 한정승인이 가장 오래됨
+        cache.embed("상속포기")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.embed("유류분")
+        self.assertEqual(self.embed.calls, ["유류분", "한정승인", "상속포기"])
+
+        self.clock.now = 61
+        cache.embed("유류분")
+        self.assertEqual(self.embed.calls[-1], "유류분")
+        self.assertEqual(cache.stats()["expired"], 1)
+
+        # 벡터 하나가 8바이트 → 16바이트면 두 개까지
+        cache = QueryEmbeddingCache(self.embed, "m", max_bytes=16, clock=self.clock)
+        for query in ("가", "나", "다"):
+            cache.embed(query)
+        self.assertEqual((cache.stats()["entries"], cache.stats()["bytes"]), (2, 16))
+
+    def test_disk_tier_is_shared_between_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            disk = EmbeddingCache(Path(tmp) / "cache.sqlite3")
+            try:
+                first = QueryEmbeddingCache(self.embed, "m", disk=disk, clock=self.clock)
+                second = QueryEmbeddingCache(self.embed, "m", disk=disk, clock=self.clock)
+                vector = first.embed("배우자 상속공제")
+                self.assertEqual(second.embed("배우자 상속공제?"), vector)
+                self.assertEqual(len(self.embed.calls), 1)
+                self.assertEqual(second.stats()["disk_hits"], 1)
+                second.embed("배우자 상속공제")
+                self.assertEqual(second.stats()["hits"], 1)
+                self.assertIn("적중률 100%", second.report())
+            finally:
+                disk.close()
+
+if __name__ == '__main__':
+    unittest.main()
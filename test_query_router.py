@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+from query_router import PARTITION_KEYWORDS, PARTITIONS, PartitionRouter, keyword_scores
+
+class TestPartitionRouter(unittest.TestCase):
+    def setUp(self):
+        # 카테고리마다 축 하나를 중심 벡터로
+        self.centroids = {category: np.eye(len(PARTITIONS))[i] for i, category in enumerate(PARTITIONS)}
+
+    def test_keywords(self):
+        self.assertEqual(sorted(PARTITION_KEYWORDS), sorted(PARTITIONS))
+        router = PartitionRouter(self.centroids)
+        self.assertEqual(router.route("유류분 반환 청구는 언제까지?"), ["법령_민법_상속"])
+        # 세금 일반 용어는 법령과 국세청 안내 두 파티션
+        self.assertEqual(sorted(router.route("상속세 신고 기한")), ["법령_상속세증여세", "세금_안내"])
+        self.assertEqual(router.route("상증법 연부연납 신청"), ["법령_상속세증여세"])
+        # 긴 키워드가 짧은 키워드를 덮음 ("사망신고"의 "신고"는 세금 용어로 세지 않음)
+        self.assertEqual(keyword_scores("사망신고 하면서 안심상속 같이 신청"),
+                         {"안심상속_안내": 2, "행정기준": 1})
+        self.assertEqual(router.route("사망신고 하면서 안심상속 같이 신청"), ["안심상속_안내", "행정기준"])
+
+    def test_centroid_margin_and_fallback(self):
+        router = PartitionRouter(self.centroids, margin=0.1)
+        clear = np.array([0.1, 0.9, 0.0, 0.0, 0.0])
+        pair = np.array([0.6, 0.0, 0.58, 0.0, 0.1])
+        unsure = np.array([0.5, 0.48, 0.47, 0.0, 0.0])
+        self.assertEqual(router.route("물어볼 게 있어요", clear), ["법령_상속세증여세"])
+        self.assertEqual(router.route("물어볼 게 있어요", pair), ["법령_민법_상속", "세금_안내"])
+        self.assertIsNone(router.route("물어볼 게 있어요", unsure))
+        # 키워드가 세 파티션 이상에서 같은 점수면 중심 벡터로, 그래도 애매하면 전체
+        self.assertIsNone(router.route("유류분이랑 상속세", unsure))
+        self.assertIsNone(PartitionRouter().route("물어볼 게 있어요", clear))
+        self.assertEqual(router.stats()["keyword"], 0)
+        self.assertEqual((router.stats()["centroid"], router.stats()["fallback"]), (2, 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from token_budget import TokenCounter, estimate_tokens, get_tokenizer
+from preprocess_pdfs import iter_law_token_chunks, iter_simple_token_chunks
+
+class TestTokenCounter(unittest.TestCase):
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens("상속인은"), 4)
+        self.assertEqual(estimate_tokens("제1004조의2"), 6)  # 제, 100, 4, 조, 의, 2
+        self.assertEqual(estimate_tokens("  \n"), 0)
+        self.assertIs(get_tokenizer("estimate"), estimate_tokens)
+        with self.assertRaises(ValueError):
+            get_tokenizer("unknown")
+
+    def test_counts_are_cached_per_text(self):
+        calls = []
+        counter = TokenCounter(lambda text: calls.append(text) or len(text))
+        for _ in range(3):
+            self.assertEqual(counter.count("가나다"), 3)
+        self.assertEqual(calls, ["가나다"])
+        self.assertEqual((counter.hits, counter.misses), (2, 1))
+
+    def test_split_respects_budget(self):
+        counter = TokenCounter()
+        parts = counter.split("가나다라 마바사아 자차카타 파하", 5)
+        self.assertEqual(parts, ["가나다라", "마바사아", "자차카타", "파하"])
+
+class TestTokenChunks(unittest.TestCase):
+    def setUp(self):
+        sentences = " ".join(f"{i}. 상속인은 제{i}항에 따라 신고하여야 한다." for i in range(1, 40))
+        self.law = f"제1조(목적) 이 법은 상속에 관한 사항을 정함을 목적으로 한다.\n\n제2조(신고) {sentences}"
+        self.budget = {"max_tokens": 60, "overlap_tokens": 25}
+
+    def test_law_chunks_fit_budget_with_overlap(self):
+        chunks = list(iter_law_token_chunks([self.law], "src", "cat", "law", self.budget))
+        self.assertEqual(chunks[0]["article_id"], "제1조")
+        self.assertNotIn("sub_chunk", chunks[0])
+        long_article = [c for c in chunks if c["article_id"] == "제2조"]
+        self.assertTrue(len(long_article) > 5)
+        self.assertEqual([c["sub_chunk"] for c in long_article], list(range(1, len(long_article) + 1)))
+        for prev, cur in zip(long_article, long_article[1:]):
+            self.assertLessEqual(estimate_tokens(cur["text"]), 60)
+            # 앞 청크의 마지막 문장이 다음 청크 앞에 다시 들어감
+            last_sentence = prev["text"].rsplit(". ", 1)[-1]
+            self.assertIn(last_sentence, cur["text"])
+
+    def test_simple_chunks_fit_budget(self):
+        text = "\n\n".join("가나다라마바사 아자차카타파하. " * 5 for _ in range(10))
+        counter = TokenCounter()
+        chunks = list(iter_simple_token_chunks([text], "src", "cat", "s", self.budget, counter))
+        self.assertTrue(len(chunks) > 1)
+        self.assertTrue(all(estimate_tokens(c["text"]) <= 60 for c in chunks))
+        self.assertTrue(counter.hits > 0)
+
+if __name__ == '__main__':
+    unittest.main()
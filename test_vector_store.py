@@ -0,0 +1,167 @@
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+from unittest import mock
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+import vector_store
+from vector_store import (
+    ChromaSearchBackend, VectorStore, dequantize, export_collection, open_search_backend, quantize, write_store,
+)
+
+class TestVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.vectors = rng.normal(size=(300, 64)).astype(np.float32)
+        self.vectors /= np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        self.queries = rng.normal(size=(20, 64)).astype(np.float32)
+        self.ids = [f"doc_{i:04d}" for i in range(300)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def store(self, quantization=None):
+        directory = Path(self.tmp.name) / (quantization or "float32")
+        write_store(directory, self.ids, [f"본문 {i}" for i in range(300)],
+                    [{"n": i} for i in range(300)], self.vectors, quantization)
+        return VectorStore(directory)
+
+    def test_int8_scale_bounds_error(self):
+        codes, scales = quantize(self.vectors, "int8")
+        self.assertEqual(codes.dtype, np.int8)
+        error = np.abs(dequantize(codes, scales) - self.vectors)
+        self.assertTrue((error <= scales[:, None] / 2 + 1e-7).all())
+        with self.assertRaises(ValueError):
+            quantize(self.vectors, "int4")
+
+    def test_exact_search_matches_brute_force(self):
+        store = self.store()
+        for query in self.queries:
+            top, distances = store.search(query, k=5)
+            expected = ((self.vectors - query) ** 2).sum(axis=1)
+            np.testing.assert_array_equal(top, np.argsort(expected)[:5])
+            np.testing.assert_allclose(distances, np.sort(expected)[:5], rtol=1e-4)
+
+    def test_quantized_search_rescores_in_full_precision(self):
+        exact = self.store()
+        for quantization in ("float16", "int8"):
+            store = self.store(quantization)
+            self.assertLess(store.nbytes(), exact.nbytes())
+            for query in self.queries:
+                top, distances = store.search(query, k=5, rescore=20)
+                expected_top, expected_distances = exact.search(query, k=5)
+                np.testing.assert_array_equal(top, expected_top)
+                np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+
+    def test_export_collection_in_id_order(self):
+        client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+        collection = client.create_collection(name=f"test_{uuid.uuid4().hex}")
+        order = np.random.default_rng(1).permutation(300)
+        collection.add(ids=[self.ids[i] for i in order], embeddings=self.vectors[order],
+                       documents=[f"본문 {i}" for i in order], metadatas=[{"n": int(i)} for i in order])
+        meta = export_collection(collection, Path(self.tmp.name) / "export", "int8")
+        store = VectorStore(Path(self.tmp.name) / "export")
+        self.assertEqual((meta["count"], meta["dims"], meta["collection"]), (300, 64, collection.name))
+        self.assertEqual(store.ids, self.ids)
+        self.assertEqual(store.metadatas[7], {"n": 7})
+        np.testing.assert_allclose(store.vectors, self.vectors, rtol=1e-6)
+
+        # 챗봇 검색 결과 형식과 순위가 ChromaDB와 같음
+        chroma = ChromaSearchBackend(collection)
+        for query in self.queries[:5]:
+            expected = chroma.query(query.tolist(), n_results=5)
+            docs = store.query(query, n_results=5)
+            self.assertEqual([(d['text'], d['metadata'], d['rank']) for d in docs],
+                             [(d['text'], d['metadata'], d['rank']) for d in expected])
+            np.testing.assert_allclose([d['distance'] for d in docs], [d['distance'] for d in expected],
+                                       rtol=1e-4)
+
+    def test_partition_search_matches_chroma_filter(self):
+        client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+        collection = client.create_collection(name=f"test_{uuid.uuid4().hex}")
+        categories = ["민법", "상증법", "안내"]
+        collection.add(ids=self.ids, embeddings=self.vectors, documents=[f"본문 {i}" for i in range(300)],
+                       metadatas=[{"n": i, "category": categories[i % 3]} for i in range(300)])
+        export_collection(collection, Path(self.tmp.name) / "export", "int8")
+        store = VectorStore(Path(self.tmp.name) / "export")
+        # 카테고리 순서로 내보내므로 카테고리마다 연속된 행 구간 하나
+        self.assertEqual(store.partitions, {"민법": [(0, 100)], "상증법": [(100, 200)], "안내": [(200, 300)]})
+
+        chroma = ChromaSearchBackend(collection)
+        for query in self.queries[:5]:
+            for selected in (["상증법"], ["안내", "민법"]):
+                expected = chroma.query(query.tolist(), n_results=5, categories=selected)
+                docs = store.query(query, n_results=5, categories=selected)
+                self.assertEqual([d['id'] for d in docs], [d['id'] for d in expected])
+                self.assertTrue(all(d['metadata']['category'] in selected for d in docs))
+        self.assertEqual(store.query(self.queries[0], categories=["없음"]), [])
+
+        centroids = store.category_centroids()
+        self.assertEqual(sorted(centroids), categories)
+        for category, centroid in chroma.category_centroids().items():
+            np.testing.assert_allclose(centroid, centroids[category], atol=1e-5)
+
+    def test_reader_sees_one_generation_while_store_is_rewritten(self):
+        directory = Path(self.tmp.name) / "swap"
+        write_store(directory, self.ids, [f"본문 {i}" for i in range(300)], [{"n": i} for i in range(300)],
+                    self.vectors, "int8")
+        rewrites = {"count": 1}
+        read_meta = vector_store._read_meta
+
+        def rewrite_after_reading_meta(path):
+            # 챗봇이 store.json을 읽은 직후 index_data.py가 다른 내용으로 다시 내보냄
+            meta = read_meta(path)
+            for _ in range(rewrites.pop("count", 0)):
+                write_store(directory, ["new_0000", "new_0001"], ["새 본문 0", "새 본문 1"], [{}, {}],
+                            -self.vectors[:2], "int8")
+            return meta
+
+        with mock.patch.object(vector_store, "_read_meta", side_effect=rewrite_after_reading_meta):
+            store = VectorStore(directory)
+        # 이전 세대를 온전히 봄 (새 records와 이전 벡터가 섞이지 않음)
+        self.assertEqual(store.ids, self.ids)
+        self.assertEqual((len(store.vectors), len(store.norms), len(store.codes)), (300, 300, 300))
+        top, _ = store.search(self.vectors[7], k=1)
+        self.assertEqual(store.ids[top[0]], "doc_0007")
+        self.assertEqual(VectorStore(directory).ids, ["new_0000", "new_0001"])
+
+        # 두 번 다시 내보내 읽던 세대가 지워지면 새 store.json으로 다시 엶
+        rewrites["count"] = 2
+        with mock.patch.object(vector_store, "_read_meta", side_effect=rewrite_after_reading_meta):
+            store = VectorStore(directory)
+        self.assertEqual(store.ids, ["new_0000", "new_0001"])
+        np.testing.assert_allclose(store.vectors, -self.vectors[:2])
+        # 현재와 바로 이전 세대만 남음
+        self.assertEqual(len(list(directory.glob("records-*.jsonl"))), 2)
+        self.assertEqual(len(list(directory.glob("codes_int8-*.npy"))), 2)
+
+    def test_reads_store_written_before_generations(self):
+        directory = Path(self.tmp.name) / "legacy"
+        directory.mkdir()
+        with open(directory / "records.jsonl", "w", encoding="utf-8") as f:
+            f.write('{"id": "doc_0000", "document": "본문 0", "metadata": {}}\n')
+        np.save(directory / "vectors.npy", self.vectors[:1])
+        np.save(directory / "norms.npy", np.ones(1, dtype=np.float32))
+        (directory / "store.json").write_text('{"count": 1, "dims": 64, "quantization": null}', encoding="utf-8")
+        self.assertEqual(VectorStore(directory).ids, ["doc_0000"])
+
+        # 다시 내보내면 이전 파일은 한 세대 동안 남았다가 지워짐
+        for _ in range(2):
+            write_store(directory, self.ids[:3], ["a", "b", "c"], [{}, {}, {}], self.vectors[:3])
+        self.assertFalse((directory / "records.jsonl").exists())
+        self.assertEqual(VectorStore(directory).ids, self.ids[:3])
+
+    def test_open_search_backend(self):
+        with self.assertRaises(FileNotFoundError):
+            open_search_backend("missing", backend="numpy", store_dir=Path(self.tmp.name))
+        with self.assertRaises(ValueError):
+            open_search_backend("missing", backend="faiss")
+        self.store()
+        store = open_search_backend("float32", backend="numpy", store_dir=Path(self.tmp.name))
+        self.assertEqual(len(store.query(self.queries[0], n_results=500)), 300)
+
+if __name__ == '__main__':
+    unittest.main()
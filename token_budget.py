@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+토큰 예산 청킹용 토크나이저
+
+토크나이저는 "텍스트 → 토큰 수" 함수 하나로 통일합니다.
+- estimate_tokens: 외부 의존성 없이 동작하는 한국어 토큰 수 추정기 (기본값)
+- tiktoken_counter: tiktoken이 설치되어 있고 인코딩 파일을 받을 수 있을 때 정확한 토큰 수
+
+TokenCounter는 토크나이저 결과를 문장 단위로 캐시하여 같은 문장을 다시 세지 않습니다.
+"""
+
+import re
+
+# 한 번의 매치를 토큰 하나로 봅니다.
+# - 한글 음절은 BPE 토크나이저에서 대체로 음절당 1토큰 이상
+# - 숫자는 3자리, 영문은 4글자 정도가 1토큰
+# - 그 밖의 기호는 1자당 1토큰, 공백은 다음 토큰에 붙으므로 세지 않음
+ESTIMATE_PATTERN = re.compile(r'[가-힣]|\d{1,3}|[A-Za-z]{1,4}|[^\s가-힣\dA-Za-z]')
+
+def estimate_tokens(text: str) -> int:
+    """오프라인 토큰 수 추정기 (tiktoken cl100k_base 기준으로 약간 크게 잡음)"""
+    return len(ESTIMATE_PATTERN.findall(text))
+
+def tiktoken_counter(encoding_name: str = "cl100k_base"):
+    """
+    tiktoken 인코딩으로 토큰 수를 세는 함수를 반환합니다.
+    tiktoken은 선택 의존성이므로 이 함수를 부를 때만 import합니다.
+    """
+    import tiktoken
+    encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(text: str) -> int:
+        return len(encoding.encode(text, disallowed_special=()))
+    return count
+
+def get_tokenizer(name: str = "estimate"):
+    """
+    이름으로 토크나이저를 고릅니다.
+    "estimate" → estimate_tokens, "tiktoken" 또는 "tiktoken:<인코딩>" → tiktoken_counter
+    """
+    if name == "estimate":
+        return estimate_tokens
+    if name == "tiktoken" or name.startswith("tiktoken:"):
+        _, _, encoding_name = name.partition(":")
+        return tiktoken_counter(encoding_name or "cl100k_base")
+    raise ValueError(f"알 수 없는 토크나이저: {name}")
+
+class TokenCounter:
+    """
+    토크나이저 결과를 텍스트(문장) 단위로 캐시합니다.
+    청크 예산을 맞출 때 같은 문장을 여러 번 세더라도 토크나이저는 한 번만 호출됩니다.
+    """
+
+    def __init__(self, tokenizer=estimate_tokens, max_entries: int = 100_000):
+        self.tokenizer = tokenizer
+        self.max_entries = max_entries
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str) -> int:
+        n = self.cache.get(text)
+        if n is not None:
+            self.hits += 1
+            return n
+        self.misses += 1
+        n = self.tokenizer(text)
+        if len(self.cache) >= self.max_entries:
+            self.cache.clear()
+        self.cache[text] = n
+        return n
+
+    def split(self, text: str, max_tokens: int) -> list:
+        """
+        예산을 넘는 텍스트를 앞에서부터 max_tokens 이하 조각으로 자릅니다.
+        조각 끝은 가능하면 공백에 맞추고, 잘린 조각은 캐시하지 않습니다.
+        """
+        parts = []
+        while text and self.tokenizer(text) > max_tokens:
+            # 토큰 수가 예산 이하인 가장 긴 접두사 (이진 탐색)
+            lo, hi = 1, len(text)
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if self.tokenizer(text[:mid]) <= max_tokens:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            space = text.rfind(" ", 0, lo)
+            cut = space if space > 0 else lo
+            parts.append(text[:cut].strip())
+            text = text[cut:].strip()
+        if text:
+            parts.append(text)
+        return parts
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumPy 벡터 저장소 (연속된 .npy 파일, 메모리 맵)
+
+ChromaDB 컬렉션의 청크를 디렉토리 하나로 내보내고 NumPy로 검색합니다.
+
+    vector_store/<컬렉션 이름>/
+        store.json                개수, 차원, 임베딩 모델, 양자화 방식, 이번 세대의 파일 이름 ("files")
+        records-<세대>.jsonl      행 순서대로 {"id", "document", "metadata"}
+        vectors-<세대>.npy        float32 (n, dims) - 전체 정밀도, 후보 재채점에만 읽음
+        norms-<세대>.npy          float32 (n,) - 벡터 제곱 노름
+        codes_int8-<세대>.npy     int8 (n, dims) + scales_int8-<세대>.npy float32 (n,)  (--export-vectors int8)
+        codes_float16-<세대>.npy  float16 (n, dims) + scales_float16-<세대>.npy (모두 1) (--export-vectors float16)
+
+- 내보낼 때마다 새 세대 이름으로 파일을 쓰고 store.json을 마지막에 교체합니다.
+  읽는 쪽은 store.json이 가리키는 한 세대의 파일만 열므로 내보내는 중에 열어도 이전 저장소나 새 저장소 중
+  하나를 온전히 봅니다. 바로 이전 세대는 남겨 두고 그보다 오래된 파일만 지웁니다.
+
+- int8은 벡터마다 max|x| / 127을 스케일로 두고 반올림합니다. (스칼라 양자화)
+- 양자화된 코드로 전체를 훑어 거리가 가까운 후보(기본 20개)를 고른 뒤,
+  후보만 float32로 다시 계산해 상위 k개를 돌려줍니다. vectors.npy는 메모리 맵이라 후보 행만 읽힙니다.
+- 거리는 ChromaDB 기본값과 같은 제곱 L2 거리입니다.
+
+    python index_data.py --export-vectors int8
+    python benchmarks/bench_quantized_vectors.py     # 전체 정밀도 대비 recall@5
+
+챗봇의 검색 백엔드는 VECTOR_STORE 환경 변수로 고릅니다. (open_search_backend)
+
+    VECTOR_STORE=chroma     # 기본값, ChromaDB 컬렉션
+    VECTOR_STORE=numpy      # 이 저장소 (행렬-벡터 곱 한 번 + argpartition, chromadb를 import하지 않음)
+    VECTOR_QUANTIZATION=int8    # numpy 저장소로 내보낼 형식 (float32 기본, float16, int8)
+"""
+
+import os
+import re
+import json
+import uuid
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+
+DEFAULT_STORE_DIR = Path(__file__).parent / "vector_store"
+DEFAULT_DB_DIR = Path(__file__).parent / "chroma_db"
+BACKENDS = ("chroma", "numpy")
+QUANTIZATIONS = ("float16", "int8")
+# 양자화 검색에서 전체 정밀도로 다시 계산할 후보 수 (k보다 작으면 k)
+DEFAULT_RESCORE_CANDIDATES = 20
+# 양자화 코드를 float32로 바꿔 계산하는 행 묶음 크기 (임시 메모리 상한)
+_SCAN_BLOCK_ROWS = 4096
+# collection.get 한 번에 가져올 청크 수
+_EXPORT_PAGE = 1000
+# store.json에 "files"가 없는 (세대 이름 이전) 저장소의 파일 이름
+_LEGACY_FILES = {"records": "records.jsonl", "vectors": "vectors.npy", "norms": "norms.npy"}
+# 저장소 디렉토리 안의 데이터 파일 (세대 이름이 붙었거나 없는)
+_STORE_FILE = re.compile(r"(records|vectors|norms|codes_\w+?|scales_\w+?)(-[\w-]+)?\.(jsonl|npy)")
+# 읽는 도중 store.json이 두 번 이상 바뀌어 파일이 지워졌을 때 다시 열어 볼 횟수
+_OPEN_ATTEMPTS = 3
+
+def quantize(matrix: np.ndarray, kind: str) -> tuple:
+    """(codes, scales) - codes * scales[:, None] ≈ matrix"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if kind == "float16":
+        return matrix.astype(np.float16), np.ones(len(matrix), dtype=np.float32)
+    if kind == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0 if matrix.size else np.zeros(len(matrix), np.float32)
+        scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+        codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+    raise ValueError(f"알 수 없는 양자화 방식: {kind} ({', '.join(QUANTIZATIONS)} 중 하나)")
+
+def dequantize(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return codes.astype(np.float32) * scales[:, None]
+
+def _save_npy(path: Path, array: np.ndarray):
+    """임시 파일에 저장한 뒤 교체 (읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)"""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _read_meta(directory: Path) -> dict:
+    return json.loads((Path(directory) / "store.json").read_text(encoding="utf-8"))
+
+def _store_files(meta: dict) -> dict:
+    """store.json이 가리키는 {"records", "vectors", "norms"[, "codes", "scales"]} 파일 이름"""
+    if "files" in meta:
+        return meta["files"]
+    files = dict(_LEGACY_FILES)
+    if meta.get("quantization"):
+        files["codes"] = f"codes_{meta['quantization']}.npy"
+        files["scales"] = f"scales_{meta['quantization']}.npy"
+    return files
+
+def write_store(directory: Path, ids: list, documents: list, metadatas: list, vectors,
+                quantization: str = None, info: dict = None) -> dict:
+    """
+    청크들을 저장소 디렉토리에 새 세대 파일로 쓰고 store.json을 마지막에 교체합니다.
+    읽는 쪽은 store.json이 가리키는 파일만 열므로 항상 한 세대의 완성된 저장소를 봅니다.
+    현재와 바로 이전 세대가 아닌 파일은 지웁니다.
+
+    Returns:
+        store.json 내용
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+    if quantization is not None and quantization not in QUANTIZATIONS:
+        raise ValueError(f"알 수 없는 양자화 방식: {quantization} ({', '.join(QUANTIZATIONS)} 중 하나)")
+    try:
+        previous = _store_files(_read_meta(directory))
+    except (OSError, ValueError):
+        previous = {}
+
+    generation = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    files = {"records": f"records-{generation}.jsonl", "vectors": f"vectors-{generation}.npy",
+             "norms": f"norms-{generation}.npy"}
+    if quantization:
+        files["codes"] = f"codes_{quantization}-{generation}.npy"
+        files["scales"] = f"scales_{quantization}-{generation}.npy"
+
+    tmp_path = directory / f".{files['records']}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            f.write(json.dumps({"id": doc_id, "document": document, "metadata": metadata},
+                               ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, directory / files["records"])
+
+    _save_npy(directory / files["vectors"], vectors)
+    _save_npy(directory / files["norms"], np.einsum("ij,ij->i", vectors, vectors).astype(np.float32))
+    if quantization:
+        codes, scales = quantize(vectors, quantization)
+        _save_npy(directory / files["codes"], codes)
+        _save_npy(directory / files["scales"], scales)
+
+    meta = {
+        **(info or {}),
+        "count": len(ids),
+        "dims": int(vectors.shape[1]) if len(ids) else 0,
+        "quantization": quantization,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "files": files,
+    }
+    tmp_path = directory / ".store.json.tmp"
+    tmp_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp_path, directory / "store.json")
+
+    # 이전 세대를 읽기 시작한 쪽이 있을 수 있으므로 바로 이전 세대는 남겨 둠
+    keep = set(files.values()) | set(previous.values())
+    for path in directory.iterdir():
+        if _STORE_FILE.fullmatch(path.name) and path.name not in keep:
+            path.unlink(missing_ok=True)
+    return meta
+
+def export_collection(collection, directory: Path, quantization: str = None, info: dict = None) -> dict:
+    """
+    ChromaDB 컬렉션 전체를 (카테고리, id) 순서로 저장소 디렉토리에 내보냅니다.
+    같은 카테고리의 청크가 연속된 행에 모이므로 카테고리(파티션) 검색은 메모리 맵의 한 구간만 읽습니다.
+    """
+    ids, documents, metadatas, pages = [], [], [], []
+    total = collection.count()
+    for offset in range(0, total, _EXPORT_PAGE):
+        page = collection.get(include=["embeddings", "documents", "metadatas"],
+                              limit=_EXPORT_PAGE, offset=offset)
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+    order = sorted(range(len(ids)), key=lambda i: ((metadatas[i] or {}).get('category', ''), ids[i]))
+    vectors = np.concatenate(pages)[order] if pages else np.zeros((0, 0), dtype=np.float32)
+    return write_store(directory, [ids[i] for i in order], [documents[i] for i in order],
+                       [metadatas[i] for i in order], vectors, quantization,
+                       {"collection": collection.name, **(info or {})})
+
+def partition_ranges(metadatas: list) -> dict:
+    """{카테고리: [(시작 행, 끝 행), ...]} - 같은 카테고리가 이어진 구간들 (카테고리가 없는 청크는 제외)"""
+    ranges = {}
+    start = 0
+    for row in range(1, len(metadatas) + 1):
+        category = (metadatas[start] or {}).get('category')
+        if row == len(metadatas) or (metadatas[row] or {}).get('category') != category:
+            if category:
+                ranges.setdefault(category, []).append((start, row))
+            start = row
+    return ranges
+
+def category_centroids(vectors, categories: list) -> dict:
+    """{카테고리: 단위 벡터들의 평균을 다시 단위 벡터로} - 질문 라우팅(query_router.py)용"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True) if len(vectors) else np.ones((0, 1), np.float32)
+    unit = vectors / np.where(norms == 0, 1.0, norms)
+    labels = np.asarray(categories, dtype=object)
+    centroids = {}
+    for category in sorted({c for c in categories if c}):
+        mean = unit[labels == category].mean(axis=0)
+        norm = float(np.linalg.norm(mean))
+        if norm > 0:
+            centroids[category] = mean / norm
+    return centroids
+
+def _top_k(distances: np.ndarray, k: int) -> np.ndarray:
+    """거리가 가장 작은 k개의 위치 (가까운 순)"""
+    if k >= len(distances):
+        return np.argsort(distances, kind="stable")
+    top = np.argpartition(distances, k - 1)[:k]
+    return top[np.argsort(distances[top], kind="stable")]
+
+class VectorStore:
+    """
+    write_store로 만든 디렉토리를 읽어 검색합니다.
+    벡터 파일은 메모리 맵으로 열어 실제로 읽는 부분만 메모리에 올라옵니다.
+    """
+
+    def __init__(self, directory: Path, quantization: str = "auto"):
+        """
+        Args:
+            quantization: "auto"면 store.json에 기록된 방식, None이면 양자화 코드를 쓰지 않고 float32로 검색
+        """
+        self.directory = Path(directory)
+        for attempt in range(_OPEN_ATTEMPTS):
+            try:
+                self._open(quantization)
+                break
+            except FileNotFoundError:
+                # store.json을 읽은 뒤 두 번 이상 다시 내보내 그 세대가 지워짐 → 새 store.json으로 다시
+                if attempt == _OPEN_ATTEMPTS - 1:
+                    raise
+        # 카테고리 → 연속 행 구간 (export_collection은 카테고리 순서로 쓰므로 보통 카테고리마다 한 구간)
+        self.partitions = partition_ranges(self.metadatas)
+
+    def _open(self, quantization: str):
+        """store.json을 한 번 읽고 그 세대의 파일만 엽니다."""
+        self.meta = _read_meta(self.directory)
+        files = _store_files(self.meta)
+        self.ids, self.documents, self.metadatas = [], [], []
+        with open(self.directory / files["records"], "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                self.ids.append(record["id"])
+                self.documents.append(record["document"])
+                self.metadatas.append(record["metadata"])
+        self.vectors = np.load(self.directory / files["vectors"], mmap_mode="r")
+        self.norms = np.load(self.directory / files["norms"])
+        self.quantization = self.meta.get("quantization") if quantization == "auto" else quantization
+        self.codes = self.scales = None
+        if self.quantization:
+            if self.quantization != self.meta.get("quantization"):
+                raise ValueError(f"저장소에 {self.quantization} 양자화 코드가 없습니다: {self.directory}")
+            self.codes = np.load(self.directory / files["codes"], mmap_mode="r")
+            self.scales = np.load(self.directory / files["scales"])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        """검색할 때 전부 훑는 배열의 크기 (양자화 코드 또는 float32 벡터 + 노름/스케일)"""
+        scanned = self.codes if self.codes is not None else self.vectors
+        return scanned.nbytes + self.norms.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _approximate_dots(self, query: np.ndarray, start: int, end: int) -> np.ndarray:
+        dots = np.empty(end - start, dtype=np.float32)
+        for block_start in range(start, end, _SCAN_BLOCK_ROWS):
+            block = np.asarray(self.codes[block_start:min(block_start + _SCAN_BLOCK_ROWS, end)])
+            dots[block_start - start:block_start - start + len(block)] = block.astype(np.float32) @ query
+        return dots * self.scales[start:end]
+
+    def _search_range(self, query: np.ndarray, query_norm: float, k: int, rescore: int,
+                      start: int, end: int) -> tuple:
+        """행 start..end 구간에서 가장 가까운 k개 (행 번호는 전체 기준)"""
+        norms = self.norms[start:end]
+        if self.codes is None:
+            distances = norms + query_norm - 2 * (self.vectors[start:end] @ query)
+            top = _top_k(distances, k)
+            return top + start, distances[top]
+
+        approximate = norms + query_norm - 2 * self._approximate_dots(query, start, end)
+        if not rescore:
+            top = _top_k(approximate, k)
+            return top + start, approximate[top]
+        candidates = np.sort(_top_k(approximate, max(k, rescore))) + start  # 메모리 맵을 앞에서부터 읽도록 정렬
+        exact = self.norms[candidates] + query_norm - 2 * (self.vectors[candidates] @ query)
+        top = _top_k(exact, k)
+        return candidates[top], exact[top]
+
+    def search(self, query_embedding, k: int = 5, rescore: int = DEFAULT_RESCORE_CANDIDATES,
+               categories: list = None) -> tuple:
+        """
+        query_embedding과 제곱 L2 거리가 가장 가까운 k개
+
+        양자화 코드가 있으면 근사 거리로 max(k, rescore)개 후보를 고른 뒤 float32로 다시 계산합니다.
+        rescore=0이면 근사 거리 그대로 상위 k개를 돌려줍니다.
+        categories를 주면 그 카테고리들의 행 구간만 훑고 구간별 상위 k개를 합칩니다.
+
+        Returns:
+            (행 번호 배열, 거리 배열) - 가까운 순
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = float(query @ query)
+        if categories is None:
+            ranges = [(0, len(self))]
+        else:
+            ranges = [r for category in dict.fromkeys(categories) for r in self.partitions.get(category, [])]
+        ranges = [(start, end) for start, end in ranges if end > start]
+        if not ranges or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if len(ranges) == 1:
+            return self._search_range(query, query_norm, k, rescore, *ranges[0])
+
+        found = [self._search_range(query, query_norm, k, rescore, start, end) for start, end in ranges]
+        rows = np.concatenate([r for r, _ in found])
+        distances = np.concatenate([d for _, d in found])
+        top = _top_k(distances, k)
+        return rows[top], distances[top]
+
+    def query(self, query_embedding, n_results: int = 5, categories: list = None) -> list:
+        """
+        search_relevant_docs와 같은 형식: [{"id", "text", "metadata", "distance", "rank"}, ...]
+        categories를 주면 그 카테고리(파티션)의 청크만 검색합니다.
+        """
+        top, distances = self.search(query_embedding, n_results, categories=categories)
+        return [
+            {
+                'id': self.ids[i],
+                'text': self.documents[i],
+                'metadata': dict(self.metadatas[i]),
+                'distance': float(distance),
+                'rank': rank,
+            }
+            for rank, (i, distance) in enumerate(zip(top.tolist(), distances.tolist()), 1)
+        ]
+
+    def category_centroids(self) -> dict:
+        return category_centroids(self.vectors, [(m or {}).get('category') for m in self.metadatas])
+
+class ChromaSearchBackend:
+    """ChromaDB 컬렉션 검색 (VectorStore.query와 같은 결과 형식)"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def query(self, query_embedding, n_results: int = 5, categories: list = None) -> list:
+        """
+        categories를 주면 category 메타데이터로 거른 청크만 검색합니다.
+        (카테고리마다 컬렉션을 따로 두지 않고 where 필터로 파티션을 나눔)
+        """
+        where = None
+        if categories is not None:
+            categories = list(dict.fromkeys(categories))
+            if not categories:
+                return []
+            where = {"category": categories[0]} if len(categories) == 1 else {"category": {"$in": categories}}
+        results = self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            where=where,
+            include=['documents', 'metadatas', 'distances']
+        )
+
+        # 결과 정리
+        relevant_docs = []
+        if results['documents'] and len(results['documents'][0]) > 0:
+            for i, (doc_id, doc, metadata, distance) in enumerate(zip(
+                results['ids'][0],
+                results['documents'][0],
+                results['metadatas'][0],
+                results['distances'][0]
+            )):
+                relevant_docs.append({
+                    'id': doc_id,
+                    'text': doc,
+                    'metadata': metadata,
+                    'distance': distance,
+                    'rank': i + 1
+                })
+        return relevant_docs
+
+    def category_centroids(self) -> dict:
+        vectors, categories = [], []
+        for offset in range(0, self.collection.count(), _EXPORT_PAGE):
+            page = self.collection.get(include=["embeddings", "metadatas"], limit=_EXPORT_PAGE, offset=offset)
+            vectors.extend(page["embeddings"])
+            categories.extend((metadata or {}).get('category') for metadata in page["metadatas"])
+        return category_centroids(np.asarray(vectors, dtype=np.float32).reshape(len(categories), -1), categories)
+
+def configured_backend() -> str:
+    name = (os.getenv("VECTOR_STORE") or "chroma").strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 VECTOR_STORE: {name} ({', '.join(BACKENDS)} 중 하나)")
+    return name
+
+def configured_export() -> str:
+    """VECTOR_STORE=numpy면 인덱싱 후 내보낼 형식(VECTOR_QUANTIZATION, 기본 float32), 아니면 None"""
+    if configured_backend() != "numpy":
+        return None
+    return (os.getenv("VECTOR_QUANTIZATION") or "float32").strip().lower()
+
+def open_search_backend(collection_name: str, backend: str = None, db_dir: Path = DEFAULT_DB_DIR,
+                        store_dir: Path = DEFAULT_STORE_DIR):
+    """
+    챗봇용 검색 백엔드를 엽니다. (query(query_embedding, n_results, categories=None) -> list)
+    backend를 생략하면 VECTOR_STORE 환경 변수를 읽습니다.
+    컬렉션/저장소가 없으면 FileNotFoundError를 냅니다.
+    """
+    backend = backend or configured_backend()
+    if backend == "numpy":
+        directory = Path(store_dir) / collection_name
+        if not (directory / "store.json").exists():
+            raise FileNotFoundError(
+                f"벡터 저장소가 없습니다: {directory} "
+                "(먼저 'python index_data.py --export-vectors float32'를 실행하세요)"
+            )
+        return VectorStore(directory)
+    if backend == "chroma":
+        # chromadb는 import가 무거우므로 chroma 백엔드를 쓸 때만 불러옴
+        import chromadb
+        from chromadb.config import Settings
+        client = chromadb.PersistentClient(path=str(db_dir), settings=Settings(anonymized_telemetry=False))
+        try:
+            return ChromaSearchBackend(client.get_collection(name=collection_name))
+        except Exception as e:
+            raise FileNotFoundError(
+                f"'{collection_name}' 컬렉션을 찾을 수 없습니다. "
+                "(먼저 'python index_data.py'를 실행하여 데이터를 인덱싱하세요)"
+            ) from e
+    raise ValueError(f"알 수 없는 검색 백엔드: {backend} ({', '.join(BACKENDS)} 중 하나)")